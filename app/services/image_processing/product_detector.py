@@ -18,15 +18,35 @@ import json
 from PIL import Image
 import numpy as np
 
+from backend.app.services.image_processing.analysis_cache import (
+    AnalysisCache,
+    config_version,
+    content_hash,
+)
+
 logger = logging.getLogger(__name__)
 
 class ProductDetector:
     """Handles AI-powered product detection and analysis."""
     
-    def __init__(self):
+    # Bump when analysis output changes so cached results are recomputed
+    version = "1"
+    
+    def __init__(self, cache: Optional[AnalysisCache] = None):
         self.client = vision.ImageAnnotatorClient()
         self.confidence_threshold = 0.7
         self.condition_grades = ['New', 'Like New', 'Very Good', 'Good', 'Fair', 'Poor']
+        self.cache = cache or AnalysisCache(config_version(self.config))
+        
+    @property
+    def config(self) -> Dict:
+        """Settings that change analysis output, used to version cached results."""
+        return {
+            'detector': 'vision-batch',
+            'version': self.version,
+            'confidence_threshold': self.confidence_threshold,
+            'condition_grades': self.condition_grades
+        }
         
     def analyze_product(self, image_data: bytes) -> Dict:
         """
@@ -38,6 +58,11 @@ class ProductDetector:
         Returns:
             Dictionary containing analysis results
         """
+        digest = content_hash(image_data)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            return cached
+            
         try:
             # Prepare image for API
             image = vision.Image(content=image_data)
@@ -68,6 +93,7 @@ class ProductDetector:
                 'authenticity': self._verify_authenticity(result)
             }
             
+            self.cache.put(digest, analysis)
             return analysis
             
         except Exception as e:
@@ -19,22 +19,45 @@ app = FastAPI(title="Guilt Free Goods API")
 # Database lifecycle events
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database and background jobs."""
+    """Initialize database, marketplace clients and background jobs."""
     await init_db()
     
-    # Initialize background jobs
-    from .services.background_jobs.item_recheck import ItemRecheckJob
+    from .marketplace_integrations.clients import marketplace_clients
+    marketplace_clients.start()
     
+    # Queue background jobs; the worker pool runs them after startup
+    from .services.background_jobs.registry import (
+        enqueue_daily_market_research,
+        enqueue_daily_repricing,
+        enqueue_daily_snapshot,
+        enqueue_item_recheck,
+        worker_pool,
+    )
+    
+    worker_pool.start()
     try:
-        db = get_db()  # This returns a Prisma client instance
-        recheck_job = ItemRecheckJob(db)
-        await recheck_job.recheck_all_items()
+        await enqueue_item_recheck()
+        await enqueue_daily_snapshot()
+        await enqueue_daily_market_research()
+        await enqueue_daily_repricing()
     except Exception as e:
-        logging.error(f"Failed to initialize background jobs: {str(e)}")
+        logging.error(f"Failed to queue background jobs: {str(e)}")
         # Don't raise the error to allow the app to start without background jobs
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    from .marketplace_integrations.clients import marketplace_clients
+    from .marketplace_integrations.listing_writer import listing_writer
+    from .services.background_jobs.registry import worker_pool
+    
+    # Unfinished jobs are picked up again once their leases expire
+    await worker_pool.stop()
+    try:
+        # Persist buffered listing updates before the pool goes away
+        await listing_writer.stop()
+    except Exception as e:
+        logging.error(f"Failed to flush buffered listing updates: {str(e)}")
+    await marketplace_clients.close()
     await close_db()
 
 # Register global exception handlers
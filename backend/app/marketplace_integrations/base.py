@@ -1,9 +1,32 @@
 """Base classes for marketplace integrations."""
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
+import asyncio
+
+import httpx
+
+from .exceptions import MarketplaceError
+from .http_session import HttpSessionManager, http_sessions
+from .rate_limiter import MarketplaceScheduler, scheduler as default_scheduler
 
 class MarketplaceClient(ABC):
-    """Abstract base class for marketplace clients."""
+    """Abstract base class for marketplace clients.
+    
+    Platform calls made by subclasses should be decorated with
+    ``rate_limited`` so they are scheduled under this client's
+    ``marketplace`` limits, and HTTP requests should go through
+    ``session`` so connections are pooled and shared across clients.
+    """
+    
+    marketplace: str = ""
+    base_url: str = ""
+    scheduler: MarketplaceScheduler = default_scheduler
+    http: HttpSessionManager = http_sessions
+    
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP session for this client's API host."""
+        return self.http.get(self.base_url)
     
     @abstractmethod
     async def create_listing(self, listing_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -33,6 +56,34 @@ class MarketplaceClient(ABC):
         """
         pass
         
+    async def update_stock_bulk(
+        self,
+        quantities: Dict[str, int]
+    ) -> Dict[str, Optional[MarketplaceError]]:
+        """Update stock levels for several listings at once.
+        
+        Clients whose platform offers a bulk inventory endpoint should
+        override this; the default issues the per-listing updates
+        concurrently under the client's scheduler limits.
+        
+        Args:
+            quantities: Dictionary mapping listing ID to new stock quantity
+            
+        Returns:
+            Dictionary mapping each listing ID to None once updated, or to
+            the MarketplaceError raised for it (CallDeferredError if the
+            update was queued for retry)
+        """
+        listing_ids = list(quantities)
+        results = await asyncio.gather(
+            *(self.update_stock(listing_id, quantities[listing_id]) for listing_id in listing_ids),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, MarketplaceError):
+                raise result
+        return dict(zip(listing_ids, results))
+        
     @abstractmethod
     async def end_listing(self, listing_id: str) -> None:
         """End/remove a listing from the marketplace.
@@ -0,0 +1,335 @@
+"""
+Per-marketplace circuit breaking and retry backoff for marketplace API calls.
+
+Each marketplace gets a ``CircuitBreaker``. Consecutive failures past a
+threshold open the circuit, and calls are then rejected immediately with
+``CircuitOpenError`` instead of waiting on a platform that is down. After
+the reset timeout one probe call is let through; success closes the circuit,
+failure reopens it with a doubled timeout. Failed calls are retried with
+exponential backoff that also grows with the breaker's recent failures.
+
+Writes that can safely run later are parked in a ``RetryQueue`` while the
+circuit is open and replayed once it closes. Only the latest write per
+method and target is kept, and a newer write that succeeds directly
+supersedes the queued one.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .exceptions import AuthenticationError, CircuitOpenError, ParseError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Errors that say nothing about the platform's health
+NON_TRIPPING_ERRORS = (AuthenticationError, ParseError, CircuitOpenError)
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    """Trip, recovery and retry settings for a marketplace."""
+    failure_threshold: int = 5
+    reset_timeout: float = 15.0
+    max_reset_timeout: float = 300.0
+    max_retries: int = 2
+    base_backoff: float = 0.2
+    max_backoff: float = 5.0
+    retry_queue_size: int = 1000
+
+    @classmethod
+    def from_env(cls, marketplace: str) -> "CircuitBreakerConfig":
+        """
+        Build a config from environment variables, falling back to defaults.
+
+        Reads ``<MARKETPLACE>_BREAKER_FAILURE_THRESHOLD``,
+        ``<MARKETPLACE>_BREAKER_RESET_TIMEOUT``,
+        ``<MARKETPLACE>_BREAKER_MAX_RESET_TIMEOUT``,
+        ``<MARKETPLACE>_MAX_RETRIES``, ``<MARKETPLACE>_BASE_BACKOFF``,
+        ``<MARKETPLACE>_MAX_BACKOFF`` and ``<MARKETPLACE>_RETRY_QUEUE_SIZE``.
+
+        Args:
+            marketplace: Marketplace name (e.g., ebay)
+
+        Returns:
+            CircuitBreakerConfig for the marketplace
+        """
+        prefix = marketplace.upper()
+        return cls(
+            failure_threshold=int(
+                os.getenv(f"{prefix}_BREAKER_FAILURE_THRESHOLD", cls.failure_threshold)
+            ),
+            reset_timeout=float(
+                os.getenv(f"{prefix}_BREAKER_RESET_TIMEOUT", cls.reset_timeout)
+            ),
+            max_reset_timeout=float(
+                os.getenv(f"{prefix}_BREAKER_MAX_RESET_TIMEOUT", cls.max_reset_timeout)
+            ),
+            max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", cls.max_retries)),
+            base_backoff=float(os.getenv(f"{prefix}_BASE_BACKOFF", cls.base_backoff)),
+            max_backoff=float(os.getenv(f"{prefix}_MAX_BACKOFF", cls.max_backoff)),
+            retry_queue_size=int(
+                os.getenv(f"{prefix}_RETRY_QUEUE_SIZE", cls.retry_queue_size)
+            ),
+        )
+
+
+class CircuitBreaker:
+    """Closed / open / half-open state machine for one marketplace."""
+
+    def __init__(self, marketplace: str, config: CircuitBreakerConfig):
+        """
+        Initialize the breaker closed.
+
+        Args:
+            marketplace: Marketplace the breaker guards
+            config: Trip, recovery and retry settings
+        """
+        self.marketplace = marketplace
+        self.config = config
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.reset_timeout = config.reset_timeout
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def retry_at(self) -> float:
+        """Monotonic time after which an open circuit lets a probe through."""
+        return self.opened_at + self.reset_timeout
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go to the platform now.
+
+        Moves an open circuit to half-open once the reset timeout has passed
+        and admits exactly one probe call while half-open.
+
+        Returns:
+            True if the call may proceed
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.retry_at:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> bool:
+        """
+        Record a successful call.
+
+        Returns:
+            True if the call closed a half-open circuit
+        """
+        recovered = self.state != CLOSED
+        if recovered:
+            logger.info(f"Circuit for {self.marketplace} closed")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.reset_timeout = self.config.reset_timeout
+        self.probe_in_flight = False
+        return recovered
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit when it should trip."""
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            # The platform is still down: wait longer before the next probe
+            self.reset_timeout = min(self.reset_timeout * 2, self.config.max_reset_timeout)
+            self._open()
+        elif self.state == CLOSED and self.consecutive_failures >= self.config.failure_threshold:
+            self._open()
+
+    def release_probe(self) -> None:
+        """Let another probe through after one ended without a verdict."""
+        self.probe_in_flight = False
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retrying a failed call.
+
+        Grows exponentially with both the attempt number and the failures the
+        breaker has seen in a row, so every caller backs off harder as the
+        platform degrades. Full jitter spreads the retries out.
+
+        Args:
+            attempt: Zero-based retry attempt
+
+        Returns:
+            Delay in seconds
+        """
+        exponent = attempt + max(0, self.consecutive_failures - 1)
+        ceiling = min(self.config.max_backoff, self.config.base_backoff * 2 ** exponent)
+        return random.uniform(0, ceiling)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+        self.trips += 1
+        logger.warning(
+            f"Circuit for {self.marketplace} opened after "
+            f"{self.consecutive_failures} consecutive failures; "
+            f"retrying in {self.reset_timeout:.1f}s"
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = max(0.0, self.retry_at - time.monotonic()) if self.state == OPEN else 0.0
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.config.failure_threshold,
+            "reset_timeout_seconds": self.reset_timeout,
+            "retry_in_seconds": retry_in,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+@dataclass(eq=False)
+class DeferredCall:
+    """A write parked in a ``RetryQueue``, keyed by method and target."""
+    method: str
+    target: Any
+    call: Callable[[], Any]
+    version: int
+    callbacks: List[Callable[[], Awaitable[None]]] = field(default_factory=list)
+
+    @property
+    def key(self) -> Tuple[str, Any]:
+        return (self.method, self.target)
+
+    def on_replayed(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Run a callback once this call has been replayed successfully.
+
+        Callbacks never run for calls that are dropped or superseded by a
+        newer write to the same target.
+
+        Args:
+            callback: Zero-argument callable returning an awaitable
+        """
+        self.callbacks.append(callback)
+
+    async def replayed(self) -> None:
+        for callback in self.callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Replay callback for {self.method} {self.target} failed: {str(e)}")
+
+
+class RetryQueue:
+    """
+    Bounded queue of deferred marketplace calls, one per method and target.
+
+    Deferring a write to a target that already has one queued replaces the
+    older entry, so only the latest write is replayed. A direct write that
+    succeeds supersedes queued entries deferred before it started.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initialize an empty queue.
+
+        Args:
+            max_size: Calls kept before new ones are dropped
+        """
+        self.max_size = max_size
+        self.calls: "OrderedDict[Tuple[str, Any], DeferredCall]" = OrderedDict()
+        self.replaying: Optional[DeferredCall] = None
+        self.replay_done = asyncio.Event()
+        self.deferred = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.replay_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def push(self, entry: DeferredCall) -> Optional[DeferredCall]:
+        """
+        Park a call for later, replacing an older queued call for its target.
+
+        Args:
+            entry: Call to park
+
+        Returns:
+            The entry, or None if the queue is full and the call was dropped
+        """
+        queued = self.calls.get(entry.key)
+        if queued is not None and queued.version > entry.version:
+            # A newer write for the target is already waiting
+            self.superseded += 1
+            return entry
+        if queued is None and len(self.calls) >= self.max_size:
+            self.dropped += 1
+            return None
+        if queued is not None:
+            self.coalesced += 1
+            del self.calls[entry.key]
+        self.calls[entry.key] = entry
+        self.deferred += 1
+        return entry
+
+    def pop(self) -> DeferredCall:
+        """Take the oldest queued call, marking it as being replayed."""
+        _, entry = self.calls.popitem(last=False)
+        self.replaying = entry
+        self.replay_done.clear()
+        return entry
+
+    def finish(self, entry: DeferredCall, requeue: bool = False) -> None:
+        """
+        Settle the call taken by ``pop``.
+
+        Args:
+            entry: Call that was replayed
+            requeue: Put the call back at the front of the queue, unless a
+                newer write for its target was deferred meanwhile
+        """
+        if requeue and entry.key not in self.calls:
+            self.calls[entry.key] = entry
+            self.calls.move_to_end(entry.key, last=False)
+        self.replaying = None
+        self.replay_done.set()
+
+    def supersede(self, key: Tuple[str, Any], version: int) -> None:
+        """
+        Drop a queued call made stale by a newer successful write.
+
+        Args:
+            key: Method and target the write went to
+            version: Version of the successful write
+        """
+        queued = self.calls.get(key)
+        if queued is not None and queued.version < version:
+            del self.calls[key]
+            self.superseded += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self.calls),
+            "deferred": self.deferred,
+            "coalesced": self.coalesced,
+            "superseded": self.superseded,
+            "replayed": self.replayed,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,103 @@
+"""
+Process-wide marketplace client registry.
+
+Marketplace clients are created once, at application startup, and shared
+by routers, sync services and background jobs. They all borrow pooled
+connections from the shared HTTP session manager, which the registry
+closes at shutdown.
+"""
+import logging
+import os
+from typing import Callable, Dict, Optional
+
+from .base import MarketplaceClient
+from .ebay_client import EbayClient
+from .http_session import HttpSessionManager, http_sessions
+from .rate_limiter import scheduler
+from .token_cache import token_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _ebay_client(http: HttpSessionManager) -> EbayClient:
+    return EbayClient(
+        client_id=os.getenv("EBAY_CLIENT_ID", "development"),
+        client_secret=os.getenv("EBAY_CLIENT_SECRET", "development"),
+        http=http
+    )
+
+
+CLIENT_FACTORIES: Dict[str, Callable[[HttpSessionManager], MarketplaceClient]] = {
+    "ebay": _ebay_client,
+    # Future marketplace clients will be added here:
+    # "amazon": _amazon_client,
+    # "etsy": _etsy_client,
+}
+
+
+class MarketplaceClientRegistry:
+    """Owns the shared marketplace clients and their HTTP sessions."""
+
+    def __init__(
+        self,
+        http: HttpSessionManager = http_sessions,
+        factories: Optional[Dict[str, Callable[[HttpSessionManager], MarketplaceClient]]] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            http: HTTP session manager injected into every client
+            factories: Mapping of marketplace name to client factory
+        """
+        self.http = http
+        self.factories = factories if factories is not None else CLIENT_FACTORIES
+        self._clients: Dict[str, MarketplaceClient] = {}
+
+    def start(self) -> None:
+        """Create every configured client."""
+        for marketplace in self.factories:
+            self.get(marketplace)
+        logger.info(f"Marketplace clients ready: {', '.join(self._clients)}")
+
+    def supports(self, marketplace: str) -> bool:
+        """Whether a client is configured for the marketplace."""
+        return marketplace.lower() in self.factories
+
+    def get(self, marketplace: str) -> MarketplaceClient:
+        """
+        Get the shared client for a marketplace.
+
+        Clients not created at startup (e.g. in scripts and tests) are
+        created on first use.
+
+        Args:
+            marketplace: Marketplace name (e.g., ebay)
+
+        Returns:
+            Shared MarketplaceClient
+
+        Raises:
+            KeyError: If the marketplace is not supported
+        """
+        marketplace = marketplace.lower()
+        client = self._clients.get(marketplace)
+        if client is None:
+            client = self.factories[marketplace](self.http)
+            self._clients[marketplace] = client
+        return client
+
+    def all(self) -> Dict[str, MarketplaceClient]:
+        """Get every configured client, keyed by marketplace."""
+        return {marketplace: self.get(marketplace) for marketplace in self.factories}
+
+    async def close(self) -> None:
+        """Drop the clients, stop token refreshes and retries, and close HTTP sessions."""
+        self._clients = {}
+        await token_cache.close()
+        await scheduler.close()
+        await self.http.close()
+
+
+# Shared by every router, sync service and job in the process
+marketplace_clients = MarketplaceClientRegistry()
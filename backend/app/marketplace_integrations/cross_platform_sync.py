@@ -1,32 +1,71 @@
 """Cross-platform synchronization for marketplace listings and inventory management."""
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Awaitable, Callable, Dict, Any, Iterable, Optional, List, Tuple
+import functools
 import logging
 from datetime import datetime
 import asyncio
 from decimal import Decimal
 
 from .base import MarketplaceClient
-from .ebay_client import EbayClient
-from .exceptions import MarketplaceError
+from .clients import marketplace_clients
+from .exceptions import (
+    CallDeferredError,
+    CircuitOpenError,
+    MarketplaceError,
+    OrderAlreadySettledError,
+    OrderNotFoundError,
+)
+from .listing_writer import listing_writer
+from .marketplace_weights import weight_table
 from ..db import get_db
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PUBLISH_TIMEOUT = 30.0  # Seconds allowed per marketplace publish
+
+
+async def _push(
+    call: Awaitable[None],
+    listing_ids: Iterable[str],
+    on_applied: Callable[[str], Awaitable[None]]
+) -> None:
+    """
+    Await a marketplace write, then stage the database change per listing.
+    
+    Listings whose write was queued for retry are staged only once it is
+    replayed, so a queued write that is later dropped or superseded never
+    reaches the database.
+    
+    Args:
+        call: Marketplace write covering the listings
+        listing_ids: IDs of the listings the write covers
+        on_applied: Stages the database change for a listing ID
+    """
+    deferred = {}
+    try:
+        await call
+    except CallDeferredError as e:
+        logger.warning(f"Marketplace write deferred: {str(e)}")
+        deferred = {entry.target: entry for entry in e.deferred}
+    for listing_id in listing_ids:
+        if entry := deferred.get(listing_id):
+            entry.on_replayed(functools.partial(on_applied, listing_id))
+        else:
+            await on_applied(listing_id)
+
 class CrossPlatformSync:
     """Handles synchronization of listings across multiple marketplaces."""
 
     def __init__(self):
         """Initialize cross-platform sync service."""
-        self.marketplace_clients: Dict[str, MarketplaceClient] = {
-            "ebay": EbayClient(
-                client_id="development-id",
-                client_secret="development-secret"
-            )
-            # Future marketplace clients will be added here:
-            # "amazon": AmazonClient(...),
-            # "etsy": EtsyClient(...)
-        }
+        self.marketplace_clients: Dict[str, MarketplaceClient] = marketplace_clients.all()
         self.db = get_db()
+        self.weight_table = weight_table
+        self.listing_writer = listing_writer
+        # Per-marketplace publish timeouts in seconds
+        self.publish_timeouts: Dict[str, float] = {
+            "ebay": DEFAULT_PUBLISH_TIMEOUT
+        }
         
     async def allocate_inventory(
         self,
@@ -49,104 +88,75 @@ class CrossPlatformSync:
         try:
             db = await self.db
             
-            # Get marketplace performance metrics
-            performance_data = {}
-            for marketplace in marketplaces:
-                # Calculate success rate and average sale time
-                listings = await db.listing.find_many(
-                    where={
-                        'marketplace': marketplace,
-                        'orders': {
-                            'some': {}
-                        }
-                    },
-                    include={
-                        'orders': True
-                    }
-                )
-                
-                if not listings:
-                    performance_data[marketplace] = {
-                        'weight': 1.0  # Default weight for new marketplaces
-                    }
-                    continue
-                
-                total_orders = 0
-                successful_orders = 0
-                total_time = 0
-                
-                for listing in listings:
-                    listing_orders = [
-                        order for order in listing.orders
-                        if order.status in ('completed', 'cancelled')
-                    ]
-                    
-                    total_orders += len(listing_orders)
-                    successful_orders += sum(
-                        1 for order in listing_orders
-                        if order.status == 'completed'
-                    )
-                    
-                    # Calculate average time to sell
-                    for order in listing_orders:
-                        if order.status == 'completed':
-                            time_to_sell = (
-                                order.completedAt - listing.createdAt
-                            ).total_seconds() / 3600  # Convert to hours
-                            total_time += time_to_sell
-                
-                success_rate = (
-                    successful_orders / total_orders
-                    if total_orders > 0 else 0.5
-                )
-                avg_time = (
-                    total_time / successful_orders
-                    if successful_orders > 0 else 168  # Default 1 week
-                )
-                
-                # Calculate weight based on success rate and speed
-                time_factor = 168 / (avg_time + 168)  # Normalize time factor
-                weight = success_rate * 0.7 + time_factor * 0.3
-                
-                performance_data[marketplace] = {
-                    'weight': max(0.1, weight)  # Minimum weight of 0.1
-                }
-            
-            # Allocate stock based on weights
-            total_weight = sum(data['weight'] for data in performance_data.values())
-            base_allocations = {
-                marketplace: max(1, int(total_stock * data['weight'] / total_weight))
-                for marketplace, data in performance_data.items()
-            }
-            
-            
-            # Distribute remaining stock
-            allocated = sum(base_allocations.values())
-            remaining = total_stock - allocated
-            
-            if remaining > 0:
-                # Sort marketplaces by weight for remaining allocation
-                sorted_marketplaces = sorted(
-                    marketplaces,
-                    key=lambda m: performance_data[m]['weight'],
-                    reverse=True
-                )
-                
-                for i in range(remaining):
-                    base_allocations[sorted_marketplaces[i % len(sorted_marketplaces)]] += 1
-            
-            return base_allocations
+            # Read precomputed marketplace performance weights
+            weights = await self.weight_table.get_weights(db, marketplaces)
+            return self._distribute_stock(total_stock, weights)
             
         except Exception as e:
             logger.error(f"Error allocating inventory: {str(e)}")
             # Fall back to even distribution
-            base_amount = total_stock // len(marketplaces)
-            remainder = total_stock % len(marketplaces)
+            return self._distribute_evenly(total_stock, marketplaces)
+
+    @staticmethod
+    def _distribute_stock(
+        total_stock: int,
+        weights: Dict[str, float]
+    ) -> Dict[str, int]:
+        """
+        Split stock across marketplaces proportionally to their weights.
+        
+        Args:
+            total_stock: Total available stock
+            weights: Dictionary mapping marketplace to allocation weight
             
-            return {
-                marketplace: base_amount + (1 if i < remainder else 0)
-                for i, marketplace in enumerate(marketplaces)
-            }
+        Returns:
+            Dictionary mapping marketplace to allocated stock
+        """
+        total_weight = sum(weights.values())
+        base_allocations = {
+            marketplace: max(1, int(total_stock * weight / total_weight))
+            for marketplace, weight in weights.items()
+        }
+        
+        # Distribute remaining stock
+        allocated = sum(base_allocations.values())
+        remaining = total_stock - allocated
+        
+        if remaining > 0:
+            # Sort marketplaces by weight for remaining allocation
+            sorted_marketplaces = sorted(
+                weights,
+                key=lambda m: weights[m],
+                reverse=True
+            )
+            
+            for i in range(remaining):
+                base_allocations[sorted_marketplaces[i % len(sorted_marketplaces)]] += 1
+        
+        return base_allocations
+
+    @staticmethod
+    def _distribute_evenly(
+        total_stock: int,
+        marketplaces: List[str]
+    ) -> Dict[str, int]:
+        """
+        Split stock evenly across marketplaces.
+        
+        Args:
+            total_stock: Total available stock
+            marketplaces: List of marketplaces to allocate stock to
+            
+        Returns:
+            Dictionary mapping marketplace to allocated stock
+        """
+        base_amount = total_stock // len(marketplaces)
+        remainder = total_stock % len(marketplaces)
+        
+        return {
+            marketplace: base_amount + (1 if i < remainder else 0)
+            for i, marketplace in enumerate(marketplaces)
+        }
 
     async def sync_inventory_levels(
         self,
@@ -239,6 +249,189 @@ class CrossPlatformSync:
             logger.error(f"Error syncing inventory levels: {str(e)}")
             raise
             
+    async def sync_inventory_bulk(
+        self,
+        stock_levels: Dict[str, int]
+    ) -> Dict[str, Any]:
+        """
+        Synchronize inventory levels for many items at once.
+        
+        Active listings for every item are loaded in one query, weights are
+        read once for all marketplaces, stock pushes are coalesced into one
+        bulk call per marketplace, and listing rows are written with a
+        single bulk UPDATE per action through the listing write buffer.
+        Pushes run concurrently; a failed push is reported on its listing
+        without holding back the listings that were pushed.
+        
+        Args:
+            stock_levels: Dictionary mapping item ID to total available stock
+            
+        Returns:
+            Dictionary containing per-item sync results, with status
+            'partial' if any listing failed to sync
+        """
+        if not stock_levels:
+            return {
+                'status': 'success',
+                'items': {}
+            }
+            
+        try:
+            db = await self.db
+            
+            listings = await db.listing.find_many(
+                where={
+                    'itemId': {'in': list(stock_levels.keys())},
+                    'status': 'active'
+                }
+            )
+            
+            listings_by_item: Dict[str, List[Any]] = {}
+            for listing in listings:
+                listings_by_item.setdefault(listing.itemId, []).append(listing)
+            
+            active_marketplaces = list(set(
+                listing.marketplace for listing in listings
+            ))
+            try:
+                weights = await self.weight_table.get_weights(db, active_marketplaces)
+            except Exception as e:
+                logger.error(f"Error loading marketplace weights: {str(e)}")
+                weights = None
+            
+            item_results = {}
+            stock_updates: Dict[str, Dict[str, int]] = {}
+            delistings: Dict[str, List[str]] = {}
+            
+            for item_id, total_stock in stock_levels.items():
+                item_listings = listings_by_item.get(item_id)
+                if not item_listings:
+                    item_results[item_id] = {
+                        'status': 'no_active_listings'
+                    }
+                    continue
+                
+                item_marketplaces = list(set(
+                    listing.marketplace for listing in item_listings
+                ))
+                allocations = (
+                    self._distribute_stock(
+                        total_stock,
+                        {m: weights[m] for m in item_marketplaces}
+                    )
+                    if weights is not None
+                    else self._distribute_evenly(total_stock, item_marketplaces)
+                )
+                
+                listing_results = {}
+                for listing in item_listings:
+                    allocated_stock = allocations[listing.marketplace]
+                    if allocated_stock == 0:
+                        delistings.setdefault(listing.marketplace, []).append(listing.id)
+                        listing_results[listing.id] = {
+                            'action': 'delisted',
+                            'reason': 'no_stock'
+                        }
+                    else:
+                        stock_updates.setdefault(listing.marketplace, {})[listing.id] = allocated_stock
+                        listing_results[listing.id] = {
+                            'action': 'updated',
+                            'new_stock': allocated_stock
+                        }
+                
+                item_results[item_id] = {
+                    'status': 'success',
+                    'total_stock': total_stock,
+                    'allocations': allocations,
+                    'listing_results': listing_results
+                }
+            
+            listing_items = {listing.id: listing.itemId for listing in listings}
+            quantities = {
+                listing_id: quantity
+                for marketplace_quantities in stock_updates.values()
+                for listing_id, quantity in marketplace_quantities.items()
+            }
+            
+            # Listings on unsupported marketplaces fail before any push starts
+            outcomes: Dict[str, Optional[BaseException]] = {}
+            for marketplace in {*stock_updates, *delistings} - self.marketplace_clients.keys():
+                error = MarketplaceError(f"Unsupported marketplace: {marketplace}")
+                outcomes.update(dict.fromkeys(stock_updates.pop(marketplace, {}), error))
+                outcomes.update(dict.fromkeys(delistings.pop(marketplace, []), error))
+            
+            # Push coalesced updates (one bulk call per marketplace) and
+            # delistings; a failed push doesn't stop the others
+            stock_marketplaces = list(stock_updates)
+            ended = [
+                (marketplace, listing_id)
+                for marketplace, listing_ids in delistings.items()
+                for listing_id in listing_ids
+            ]
+            results = await asyncio.gather(
+                *(
+                    self.marketplace_clients[marketplace].update_stock_bulk(stock_updates[marketplace])
+                    for marketplace in stock_marketplaces
+                ),
+                *(
+                    self.marketplace_clients[marketplace].end_listing(listing_id)
+                    for marketplace, listing_id in ended
+                ),
+                return_exceptions=True
+            )
+            for marketplace, result in zip(stock_marketplaces, results):
+                if isinstance(result, BaseException):
+                    outcomes.update(dict.fromkeys(stock_updates[marketplace], result))
+                else:
+                    outcomes.update(result)
+            for (_, listing_id), result in zip(ended, results[len(stock_marketplaces):]):
+                outcomes[listing_id] = result
+            
+            # Stage applied changes now and deferred ones once replayed
+            counts = {'updated': 0, 'delisted': 0, 'failed': 0}
+            for listing_id, outcome in outcomes.items():
+                listing_result = item_results[listing_items[listing_id]]['listing_results'][listing_id]
+                if outcome is not None and not isinstance(outcome, CallDeferredError):
+                    counts['failed'] += 1
+                    listing_result['error'] = str(outcome)
+                    listing_result['action'] = 'failed'
+                    item_results[listing_items[listing_id]]['status'] = 'partial'
+                    logger.error(f"Failed to sync listing {listing_id}: {str(outcome)}")
+                    continue
+                if listing_id in quantities:
+                    counts['updated'] += 1
+                    stage = functools.partial(
+                        self.listing_writer.stage_quantity, listing_id, quantities[listing_id]
+                    )
+                else:
+                    counts['delisted'] += 1
+                    stage = functools.partial(self.listing_writer.stage_ended, listing_id)
+                if outcome is None:
+                    await stage()
+                else:
+                    listing_result['deferred'] = True
+                    for entry in outcome.deferred:
+                        entry.on_replayed(stage)
+            
+            # Persist applied listing changes with one bulk statement per action
+            try:
+                await self.listing_writer.flush()
+            except Exception as e:
+                # The changes stay buffered for the next periodic flush
+                logger.error(f"Failed to flush listing updates: {str(e)}")
+            
+            return {
+                'status': 'partial' if counts['failed'] else 'success',
+                'items': item_results,
+                'listings_updated': counts['updated'],
+                'listings_delisted': counts['delisted'],
+                'listings_failed': counts['failed']
+            }
+            
+        except Exception as e:
+            logger.error(f"Error syncing bulk inventory levels: {str(e)}")
+            raise
+            
     async def create_or_update_listing(
         self,
         listing_data: Dict[str, Any],
@@ -246,62 +439,96 @@ class CrossPlatformSync:
     ) -> Dict[str, Any]:
         """Create or update a listing across specified marketplaces.
         
+        Marketplaces are published to concurrently, each under its own
+        timeout, so latency is bounded by the slowest platform. Failures
+        and timeouts are reported per platform without affecting the rest.
+        
         Args:
             listing_data: Dictionary containing listing details
             marketplaces: List of marketplace names to sync with (default: all)
         
         Returns:
             Dictionary containing status and platform-specific responses
-        
-        Raises:
-            MarketplaceError: If listing creation/update fails
         """
-        results = {}
         target_marketplaces = marketplaces or list(self.marketplace_clients.keys())
 
-        for marketplace in target_marketplaces:
-            try:
-                if client := self.marketplace_clients.get(marketplace):
-                    # Add marketplace-specific data
-                    platform_data = {
-                        **listing_data,
-                        "marketplace": marketplace,
-                        "sync_timestamp": datetime.now().isoformat()
-                    }
-                    
-                    # Create/update listing on platform
-                    response = await client.create_listing(platform_data)
-                    
-                    results[marketplace] = {
-                        "status": "success",
-                        "external_id": response.get("external_id"),
-                        "url": response.get("url"),
-                        "timestamp": platform_data["sync_timestamp"]
-                    }
-                else:
-                    results[marketplace] = {
-                        "status": "error",
-                        "error": f"Unsupported marketplace: {marketplace}"
-                    }
-            except MarketplaceError as e:
-                logger.error(f"Failed to sync listing with {marketplace}: {str(e)}")
-                results[marketplace] = {
-                    "status": "error",
-                    "error": str(e)
-                }
-            except Exception as e:
-                logger.error(f"Unexpected error syncing with {marketplace}: {str(e)}")
-                results[marketplace] = {
-                    "status": "error",
-                    "error": f"Unexpected error: {str(e)}"
-                }
+        responses = await asyncio.gather(*[
+            self._publish_listing(marketplace, listing_data)
+            for marketplace in target_marketplaces
+        ])
+        results = dict(zip(target_marketplaces, responses))
+        succeeded = [
+            marketplace for marketplace, result in results.items()
+            if result["status"] == "success"
+        ]
 
         return {
             "status": "completed",
             "platform_results": results,
+            "succeeded": succeeded,
+            "failed": [m for m in results if m not in succeeded],
             "sync_timestamp": datetime.now().isoformat()
         }
 
+    async def _publish_listing(
+        self,
+        marketplace: str,
+        listing_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Publish a listing to a single marketplace.
+        
+        Args:
+            marketplace: Marketplace name
+            listing_data: Dictionary containing listing details
+        
+        Returns:
+            Dictionary containing the platform result; never raises
+        """
+        timeout = self.publish_timeouts.get(marketplace, DEFAULT_PUBLISH_TIMEOUT)
+        try:
+            if client := self.marketplace_clients.get(marketplace):
+                # Add marketplace-specific data
+                platform_data = {
+                    **listing_data,
+                    "marketplace": marketplace,
+                    "sync_timestamp": datetime.now().isoformat()
+                }
+                
+                # Create/update listing on platform
+                response = await asyncio.wait_for(
+                    client.create_listing(platform_data),
+                    timeout=timeout
+                )
+                
+                return {
+                    "status": "success",
+                    "external_id": response.get("external_id"),
+                    "url": response.get("url"),
+                    "timestamp": platform_data["sync_timestamp"]
+                }
+            return {
+                "status": "error",
+                "error": f"Unsupported marketplace: {marketplace}"
+            }
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out syncing listing with {marketplace} after {timeout}s")
+            return {
+                "status": "timeout",
+                "error": f"Timed out after {timeout} seconds"
+            }
+        except MarketplaceError as e:
+            logger.error(f"Failed to sync listing with {marketplace}: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error syncing with {marketplace}: {str(e)}")
+            return {
+                "status": "error",
+                "error": f"Unexpected error: {str(e)}"
+            }
+
     async def update_listing_stock(
         self,
         listing_id: str,
@@ -318,16 +545,12 @@ class CrossPlatformSync:
         """
         try:
             if client := self.marketplace_clients.get(marketplace):
-                await client.update_stock(listing_id, quantity)
-                
-                # Update database
-                db = await self.db
-                await db.listing.update(
-                    where={'id': listing_id},
-                    data={
-                        'quantity': quantity,
-                        'lastStockUpdate': datetime.now()
-                    }
+                # Queue the database write for the next bulk flush once the
+                # update reaches the marketplace, now or when it is replayed
+                await _push(
+                    client.update_stock(listing_id, quantity),
+                    [listing_id],
+                    lambda listing_id: self.listing_writer.stage_quantity(listing_id, quantity)
                 )
             else:
                 raise MarketplaceError(f"Unsupported marketplace: {marketplace}")
@@ -353,16 +576,12 @@ class CrossPlatformSync:
         """
         try:
             if client := self.marketplace_clients.get(marketplace):
-                await client.end_listing(listing_id)
-                
-                # Update database
-                db = await self.db
-                await db.listing.update(
-                    where={'id': listing_id},
-                    data={
-                        'status': 'ended',
-                        'endedAt': datetime.now()
-                    }
+                # Queue the database write for the next bulk flush once the
+                # delisting reaches the marketplace, now or when it is replayed
+                await _push(
+                    client.end_listing(listing_id),
+                    [listing_id],
+                    self.listing_writer.stage_ended
                 )
             else:
                 raise MarketplaceError(f"Unsupported marketplace: {marketplace}")
@@ -374,6 +593,102 @@ class CrossPlatformSync:
             )
             raise
             
+    async def record_order_outcome(
+        self,
+        order_id: str,
+        status: str
+    ) -> Dict[str, Any]:
+        """
+        Settle an order and fold its outcome into the marketplace weights.
+        
+        The order is settled with a conditional UPDATE in the same
+        transaction as the weight totals, so an order is counted at most
+        once. Re-sending the status an order was settled with is a no-op.
+        
+        Args:
+            order_id: ID of the order that was settled
+            status: New order status ("completed" or "cancelled")
+            
+        Returns:
+            Dictionary containing the marketplace and its updated weight
+            
+        Raises:
+            OrderNotFoundError: If the order does not exist
+            OrderAlreadySettledError: If the order was settled with
+                another status
+        """
+        try:
+            db = await self.db
+            
+            order = await db.order.find_unique(
+                where={'id': order_id},
+                include={'listing': True}
+            )
+            if not order:
+                raise OrderNotFoundError(f"Order {order_id} not found")
+            
+            marketplace = order.listing.marketplace
+            
+            # Seed the marketplace totals before this order is counted
+            await self.weight_table.get_weights(db, [marketplace])
+            
+            try:
+                async with db.tx() as transaction:
+                    settled = await transaction.query_raw(
+                        """
+                        UPDATE "Order" AS o
+                        SET "status" = $2,
+                            "completedAt" = CASE WHEN $2::text = 'completed' THEN NOW() END,
+                            "updatedAt" = NOW()
+                        FROM "Listing" AS l
+                        WHERE o."id" = $1
+                          AND l."id" = o."listingId"
+                          AND o."status" NOT IN ('completed', 'cancelled')
+                        RETURNING
+                            EXTRACT(EPOCH FROM (o."completedAt" - l."createdAt")) / 3600
+                                AS completion_hours
+                        """,
+                        order_id,
+                        status
+                    )
+                    stats = await self.weight_table.record_order_outcome(
+                        transaction,
+                        marketplace,
+                        status,
+                        settled[0]['completion_hours']
+                    ) if settled else None
+            except Exception:
+                # The cached totals may include a delta that was rolled back
+                self.weight_table.invalidate(marketplace)
+                raise
+            
+            if stats is None:
+                current = await db.order.find_unique(where={'id': order_id})
+                if current.status != status:
+                    raise OrderAlreadySettledError(
+                        f"Order {order_id} is already {current.status}"
+                    )
+                weights = await self.weight_table.get_weights(db, [marketplace])
+                return {
+                    'order_id': order_id,
+                    'marketplace': marketplace,
+                    'status': status,
+                    'weight': weights[marketplace],
+                    'changed': False
+                }
+            
+            return {
+                'order_id': order_id,
+                'marketplace': marketplace,
+                'status': status,
+                'weight': stats.weight,
+                'changed': True
+            }
+            
+        except Exception as e:
+            logger.error(f"Error recording outcome for order {order_id}: {str(e)}")
+            raise
+            
     async def get_platform_status(self, marketplace: str) -> Dict[str, Any]:
         """Get platform connection status and capabilities.
         
@@ -384,6 +699,16 @@ class CrossPlatformSync:
             Dictionary containing platform status information
         """
         if client := self.marketplace_clients.get(marketplace):
+            rate_limit = client.scheduler.get_metrics(marketplace)
+            circuit_breaker = client.scheduler.get_breaker_state(marketplace)
+            if circuit_breaker["state"] == "open":
+                # Don't wait on a platform that is known to be down
+                return {
+                    "platform": marketplace,
+                    "status": "unavailable",
+                    "rate_limit": rate_limit,
+                    "circuit_breaker": circuit_breaker
+                }
             try:
                 # Basic authentication check
                 await client.authenticate()
@@ -394,13 +719,17 @@ class CrossPlatformSync:
                         "create_listing",
                         "market_research",
                         "price_history"
-                    ]
+                    ],
+                    "rate_limit": rate_limit,
+                    "circuit_breaker": client.scheduler.get_breaker_state(marketplace)
                 }
             except Exception as e:
                 return {
                     "platform": marketplace,
-                    "status": "error",
-                    "error": str(e)
+                    "status": "unavailable" if isinstance(e, CircuitOpenError) else "error",
+                    "error": str(e),
+                    "rate_limit": rate_limit,
+                    "circuit_breaker": client.scheduler.get_breaker_state(marketplace)
                 }
         return {
             "platform": marketplace,
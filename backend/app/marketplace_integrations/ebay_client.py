@@ -4,13 +4,21 @@ eBay marketplace client implementation.
 This module implements the MarketplaceClient interface for the eBay marketplace,
 providing methods to interact with eBay's API for market research and pricing data.
 """
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from .base import MarketplaceClient
+from .marketplace_client import MarketplaceClient as MarketResearchClient
+from .http_session import HttpSessionManager
+from .price_history_store import PriceHistoryStore, price_history_store
+from .price_series import DailyPriceSeries
+from .rate_limiter import MarketplaceScheduler, rate_limited
+from .token_cache import TokenCache, token_cache as shared_token_cache
 from .exceptions import (
     AuthenticationError,
+    CircuitOpenError,
     MarketDataError,
     ParseError,
     HistoricalDataError,
@@ -19,40 +27,89 @@ from .exceptions import (
 
 logger = logging.getLogger(__name__)
 
-class EbayClient(MarketplaceClient):
+class EbayClient(MarketplaceClient, MarketResearchClient):
     """Client for interacting with eBay's API."""
 
-    def __init__(self, client_id: str, client_secret: str):
+    marketplace = "ebay"
+    base_url = "https://api.ebay.com"
+    batch_size = 20  # Browse API getItems accepts up to 20 items per call
+    stock_batch_size = 25  # bulkUpdatePriceQuantity accepts up to 25 offers per call
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        scheduler: Optional[MarketplaceScheduler] = None,
+        http: Optional[HttpSessionManager] = None,
+        token_cache: Optional[TokenCache] = None,
+        history_store: Optional[PriceHistoryStore] = None
+    ):
         """
         Initialize the eBay client.
 
         Args:
             client_id: eBay API client ID
             client_secret: eBay API client secret
+            scheduler: Request scheduler (default: the shared scheduler)
+            http: HTTP session manager (default: the shared sessions)
+            token_cache: OAuth token cache (default: the shared cache)
+            history_store: Local price history store (default: the shared store)
         """
+        if scheduler is not None:
+            self.scheduler = scheduler
+        if http is not None:
+            self.http = http
+        self.token_cache = token_cache or shared_token_cache
+        self.history_store = history_store or price_history_store
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token: Optional[str] = None
         self.token_expiry: Optional[datetime] = None
 
+    @property
+    def token_key(self) -> str:
+        """Key of this client's token in the shared token cache."""
+        return f"{self.marketplace}:{self.client_id}"
+
     async def authenticate(self) -> None:
         """
         Authenticate with eBay's API using OAuth 2.0.
 
+        Tokens come from the shared token cache, so only the first call
+        (or one after expiry) reaches eBay; clients with the same
+        credentials share the token.
+
         Raises:
             AuthenticationError: If authentication fails
         """
         try:
-            # TODO: Implement actual eBay OAuth authentication
-            # For now, using a placeholder token for development
-            self.access_token = "development-token"
-            self.token_expiry = datetime.now() + timedelta(hours=2)
-            logger.info("Successfully authenticated with eBay API")
+            token = await self.token_cache.get_token(self.token_key, self._request_token)
+            self.access_token = token.access_token
+            self.token_expiry = datetime.fromtimestamp(token.expires_at)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"eBay authentication failed: {str(e)}")
             raise AuthenticationError(f"Failed to authenticate with eBay: {str(e)}")
 
-    def fetch_market_data(self, item_identifier: str) -> Dict[str, Any]:
+    async def ensure_authenticated(self) -> None:
+        """
+        Make sure the client holds a valid token.
+
+        Raises:
+            AuthenticationError: If authentication fails
+        """
+        await self.authenticate()
+
+    @rate_limited
+    async def _request_token(self) -> Tuple[str, float]:
+        """Request a new application access token from eBay."""
+        # TODO: Implement actual eBay OAuth client credentials grant
+        # For now, using a placeholder token for development
+        logger.info("Successfully authenticated with eBay API")
+        return "development-token", timedelta(hours=2).total_seconds()
+
+    async def fetch_market_data(self, item_identifier: str) -> Dict[str, Any]:
         """
         Fetch current market data for an item from eBay.
 
@@ -62,23 +119,63 @@ class EbayClient(MarketplaceClient):
         Returns:
             Dict containing market data including current prices and listing counts
 
+        Raises:
+            MarketDataError: If fetching market data fails
+        """
+        result = (await self.fetch_market_data_batch([item_identifier]))[item_identifier]
+        if isinstance(result, MarketplaceError):
+            raise result
+        return result
+
+    async def fetch_market_data_batch(
+        self, item_identifiers: List[str]
+    ) -> Dict[str, Union[Dict[str, Any], MarketplaceError]]:
+        """
+        Fetch market data for several items in as few eBay calls as possible.
+
+        Identifiers are packed ``batch_size`` to a request.
+
+        Args:
+            item_identifiers: Item identifiers (SKU, UPC, model number)
+
+        Returns:
+            Dictionary mapping each identifier to its market data, or to the
+            MarketDataError raised for its request
+        """
+        return await self._run_chunked(item_identifiers, self._fetch_market_data_chunk)
+
+    @rate_limited
+    async def _fetch_market_data_chunk(self, item_identifiers: List[str]) -> Dict[str, Any]:
+        """
+        Fetch market data for up to ``batch_size`` items in one eBay call.
+
+        Args:
+            item_identifiers: Item identifiers (SKU, UPC, model number)
+
+        Returns:
+            Dictionary mapping each identifier to its market data
+
         Raises:
             MarketDataError: If fetching market data fails
         """
         try:
             # TODO: Implement actual eBay API calls
             # For now, returning mock data for development
-            mock_data = {
-                "timestamp": datetime.now().isoformat(),
-                "item_id": item_identifier,
-                "listings": [
-                    {"price": 99.99, "condition": "New"},
-                    {"price": 79.99, "condition": "Used"},
-                ],
-                "total_listings": 2
+            timestamp = datetime.now().isoformat()
+            results = {
+                item_identifier: {
+                    "timestamp": timestamp,
+                    "item_id": item_identifier,
+                    "listings": [
+                        {"price": 99.99, "condition": "New"},
+                        {"price": 79.99, "condition": "Used"},
+                    ],
+                    "total_listings": 2
+                }
+                for item_identifier in item_identifiers
             }
-            logger.info(f"Successfully fetched market data for item {item_identifier}")
-            return mock_data
+            logger.info(f"Successfully fetched market data for {len(results)} items")
+            return results
         except Exception as e:
             logger.error(f"Failed to fetch eBay market data: {str(e)}")
             raise MarketDataError(f"Failed to fetch market data from eBay: {str(e)}")
@@ -106,6 +203,7 @@ class EbayClient(MarketplaceClient):
                 "lowest_price": min(prices) if prices else 0,
                 "highest_price": max(prices) if prices else 0,
                 "total_listings": response_data.get("total_listings", 0),
+                "competitor_prices": prices,
                 "timestamp": response_data.get("timestamp"),
             }
             return parsed_data
@@ -113,18 +211,93 @@ class EbayClient(MarketplaceClient):
             logger.error(f"Failed to parse eBay response: {str(e)}")
             raise ParseError(f"Failed to parse eBay response: {str(e)}")
 
-    def get_price_history(
+    async def get_price_history(
         self, item_identifier: str, days: Optional[int] = 30
-    ) -> Dict[str, Any]:
+    ) -> DailyPriceSeries:
         """
         Fetch historical price data for an item from eBay.
 
+        Days already in the local price history store are not requested
+        again; only the uncovered days (normally just today) are fetched.
+
         Args:
             item_identifier: Item identifier (SKU, UPC, model number)
             days: Number of days of history to fetch (default: 30)
 
         Returns:
-            Dict containing historical price data
+            Compact daily price series for the item
+
+        Raises:
+            HistoricalDataError: If fetching historical data fails
+        """
+        try:
+            return await self.history_store.get_history(
+                self.marketplace,
+                item_identifier,
+                days if days is not None else 30,
+                self._fetch_price_history
+            )
+        except (HistoricalDataError, CircuitOpenError):
+            raise
+        except Exception as e:
+            logger.error(f"Failed to fetch eBay price history: {str(e)}")
+            raise HistoricalDataError(f"Failed to fetch price history from eBay: {str(e)}")
+
+    async def get_price_history_batch(
+        self, item_identifiers: List[str], days: Optional[int] = 30
+    ) -> Dict[str, Union[DailyPriceSeries, MarketplaceError]]:
+        """
+        Fetch historical price data for several items from eBay.
+
+        Items are grouped ``batch_size`` to a request, and within a group
+        items missing the same days from the local store share one call.
+
+        Args:
+            item_identifiers: Item identifiers (SKU, UPC, model number)
+            days: Number of days of history to fetch (default: 30)
+
+        Returns:
+            Dictionary mapping each identifier to its daily price series, or
+            to the HistoricalDataError raised for its request
+        """
+        async def fetch_chunk(chunk: List[str]) -> Dict[str, DailyPriceSeries]:
+            try:
+                return await self.history_store.get_history_batch(
+                    self.marketplace,
+                    chunk,
+                    days if days is not None else 30,
+                    self._fetch_price_history_chunk
+                )
+            except (HistoricalDataError, CircuitOpenError):
+                raise
+            except Exception as e:
+                logger.error(f"Failed to fetch eBay price history: {str(e)}")
+                raise HistoricalDataError(f"Failed to fetch price history from eBay: {str(e)}")
+
+        return await self._run_chunked(item_identifiers, fetch_chunk)
+
+    async def _fetch_price_history(
+        self, item_identifier: str, start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        """Fetch daily prices for one item between two dates, inclusive."""
+        points = await self._fetch_price_history_chunk([item_identifier], start_date, end_date)
+        return points.get(item_identifier, [])
+
+    @rate_limited
+    async def _fetch_price_history_chunk(
+        self, item_identifiers: List[str], start_date: date, end_date: date
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch daily prices for up to ``batch_size`` items in one eBay call.
+
+        Args:
+            item_identifiers: Item identifiers (SKU, UPC, model number)
+            start_date: First day to fetch
+            end_date: Last day to fetch, inclusive
+
+        Returns:
+            Dictionary mapping each identifier to its daily points with
+            date, average_price and total_listings
 
         Raises:
             HistoricalDataError: If fetching historical data fails
@@ -132,11 +305,6 @@ class EbayClient(MarketplaceClient):
         try:
             # TODO: Implement actual eBay historical data API calls
             # For now, returning mock historical data
-            end_date = datetime.now()
-            days_to_fetch = days if days is not None else 30
-            start_date = end_date - timedelta(days=float(days_to_fetch))
-            
-            # Generate mock daily prices
             daily_prices = []
             current_date = start_date
             while current_date <= end_date:
@@ -147,19 +315,48 @@ class EbayClient(MarketplaceClient):
                 })
                 current_date += timedelta(days=1)
 
-            history_data = {
-                "item_id": item_identifier,
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "daily_prices": daily_prices
-            }
-            
-            logger.info(f"Successfully fetched price history for item {item_identifier}")
-            return history_data
+            logger.info(
+                f"Successfully fetched {len(daily_prices)} days of price history "
+                f"for {len(item_identifiers)} items"
+            )
+            return {item_identifier: list(daily_prices) for item_identifier in item_identifiers}
         except Exception as e:
             logger.error(f"Failed to fetch eBay price history: {str(e)}")
             raise HistoricalDataError(f"Failed to fetch price history from eBay: {str(e)}")
 
+    async def _run_chunked(
+        self,
+        item_identifiers: List[str],
+        fetch_chunk: Callable[[List[str]], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Run a chunk fetch per ``batch_size`` identifiers concurrently."""
+        unique = list(dict.fromkeys(item_identifiers))
+        chunks = [
+            unique[i:i + self.batch_size]
+            for i in range(0, len(unique), self.batch_size)
+        ]
+        chunk_results = await asyncio.gather(
+            *(fetch_chunk(chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+
+        results: Dict[str, Any] = {}
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, MarketplaceError):
+                results.update((item_id, chunk_result) for item_id in chunk)
+            elif isinstance(chunk_result, BaseException):
+                raise chunk_result
+            else:
+                for item_id in chunk:
+                    if item_id in chunk_result:
+                        results[item_id] = chunk_result[item_id]
+                    else:
+                        results[item_id] = MarketplaceError(
+                            f"No eBay data returned for item {item_id}"
+                        )
+        return results
+
+    @rate_limited(retry=False)
     async def create_listing(self, listing_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a listing on eBay.
         
@@ -185,6 +382,7 @@ class EbayClient(MarketplaceClient):
             logger.error(f"Failed to create eBay listing: {str(e)}")
             raise MarketplaceError(f"Failed to create listing on eBay: {str(e)}")
             
+    @rate_limited(deferrable=True)
     async def update_stock(self, listing_id: str, quantity: int) -> None:
         """Update stock level for an eBay listing.
         
@@ -206,6 +404,77 @@ class EbayClient(MarketplaceClient):
             logger.error(f"Failed to update eBay stock: {str(e)}")
             raise MarketplaceError(f"Failed to update stock on eBay: {str(e)}")
             
+    async def update_stock_bulk(
+        self,
+        quantities: Dict[str, int]
+    ) -> Dict[str, Optional[MarketplaceError]]:
+        """Update stock levels for several eBay listings at once.
+        
+        Listings are pushed ``stock_batch_size`` to a bulk call, with the
+        chunks sent concurrently. Listings in a chunk that fails fall back
+        to per-listing updates, which are queued for retry if eBay is down.
+        
+        Args:
+            quantities: Dictionary mapping listing ID to new stock quantity
+            
+        Returns:
+            Dictionary mapping each listing ID to None once updated, or to
+            the MarketplaceError raised for it (CallDeferredError if the
+            update was queued for retry)
+        """
+        items = list(quantities.items())
+        chunks = [
+            dict(items[i:i + self.stock_batch_size])
+            for i in range(0, len(items), self.stock_batch_size)
+        ]
+        chunk_results = await asyncio.gather(
+            *(self._update_stock_chunk(chunk) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        results: Dict[str, Optional[MarketplaceError]] = {}
+        fallback: Dict[str, int] = {}
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if chunk_result is None:
+                results.update(dict.fromkeys(chunk))
+            elif isinstance(chunk_result, Exception):
+                logger.warning(
+                    f"eBay bulk stock update failed ({str(chunk_result)}); "
+                    f"updating {len(chunk)} listings one by one"
+                )
+                fallback.update(chunk)
+            else:
+                raise chunk_result
+        if fallback:
+            results.update(await super().update_stock_bulk(fallback))
+        return results
+        
+    async def _update_stock_chunk(self, quantities: Dict[str, int]) -> None:
+        """Push one bulk stock update, superseding queued per-listing updates."""
+        keys = [("update_stock", listing_id) for listing_id in quantities]
+        version = await self.scheduler.begin_write(self.marketplace, keys)
+        await self._push_stock_chunk(quantities)
+        self.scheduler.supersede(self.marketplace, keys, version)
+        
+    @rate_limited
+    async def _push_stock_chunk(self, quantities: Dict[str, int]) -> None:
+        """Update stock for up to ``stock_batch_size`` eBay listings in one call.
+        
+        Args:
+            quantities: Dictionary mapping listing ID to new stock quantity
+            
+        Raises:
+            MarketplaceError: If the bulk update fails
+        """
+        try:
+            # TODO: Implement actual eBay bulkUpdatePriceQuantity call
+            # For development, just log the action
+            logger.info(f"Updated stock for {len(quantities)} eBay listings")
+        except Exception as e:
+            logger.error(f"Failed to update eBay stock: {str(e)}")
+            raise MarketplaceError(f"Failed to update stock on eBay: {str(e)}")
+            
+    @rate_limited(deferrable=True)
     async def end_listing(self, listing_id: str) -> None:
         """End an eBay listing.
         
@@ -223,6 +492,7 @@ class EbayClient(MarketplaceClient):
             logger.error(f"Failed to end eBay listing: {str(e)}")
             raise MarketplaceError(f"Failed to end listing on eBay: {str(e)}")
             
+    @rate_limited
     async def get_stock_level(self, listing_id: str) -> Optional[int]:
         """Get current stock level for an eBay listing.
         
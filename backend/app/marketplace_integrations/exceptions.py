@@ -1,4 +1,6 @@
 """Custom exceptions for marketplace integrations."""
+from typing import Any, List, Optional
+
 
 class MarketplaceError(Exception):
     """Base exception for marketplace-related errors."""
@@ -19,3 +21,23 @@ class ParseError(MarketplaceError):
 class HistoricalDataError(MarketplaceError):
     """Raised when fetching historical data fails."""
     pass
+
+class OrderNotFoundError(MarketplaceError):
+    """Raised when an order to settle does not exist."""
+    pass
+
+class OrderAlreadySettledError(MarketplaceError):
+    """Raised when an order was already settled with a different status."""
+    pass
+
+class CircuitOpenError(MarketplaceError):
+    """Raised when a marketplace call is rejected because its circuit is open."""
+    pass
+
+class CallDeferredError(CircuitOpenError):
+    """Raised when a rejected or failed call was queued to be retried later."""
+
+    def __init__(self, message: str, deferred: Optional[List[Any]] = None):
+        super().__init__(message)
+        # Queued calls, for registering callbacks that run once replayed
+        self.deferred = deferred or []
@@ -0,0 +1,147 @@
+"""
+Shared async HTTP sessions for marketplace API calls.
+
+Marketplace clients borrow a pooled ``httpx.AsyncClient`` per API host from
+the session manager instead of opening their own connections. Sessions keep
+connections alive between calls, negotiate HTTP/2 when the ``h2`` package
+is installed, and cap the number of connections per host. Sessions are
+closed together at application shutdown.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class HttpSessionConfig:
+    """Connection pool settings for an API host."""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls, default: Optional["HttpSessionConfig"] = None) -> "HttpSessionConfig":
+        """
+        Build a config from environment variables, falling back to defaults.
+
+        Reads ``MARKETPLACE_HTTP_MAX_CONNECTIONS``,
+        ``MARKETPLACE_HTTP_MAX_KEEPALIVE``, ``MARKETPLACE_HTTP_KEEPALIVE_EXPIRY``
+        and ``MARKETPLACE_HTTP_TIMEOUT``.
+
+        Args:
+            default: Config used for variables that are not set
+
+        Returns:
+            HttpSessionConfig for marketplace hosts
+        """
+        default = default or cls()
+        return cls(
+            max_connections=int(
+                os.getenv("MARKETPLACE_HTTP_MAX_CONNECTIONS", default.max_connections)
+            ),
+            max_keepalive_connections=int(
+                os.getenv("MARKETPLACE_HTTP_MAX_KEEPALIVE", default.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(
+                os.getenv("MARKETPLACE_HTTP_KEEPALIVE_EXPIRY", default.keepalive_expiry)
+            ),
+            timeout=float(os.getenv("MARKETPLACE_HTTP_TIMEOUT", default.timeout)),
+        )
+
+
+class HttpSessionManager:
+    """Hands out one pooled HTTP session per API host."""
+
+    def __init__(self, config: Optional[HttpSessionConfig] = None):
+        """
+        Initialize the manager.
+
+        Args:
+            config: Pool settings applied to every host (default: from env)
+        """
+        self.config = config or HttpSessionConfig.from_env()
+        self._host_configs: Dict[str, HttpSessionConfig] = {}
+        self._sessions: Dict[str, httpx.AsyncClient] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _host(base_url: str) -> str:
+        parts = urlsplit(base_url)
+        return f"{parts.scheme}://{parts.netloc}" if parts.netloc else base_url
+
+    def configure(self, base_url: str, config: HttpSessionConfig) -> None:
+        """
+        Override pool settings for one host.
+
+        Takes effect the next time a session for the host is created.
+
+        Args:
+            base_url: URL of the API host
+            config: Pool settings for the host
+        """
+        self._host_configs[self._host(base_url)] = config
+
+    def get(self, base_url: str) -> httpx.AsyncClient:
+        """
+        Get the shared session for an API host, creating it on first use.
+
+        Args:
+            base_url: URL of the API host (any path is ignored)
+
+        Returns:
+            Pooled AsyncClient whose requests are relative to the host
+        """
+        host = self._host(base_url)
+        session = self._sessions.get(host)
+        if session is None or session.is_closed:
+            config = self._host_configs.get(host, self.config)
+            session = httpx.AsyncClient(
+                base_url=host,
+                http2=HTTP2_AVAILABLE,
+                timeout=config.timeout,
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive_connections,
+                    keepalive_expiry=config.keepalive_expiry,
+                ),
+            )
+            self._sessions[host] = session
+            logger.info(
+                f"Opened HTTP session for {host} "
+                f"(http2={'on' if HTTP2_AVAILABLE else 'off'}, "
+                f"max_connections={config.max_connections})"
+            )
+        return session
+
+    @property
+    def open_hosts(self) -> int:
+        """Number of hosts with an open session."""
+        return sum(1 for session in self._sessions.values() if not session.is_closed)
+
+    async def close(self) -> None:
+        """Close every session and release its connections."""
+        async with self._lock:
+            sessions, self._sessions = self._sessions, {}
+            for host, session in sessions.items():
+                try:
+                    await session.aclose()
+                except Exception as e:
+                    logger.error(f"Failed to close HTTP session for {host}: {str(e)}")
+
+
+# Shared by every marketplace client in the process
+http_sessions = HttpSessionManager()
@@ -0,0 +1,167 @@
+"""
+Write-behind buffer for listing stock and status changes.
+
+Marketplace sync paths stage listing quantity updates and delistings here
+instead of writing each row immediately. Pending changes are coalesced per
+listing and flushed with one bulk UPDATE per change type, either on a
+periodic tick or once the buffer reaches its size threshold. Stopping the
+buffer flushes whatever is still pending.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..db import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class ListingWriteBuffer:
+    """Coalesces listing updates and flushes them in bulk."""
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Awaitable[Any]],
+        flush_interval: float = 1.0,
+        max_pending: int = 500
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            db_factory: Callable returning an awaitable database client
+            flush_interval: Seconds between periodic flushes
+            max_pending: Number of pending listings that triggers a flush
+        """
+        self._db_factory = db_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._quantities: Dict[str, tuple] = {}  # listing_id -> (quantity, staged_at)
+        self._ended: Dict[str, datetime] = {}  # listing_id -> ended_at
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def pending(self) -> int:
+        """Number of listings with unflushed changes."""
+        return len(self._quantities) + len(self._ended)
+
+    async def stage_quantity(self, listing_id: str, quantity: int) -> None:
+        """
+        Stage a stock quantity update for a listing.
+
+        Args:
+            listing_id: ID of the listing to update
+            quantity: New stock quantity
+        """
+        self._quantities[listing_id] = (quantity, datetime.now())
+        await self._after_stage()
+
+    async def stage_ended(self, listing_id: str) -> None:
+        """
+        Stage a listing as ended.
+
+        Args:
+            listing_id: ID of the listing that was ended
+        """
+        self._quantities.pop(listing_id, None)
+        self._ended[listing_id] = datetime.now()
+        await self._after_stage()
+
+    async def _after_stage(self) -> None:
+        self._ensure_started()
+        if self.pending >= self.max_pending:
+            await self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._stopping or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """Flush pending changes on every tick until stopped."""
+        while not self._stopping:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Listing write-behind flush failed: {str(e)}")
+
+    async def flush(self) -> int:
+        """
+        Write all pending changes to the database.
+
+        Changes that fail to write are returned to the buffer unless a
+        newer change for the same listing was staged in the meantime.
+
+        Returns:
+            Number of listings written
+        """
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+
+            quantities, self._quantities = self._quantities, {}
+            ended, self._ended = self._ended, {}
+
+            try:
+                db = await self._db_factory()
+                if quantities:
+                    await db.execute_raw(
+                        """
+                        UPDATE "Listing" AS l
+                        SET "quantity" = v.quantity,
+                            "lastStockUpdate" = v.staged_at,
+                            "updatedAt" = NOW()
+                        FROM unnest($1::text[], $2::int[], $3::timestamp[])
+                            AS v(id, quantity, staged_at)
+                        WHERE l."id" = v.id
+                        """,
+                        list(quantities.keys()),
+                        [quantity for quantity, _ in quantities.values()],
+                        [staged_at for _, staged_at in quantities.values()]
+                    )
+                if ended:
+                    await db.execute_raw(
+                        """
+                        UPDATE "Listing" AS l
+                        SET "status" = 'ended',
+                            "endedAt" = v.ended_at,
+                            "updatedAt" = NOW()
+                        FROM unnest($1::text[], $2::timestamp[]) AS v(id, ended_at)
+                        WHERE l."id" = v.id
+                        """,
+                        list(ended.keys()),
+                        list(ended.values())
+                    )
+            except Exception:
+                # Requeue without clobbering changes staged during the flush
+                for listing_id, value in quantities.items():
+                    if listing_id not in self._ended:
+                        self._quantities.setdefault(listing_id, value)
+                for listing_id, value in ended.items():
+                    self._ended.setdefault(listing_id, value)
+                raise
+
+            written = len(quantities) + len(ended)
+            logger.info(f"Flushed {written} buffered listing updates")
+            return written
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write everything still pending."""
+        self._stopping = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        self._stopping = False
+
+
+# Shared by every CrossPlatformSync instance in the process
+listing_writer = ListingWriteBuffer(get_db)
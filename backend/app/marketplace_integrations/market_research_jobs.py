@@ -9,77 +9,84 @@ It also provides advanced market analysis features including:
 - Competitive pricing analysis across marketplaces
 """
 import asyncio
+import itertools
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import (
+    Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, Iterable, Tuple
+)
 import numpy as np
 from collections import defaultdict
 
-from .ebay_client import EbayClient
-from .exceptions import MarketDataError, AuthenticationError
+from .clients import marketplace_clients
+from .exceptions import MarketplaceError
+from .price_index import CompetitorPriceIndex, PriceSummary
+from .price_series import DailyPriceSeries
 from ..services.analytics.analytics_service import AnalyticsService
 from ..db import get_db
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RESEARCH_CONCURRENCY = 4  # Batches researched at once per job
+_STREAM_DONE = object()  # Marks the end of a market data stream
+
+# Category month histograms, shared across jobs and refreshed once a day
+_monthly_demand_cache: Dict[str, Any] = {'day': None, 'histograms': {}}
+_monthly_demand_lock = asyncio.Lock()
+
 class MarketResearchJob:
     """Handles periodic market research data collection and analysis."""
     
     def __init__(self):
-        # TODO: Load from environment variables
-        self.ebay_client = EbayClient(
-            client_id="development",
-            client_secret="development"
-        )
+        self.ebay_client = marketplace_clients.get("ebay")
         self.db = get_db()
         self.analytics_service = AnalyticsService()
+        self.last_run_stats: Dict[str, Any] = {}
+        self.price_index = CompetitorPriceIndex()
         
     async def collect_market_data(
         self,
         item_ids: List[str],
-        days_history: Optional[int] = 30
+        days_history: Optional[int] = 30,
+        concurrency: int = DEFAULT_RESEARCH_CONCURRENCY,
+        on_result: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+        batch_size: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Collect market data for specified items.
         
+        Items are researched in batches by a bounded pool of workers;
+        current data and price history for a batch are fetched in parallel
+        with the client's batch calls. Marketplace quotas are enforced by
+        the client's request scheduler. Use ``iter_market_data`` instead to
+        avoid holding every result in memory.
+        
         Args:
             item_ids: List of item identifiers to research
             days_history: Number of days of price history to collect
+            concurrency: Maximum number of batches researched at once
+            on_result: Optional coroutine called with each item's result as
+                soon as it is collected
+            batch_size: Items per batch (default: the client's batch size)
             
         Returns:
             Dictionary containing collected market data
         """
         try:
-            await self.ebay_client.authenticate()
-            
             results = {}
-            for item_id in item_ids:
-                try:
-                    # Fetch current market data
-                    current_data = await self.ebay_client.fetch_market_data(item_id)
-                    parsed_data = self.ebay_client.parse_response(current_data)
-                    
-                    # Fetch historical data if requested
-                    if days_history:
-                        history_data = await self.ebay_client.get_price_history(
-                            item_id,
-                            days=days_history
-                        )
-                    else:
-                        history_data = None
-                    
-                    results[item_id] = {
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "current_data": parsed_data,
-                        "price_history": history_data
-                    }
-                    
-                except (MarketDataError, AuthenticationError) as e:
-                    logger.error(f"Error collecting data for item {item_id}: {str(e)}")
-                    results[item_id] = {
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "error": str(e)
-                    }
+            async for item_id, result in self.iter_market_data(
+                item_ids,
+                days_history,
+                concurrency,
+                batch_size
+            ):
+                results[item_id] = result
+                if on_result is not None:
+                    try:
+                        await on_result(item_id, result)
+                    except Exception as e:
+                        logger.error(f"Error handling market data for item {item_id}: {str(e)}")
                     
             return results
             
@@ -87,6 +94,127 @@ class MarketResearchJob:
             logger.error(f"Market research job failed: {str(e)}")
             raise
 
+    async def iter_market_data(
+        self,
+        item_ids: Iterable[str],
+        days_history: Optional[int] = 30,
+        concurrency: int = DEFAULT_RESEARCH_CONCURRENCY,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Research items in batches and yield each result as it completes.
+        
+        At most ``concurrency`` batches are in flight and at most
+        ``concurrency * batch_size`` finished results wait to be consumed,
+        so memory stays flat regardless of how many items are researched.
+        
+        Args:
+            item_ids: Item identifiers to research (any iterable)
+            days_history: Number of days of price history to collect
+            concurrency: Maximum number of batches researched at once
+            batch_size: Items per batch (default: the client's batch size)
+            
+        Yields:
+            Tuples of (item_id, market data or error)
+        """
+        await self.ebay_client.authenticate()
+        
+        batch_size = max(1, batch_size or self.ebay_client.batch_size)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * batch_size)
+        pending_ids = iter(item_ids)
+        started_at = time.monotonic()
+        collected = 0
+        errors = 0
+        
+        async def worker() -> None:
+            # Workers share one iterator, so each item is taken once
+            while batch := list(itertools.islice(pending_ids, batch_size)):
+                for entry in await self._collect_batch(batch, days_history):
+                    await queue.put(entry)
+        
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(max(1, concurrency))
+        ]
+        
+        async def close_when_done() -> None:
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                await queue.put(_STREAM_DONE)
+        
+        closer = asyncio.create_task(close_when_done())
+        try:
+            while (entry := await queue.get()) is not _STREAM_DONE:
+                collected += 1
+                if "error" in entry[1]:
+                    errors += 1
+                yield entry
+            # Surface worker failures once the stream is drained
+            await closer
+        finally:
+            for task in (*workers, closer):
+                task.cancel()
+            
+            elapsed = time.monotonic() - started_at
+            self.last_run_stats = {
+                "items": collected,
+                "errors": errors,
+                "elapsed_seconds": elapsed,
+                "items_per_second": collected / elapsed if elapsed > 0 else 0.0
+            }
+            logger.info(
+                f"Collected market data for {collected} items in {elapsed:.2f}s "
+                f"({self.last_run_stats['items_per_second']:.1f} items/s)"
+            )
+
+    async def _collect_batch(
+        self,
+        item_ids: List[str],
+        days_history: Optional[int]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Collect current market data and price history for a batch of items.
+        
+        Args:
+            item_ids: Item identifiers to research
+            days_history: Number of days of price history to collect
+            
+        Returns:
+            List of (item_id, market data or error) tuples
+        """
+        # Fetch current market data and history for the batch concurrently
+        current_task = self.ebay_client.fetch_market_data_batch(item_ids)
+        if days_history:
+            current, histories = await asyncio.gather(
+                current_task,
+                self.ebay_client.get_price_history_batch(item_ids, days=days_history)
+            )
+        else:
+            current, histories = await current_task, {}
+        
+        timestamp = datetime.utcnow().isoformat()
+        results = []
+        for item_id in item_ids:
+            try:
+                current_data = current.get(item_id)
+                history_data = histories.get(item_id)
+                for value in (current_data, history_data):
+                    if isinstance(value, MarketplaceError):
+                        raise value
+                results.append((item_id, {
+                    "timestamp": timestamp,
+                    "current_data": self.ebay_client.parse_response(current_data),
+                    "price_history": history_data
+                }))
+            except MarketplaceError as e:
+                logger.error(f"Error collecting data for item {item_id}: {str(e)}")
+                results.append((item_id, {
+                    "timestamp": timestamp,
+                    "error": str(e)
+                }))
+        return results
+
     async def analyze_historical_prices(self, item_id: str) -> Dict[str, Any]:
         """
         Analyze historical price trends for an item.
@@ -98,84 +226,98 @@ class MarketResearchJob:
             Dictionary containing price trend analysis
         """
         try:
-            # Get all listings for this item
-            listings = await self.db.listing.find_many(
-                where={'itemId': item_id},
-                include={
-                    'marketResearch': True,
-                    'orders': True
-                }
-            )
+            results = await self.analyze_historical_prices_batch([item_id])
+            return results[item_id]
             
-            if not listings:
-                return {
+        except Exception as e:
+            logger.error(f"Error analyzing historical prices for item {item_id}: {str(e)}")
+            raise
+
+    async def analyze_historical_prices_batch(
+        self,
+        item_ids: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze historical price trends for many items in one pass.
+        
+        Listing prices and completed sale prices for every requested item
+        are fetched with a single query, and trends for all items are fitted
+        together with vectorized least squares.
+        
+        Args:
+            item_ids: IDs of the items to analyze (default: every item with
+                listings)
+            
+        Returns:
+            Dictionary mapping item ID to its price trend analysis
+        """
+        try:
+            results = analyze_price_points(*await self.fetch_price_points(item_ids))
+            
+            for item_id in item_ids or []:
+                results.setdefault(item_id, {
                     'trend': 'insufficient_data',
                     'average_price': None,
                     'price_range': None,
                     'confidence': 0.0
-                }
-            
-            # Collect price data points
-            price_data = []
-            for listing in listings:
-                # Add listing price
-                price_data.append({
-                    'price': float(listing.price),
-                    'date': listing.createdAt,
-                    'type': 'listing'
                 })
-                
-                # Add successful order prices
-                for order in listing.orders:
-                    if order.status == 'completed':
-                        price_data.append({
-                            'price': float(order.totalPrice),
-                            'date': order.createdAt,
-                            'type': 'sale'
-                        })
             
-            # Sort by date
-            price_data.sort(key=lambda x: x['date'])
-            
-            # Calculate trends
-            if len(price_data) < 2:
-                trend = 'insufficient_data'
-                confidence = 0.0
-            else:
-                prices = [p['price'] for p in price_data]
-                dates = [(p['date'] - price_data[0]['date']).days for p in price_data]
-                
-                # Simple linear regression for trend
-                coeffs = np.polyfit(dates, prices, 1)
-                trend = 'increasing' if coeffs[0] > 0.01 else \
-                       'decreasing' if coeffs[0] < -0.01 else 'stable'
-                
-                
-                # Calculate R-squared for confidence
-                y_pred = np.polyval(coeffs, dates)
-                ss_tot = sum((p - np.mean(prices))**2 for p in prices)
-                ss_res = sum((prices[i] - y_pred[i])**2 for i in range(len(prices)))
-                confidence = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0.0
-            
-            return {
-                'trend': trend,
-                'average_price': sum(p['price'] for p in price_data) / len(price_data),
-                'price_range': {
-                    'min': min(p['price'] for p in price_data),
-                    'max': max(p['price'] for p in price_data)
-                },
-                'confidence': confidence,
-                'data_points': len(price_data)
-            }
+            return results
             
         except Exception as e:
-            logger.error(f"Error analyzing historical prices for item {item_id}: {str(e)}")
+            logger.error(f"Error analyzing historical prices in batch: {str(e)}")
             raise
             
+    async def fetch_price_points(
+        self,
+        item_ids: Optional[List[str]] = None
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Fetch listing and completed sale prices for items in one query.
+        
+        Args:
+            item_ids: IDs of the items to fetch (default: every item with
+                listings)
+            
+        Returns:
+            Tuple of (item IDs, prices, fractional epoch days), grouped by
+            item and sorted by time within each item
+        """
+        rows = await self.db.query_raw(
+            """
+            SELECT item_id, price, day FROM (
+                SELECT l."itemId" AS item_id,
+                       l."price"::float8 AS price,
+                       EXTRACT(EPOCH FROM l."createdAt") / 86400 AS day
+                FROM "Listing" l
+                WHERE $1::text[] IS NULL OR l."itemId" = ANY($1::text[])
+                UNION ALL
+                SELECT l."itemId" AS item_id,
+                       o."totalPrice"::float8 AS price,
+                       EXTRACT(EPOCH FROM o."createdAt") / 86400 AS day
+                FROM "Order" o
+                JOIN "Listing" l ON l."id" = o."listingId"
+                WHERE o."status" = 'completed'
+                  AND ($1::text[] IS NULL OR l."itemId" = ANY($1::text[]))
+            ) AS points
+            ORDER BY item_id, day
+            """,
+            item_ids
+        )
+        
+        return (
+            [row['item_id'] for row in rows],
+            np.array([row['price'] for row in rows], dtype=np.float64),
+            np.array([row['day'] for row in rows], dtype=np.float64)
+        )
+        
     async def predict_seasonal_demand(self, category: str) -> Dict[str, Any]:
         """
         Predict seasonal demand patterns for a category.
         
+        Monthly completed-order counts for every category are computed by
+        one grouped query and cached until the end of the (UTC) day.
+        
         Args:
             category: The category to analyze
             
@@ -183,99 +325,133 @@ class MarketResearchJob:
             Dictionary containing seasonal demand analysis
         """
         try:
-            # Get all orders in this category from the past year
-            one_year_ago = datetime.now() - timedelta(days=365)
+            monthly_demand = await self.get_monthly_demand()
+            return seasonal_pattern(monthly_demand.get(category, {}))
             
-            items = await self.db.item.find_many(
-                where={
-                    'detectedCategory': category,
-                    'listings': {
-                        'some': {
-                            'orders': {
-                                'some': {
-                                    'createdAt': {
-                                        'gte': one_year_ago
-                                    }
-                                }
-                            }
-                        }
-                    }
-                },
-                include={
-                    'listings': {
-                        'include': {
-                            'orders': True
-                        }
-                    }
-                }
-            )
+        except Exception as e:
+            logger.error(f"Error predicting seasonal demand for category {category}: {str(e)}")
+            raise
+
+    async def get_monthly_demand(self) -> Dict[str, Dict[int, int]]:
+        """
+        Get completed orders per month for every category over the past year.
+        
+        Returns:
+            Dictionary mapping category to a month -> order count histogram
+        """
+        today = datetime.utcnow().date()
+        if _monthly_demand_cache['day'] == today:
+            return _monthly_demand_cache['histograms']
+        
+        async with _monthly_demand_lock:
+            # Another task may have refreshed the cache while we waited
+            if _monthly_demand_cache['day'] == today:
+                return _monthly_demand_cache['histograms']
             
-            if not items:
-                return {
-                    'pattern': 'insufficient_data',
-                    'peak_months': [],
-                    'confidence': 0.0
-                }
+            one_year_ago = datetime.now() - timedelta(days=365)
+            rows = await self.db.query_raw(
+                """
+                SELECT i."detectedCategory" AS category,
+                       EXTRACT(MONTH FROM o."createdAt")::int AS month,
+                       COUNT(*) AS orders
+                FROM "Order" o
+                JOIN "Listing" l ON l."id" = o."listingId"
+                JOIN "Item" i ON i."id" = l."itemId"
+                WHERE o."status" = 'completed'
+                  AND o."createdAt" >= $1
+                  AND i."detectedCategory" IS NOT NULL
+                GROUP BY i."detectedCategory", month
+                """,
+                one_year_ago
+            )
             
-            # Aggregate orders by month
-            monthly_orders = defaultdict(int)
-            for item in items:
-                for listing in item.listings:
-                    for order in listing.orders:
-                        if order.status == 'completed':
-                            month = order.createdAt.month
-                            monthly_orders[month] += 1
+            histograms: Dict[str, Dict[int, int]] = defaultdict(dict)
+            for row in rows:
+                histograms[row['category']][int(row['month'])] = int(row['orders'])
             
-            if not monthly_orders:
-                return {
-                    'pattern': 'insufficient_data',
-                    'peak_months': [],
-                    'confidence': 0.0
-                }
+            _monthly_demand_cache['day'] = today
+            _monthly_demand_cache['histograms'] = dict(histograms)
+            return _monthly_demand_cache['histograms']
             
-            # Find peak months (months with orders > average)
-            avg_orders = sum(monthly_orders.values()) / len(monthly_orders)
-            peak_months = [
-                month for month, count in monthly_orders.items()
-                if count > avg_orders
-            ]
+    async def store_research(
+        self,
+        listing_id: str,
+        research: Dict[str, Any]
+    ) -> Any:
+        """
+        Store a market research record and update the competitor price index.
+        
+        Args:
+            listing_id: The ID of the listing the research belongs to
+            research: Research fields (priceTrend, competitorPrices,
+                demandMetrics, recommendations)
             
-            # Determine seasonal pattern
-            if len(monthly_orders) < 6:
-                pattern = 'insufficient_data'
-                confidence = 0.0
-            else:
-                # Check if peaks are clustered
-                peak_months.sort()
-                gaps = [peak_months[i+1] - peak_months[i] for i in range(len(peak_months)-1)]
-                
-                if len(peak_months) <= 2:
-                    pattern = 'minimal_seasonality'
-                elif max(gaps) > 4:
-                    pattern = 'multi_season'
-                else:
-                    pattern = 'single_season'
-                
-                # Calculate confidence based on data consistency
-                consistency = len(monthly_orders) / 12  # How many months we have data for
-                peak_strength = max(monthly_orders.values()) / avg_orders
-                confidence = min(consistency * 0.7 + (peak_strength - 1) * 0.3, 1.0)
+        Returns:
+            The created market research record
+        """
+        try:
+            listing = await self.db.listing.find_unique(where={'id': listing_id})
+            if not listing:
+                raise MarketplaceError(f"Listing {listing_id} not found")
             
-            return {
-                'pattern': pattern,
-                'peak_months': peak_months,
-                'monthly_distribution': dict(monthly_orders),
-                'confidence': confidence
-            }
+            prices = (research.get('competitorPrices') or {}).get('prices', [])
+            async with self.db.tx() as transaction:
+                # Index before storing, so a rebuild from history skips these prices
+                if prices:
+                    await self.price_index.record(
+                        transaction,
+                        listing.itemId,
+                        listing.marketplace,
+                        prices
+                    )
+                return await transaction.marketresearchdata.create(
+                    data={
+                        'listingId': listing_id,
+                        **research
+                    }
+                )
             
         except Exception as e:
-            logger.error(f"Error predicting seasonal demand for category {category}: {str(e)}")
+            logger.error(f"Error storing market research for listing {listing_id}: {str(e)}")
             raise
             
+    async def store_market_data(
+        self,
+        listing_id: str,
+        market_data: Dict[str, Any]
+    ) -> Any:
+        """
+        Store a collected market data result as research for a listing.
+        
+        Args:
+            listing_id: The ID of the listing the data was collected for
+            market_data: Result from ``iter_market_data``
+            
+        Returns:
+            The created market research record
+        """
+        history = market_data.get("price_history")
+        if isinstance(history, DailyPriceSeries):
+            history = history.to_dict()
+        prices = [
+            p for p in market_data["current_data"].get("competitor_prices", [])
+            if p > 0
+        ]
+        return await self.store_research(listing_id, {
+            'priceTrend': history,
+            'competitorPrices': {
+                'prices': prices,
+                'timestamp': market_data["timestamp"]
+            }
+        })
+        
     async def analyze_competitive_pricing(self, item_id: str) -> Dict[str, Any]:
         """
         Analyze competitive pricing across marketplaces.
         
+        Reads the precomputed competitor price index rather than the raw
+        research history.
+        
         Args:
             item_id: The ID of the item to analyze
             
@@ -283,58 +459,28 @@ class MarketResearchJob:
             Dictionary containing competitive pricing analysis
         """
         try:
-            # Get item and its current listings
-            item = await self.db.item.find_unique(
-                where={'id': item_id},
-                include={
-                    'listings': {
-                        'include': {
-                            'marketResearch': True
-                        }
-                    }
-                }
-            )
+            # Read per-marketplace competitor price summaries
+            summaries = await self.price_index.get(self.db, item_id)
             
-            if not item:
-                return {
-                    'recommendation': 'insufficient_data',
-                    'price_points': {},
-                    'confidence': 0.0
-                }
-            
-            # Aggregate pricing data by marketplace
-            marketplace_prices = defaultdict(list)
-            for listing in item.listings:
-                if listing.marketResearch:
-                    for research in listing.marketResearch:
-                        if research.competitorPrices:
-                            prices = research.competitorPrices.get('prices', [])
-                            marketplace_prices[listing.marketplace].extend(prices)
+            # Calculate price points for each marketplace
+            price_points = {
+                marketplace: summary.price_point()
+                for marketplace, summary in summaries.items()
+                if summary.count
+            }
             
-            if not marketplace_prices:
+            if not price_points:
                 return {
                     'recommendation': 'insufficient_data',
                     'price_points': {},
                     'confidence': 0.0
                 }
             
-            # Calculate price points for each marketplace
-            price_points = {}
-            overall_min = float('inf')
-            overall_max = 0
-            
-            for marketplace, prices in marketplace_prices.items():
-                if prices:
-                    avg_price = sum(prices) / len(prices)
-                    price_points[marketplace] = {
-                        'average': avg_price,
-                        'median': sorted(prices)[len(prices)//2],
-                        'min': min(prices),
-                        'max': max(prices),
-                        'sample_size': len(prices)
-                    }
-                    overall_min = min(overall_min, min(prices))
-                    overall_max = max(overall_max, max(prices))
+            # Merge marketplace sketches for market-wide percentiles
+            overall = PriceSummary()
+            for summary in summaries.values():
+                overall.merge(summary)
+            p10, p50, p90 = overall.sketch.quantiles((0.1, 0.5, 0.9))
             
             # Generate pricing recommendation
             if len(price_points) >= 2:
@@ -364,8 +510,11 @@ class MarketResearchJob:
                 'target_price': target_price,
                 'price_points': price_points,
                 'market_spread': {
-                    'min': overall_min,
-                    'max': overall_max
+                    'min': overall.minimum,
+                    'max': overall.maximum,
+                    'p10': p10,
+                    'median': p50,
+                    'p90': p90
                 },
                 'confidence': confidence
             }
@@ -374,6 +523,173 @@ class MarketResearchJob:
             logger.error(f"Error analyzing competitive pricing for item {item_id}: {str(e)}")
             raise
 
+def seasonal_pattern(monthly_orders: Dict[int, int]) -> Dict[str, Any]:
+    """
+    Classify seasonal demand from a month -> completed orders histogram.
+    
+    Args:
+        monthly_orders: Completed order counts keyed by month (1-12)
+        
+    Returns:
+        Dictionary containing seasonal demand analysis
+    """
+    if not monthly_orders:
+        return {
+            'pattern': 'insufficient_data',
+            'peak_months': [],
+            'confidence': 0.0
+        }
+    
+    # Find peak months (months with orders > average)
+    avg_orders = sum(monthly_orders.values()) / len(monthly_orders)
+    peak_months = [
+        month for month, count in monthly_orders.items()
+        if count > avg_orders
+    ]
+    
+    # Determine seasonal pattern
+    if len(monthly_orders) < 6:
+        pattern = 'insufficient_data'
+        confidence = 0.0
+    else:
+        # Check if peaks are clustered
+        peak_months.sort()
+        gaps = [peak_months[i+1] - peak_months[i] for i in range(len(peak_months)-1)]
+        
+        if len(peak_months) <= 2:
+            pattern = 'minimal_seasonality'
+        elif max(gaps) > 4:
+            pattern = 'multi_season'
+        else:
+            pattern = 'single_season'
+        
+        # Calculate confidence based on data consistency
+        consistency = len(monthly_orders) / 12  # How many months we have data for
+        peak_strength = max(monthly_orders.values()) / avg_orders
+        confidence = min(consistency * 0.7 + (peak_strength - 1) * 0.3, 1.0)
+    
+    return {
+        'pattern': pattern,
+        'peak_months': peak_months,
+        'monthly_distribution': dict(monthly_orders),
+        'confidence': confidence
+    }
+
+def fit_price_trends(
+    item_ids: List[str],
+    prices: np.ndarray,
+    days: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Fit a linear price trend for every item at once.
+    
+    Points must be grouped by item and sorted by time within each item.
+    Each item's x axis is whole days since its first point, matching a
+    per-item ``np.polyfit(days, prices, 1)`` fit; the slope and R-squared
+    come from closed-form least squares over per-group sums.
+    
+    Args:
+        item_ids: Item ID of each point
+        prices: Price of each point
+        days: Fractional epoch day of each point
+        
+    Returns:
+        Dictionary of per-item columns: ids, counts, slope, r_squared,
+        mean, min and max
+    """
+    ids = np.asarray(item_ids, dtype=str)
+    if len(ids) == 0:
+        empty = np.array([], dtype=np.float64)
+        return {
+            'ids': ids,
+            'counts': np.array([], dtype=np.int64),
+            'slope': empty,
+            'r_squared': empty,
+            'mean': empty,
+            'min': empty,
+            'max': empty
+        }
+    
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    counts = np.diff(np.r_[starts, len(ids)])
+    
+    # Whole days since each item's first point
+    x = np.floor(days - np.repeat(days[starts], counts))
+    y = prices
+    
+    # Center per item for numerically stable sums
+    x_mean = np.add.reduceat(x, starts) / counts
+    y_mean = np.add.reduceat(y, starts) / counts
+    dx = x - np.repeat(x_mean, counts)
+    dy = y - np.repeat(y_mean, counts)
+    sxx = np.add.reduceat(dx * dx, starts)
+    sxy = np.add.reduceat(dx * dy, starts)
+    syy = np.add.reduceat(dy * dy, starts)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+        r_squared = np.where(
+            (sxx > 0) & (syy > 0),
+            sxy * sxy / (sxx * syy),
+            0.0
+        )
+    
+    return {
+        'ids': ids[starts],
+        'counts': counts,
+        'slope': slope,
+        'r_squared': r_squared,
+        'mean': y_mean,
+        'min': np.minimum.reduceat(y, starts),
+        'max': np.maximum.reduceat(y, starts)
+    }
+
+
+def analyze_price_points(
+    item_ids: List[str],
+    prices: np.ndarray,
+    days: np.ndarray
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Build per-item price trend analyses from grouped price points.
+    
+    Args:
+        item_ids: Item ID of each point (grouped, time-sorted per item)
+        prices: Price of each point
+        days: Fractional epoch day of each point
+        
+    Returns:
+        Dictionary mapping item ID to its price trend analysis
+    """
+    if len(item_ids) == 0:
+        return {}
+    
+    fit = fit_price_trends(item_ids, prices, days)
+    
+    results = {}
+    for i, item_id in enumerate(fit['ids']):
+        if fit['counts'][i] < 2:
+            trend = 'insufficient_data'
+            confidence = 0.0
+        else:
+            slope = fit['slope'][i]
+            trend = 'increasing' if slope > 0.01 else \
+                   'decreasing' if slope < -0.01 else 'stable'
+            confidence = float(fit['r_squared'][i])
+        
+        results[str(item_id)] = {
+            'trend': trend,
+            'average_price': float(fit['mean'][i]),
+            'price_range': {
+                'min': float(fit['min'][i]),
+                'max': float(fit['max'][i])
+            },
+            'confidence': confidence,
+            'data_points': int(fit['counts'][i])
+        }
+    
+    return results
+
 async def update_analytics_data(listing_id: str, market_data: Dict[str, Any]) -> None:
     """
     Update analytics data for a listing based on market research data.
@@ -399,6 +715,11 @@ async def update_analytics_data(listing_id: str, market_data: Dict[str, Any]) ->
         available_points = sum(1 for point in expected_data_points if market_data["current_data"].get(point))
         coverage_rate = available_points / len(expected_data_points)
 
+        # Price history travels as a compact series; expand it only for storage
+        history = market_data.get("price_history")
+        if isinstance(history, DailyPriceSeries):
+            market_data = {**market_data, "price_history": history.to_dict()}
+
         analytics_service = AnalyticsService()
         await analytics_service.update_analytics_data(
             listing_id=listing_id,
@@ -417,27 +738,65 @@ async def update_analytics_data(listing_id: str, market_data: Dict[str, Any]) ->
         logger.error(f"Failed to update analytics data for listing {listing_id}: {str(e)}")
         raise
 
+async def update_analytics_from_stream(
+    results: AsyncIterator[Tuple[str, Dict[str, Any]]],
+    store_research: Optional[Callable[[str, Dict[str, Any]], Awaitable[Any]]] = None
+) -> Dict[str, int]:
+    """
+    Update analytics data for each market research result as it arrives.
+    
+    Args:
+        results: Stream of (listing_id, market data) tuples
+        store_research: Optional coroutine storing each result as research
+            (and so updating the competitor price index) before analytics
+        
+    Returns:
+        Counts of updated, skipped (research errors) and failed updates,
+        plus failed research writes when ``store_research`` is given
+    """
+    summary = {"updated": 0, "skipped": 0, "failed": 0}
+    if store_research is not None:
+        summary["store_failed"] = 0
+    async for listing_id, market_data in results:
+        if "error" in market_data:
+            summary["skipped"] += 1
+            continue
+        if store_research is not None:
+            try:
+                await store_research(listing_id, market_data)
+            except Exception:
+                # store_research already logged the failure; analytics still update
+                summary["store_failed"] += 1
+        try:
+            await update_analytics_data(listing_id, market_data)
+            summary["updated"] += 1
+        except Exception:
+            # update_analytics_data already logged the failure
+            summary["failed"] += 1
+    return summary
+
 async def run_market_research(
-    item_ids: List[str],
+    item_ids: Iterable[str],
     days_history: Optional[int] = 30
 ) -> None:
     """
-    Run the market research job and update analytics.
+    Run the market research job, store the research and update analytics.
     
     Args:
-        item_ids: List of item identifiers to research
+        item_ids: Item identifiers to research
         days_history: Number of days of price history to collect
     """
     job = MarketResearchJob()
     try:
-        results = await job.collect_market_data(item_ids, days_history)
-        
-        # Update analytics data for each item
-        for item_id, market_data in results.items():
-            if "error" not in market_data:
-                await update_analytics_data(item_id, market_data)
+        summary = await update_analytics_from_stream(
+            job.iter_market_data(item_ids, days_history),
+            store_research=job.store_market_data
+        )
         
-        logger.info(f"Market research and analytics update completed. Results: {results}")
+        logger.info(
+            f"Market research and analytics update completed. "
+            f"Summary: {summary}, stats: {job.last_run_stats}"
+        )
         
     except Exception as e:
         logger.error(f"Failed to run market research: {str(e)}")
@@ -4,15 +4,26 @@ Base class for marketplace integrations providing a common interface for all mar
 This abstract class defines the required methods that all marketplace clients must implement
 to ensure consistent behavior across different marketplace integrations (eBay, Amazon, Etsy, etc.).
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
+
+from .exceptions import MarketplaceError
+from .price_series import DailyPriceSeries
 
 
 class MarketplaceClient(ABC):
-    """Abstract base class for marketplace API clients."""
+    """Abstract base class for marketplace API clients.
+    
+    The batch methods fan out to the single-item methods by default.
+    Clients whose platform accepts several identifiers per request should
+    override them and set ``batch_size`` to the platform's limit.
+    """
+    
+    batch_size: int = 20  # Identifiers callers should pass per batch call
 
     @abstractmethod
-    def authenticate(self, *args: Any, **kwargs: Any) -> None:
+    async def authenticate(self, *args: Any, **kwargs: Any) -> None:
         """
         Authenticate with the marketplace API.
 
@@ -26,7 +37,7 @@ class MarketplaceClient(ABC):
         pass
 
     @abstractmethod
-    def fetch_market_data(self, item_identifier: str) -> Dict[str, Any]:
+    async def fetch_market_data(self, item_identifier: str) -> Dict[str, Any]:
         """
         Fetch market data for a specific item.
 
@@ -58,9 +69,9 @@ class MarketplaceClient(ABC):
         pass
 
     @abstractmethod
-    def get_price_history(
+    async def get_price_history(
         self, item_identifier: str, days: Optional[int] = 30
-    ) -> Dict[str, Any]:
+    ) -> DailyPriceSeries:
         """
         Fetch historical price data for an item.
 
@@ -69,9 +80,64 @@ class MarketplaceClient(ABC):
             days: Number of days of history to fetch (default: 30)
 
         Returns:
-            Dict containing historical price data
+            Compact daily price series for the item
 
         Raises:
             HistoricalDataError: If fetching historical data fails
         """
         pass
+
+    async def fetch_market_data_batch(
+        self, item_identifiers: List[str]
+    ) -> Dict[str, Union[Dict[str, Any], MarketplaceError]]:
+        """
+        Fetch market data for several items.
+
+        Args:
+            item_identifiers: Unique identifiers for the items
+
+        Returns:
+            Dictionary mapping each identifier to its market data, or to the
+            MarketplaceError raised for it
+
+        Raises:
+            Exception: Errors other than MarketplaceError
+        """
+        return await self._fan_out(
+            item_identifiers,
+            lambda item_id: self.fetch_market_data(item_id)
+        )
+
+    async def get_price_history_batch(
+        self, item_identifiers: List[str], days: Optional[int] = 30
+    ) -> Dict[str, Union[DailyPriceSeries, MarketplaceError]]:
+        """
+        Fetch historical price data for several items.
+
+        Args:
+            item_identifiers: Unique identifiers for the items
+            days: Number of days of history to fetch (default: 30)
+
+        Returns:
+            Dictionary mapping each identifier to its daily price series, or
+            to the MarketplaceError raised for it
+
+        Raises:
+            Exception: Errors other than MarketplaceError
+        """
+        return await self._fan_out(
+            item_identifiers,
+            lambda item_id: self.get_price_history(item_id, days)
+        )
+
+    @staticmethod
+    async def _fan_out(item_identifiers: List[str], call) -> Dict[str, Any]:
+        """Run a single-item call for every identifier concurrently."""
+        results = await asyncio.gather(
+            *(call(item_id) for item_id in item_identifiers),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, MarketplaceError):
+                raise result
+        return dict(zip(item_identifiers, results))
@@ -0,0 +1,312 @@
+"""
+Materialized marketplace performance weights for inventory allocation.
+
+Order outcomes per marketplace are persisted as running totals in the
+``MarketplaceWeight`` table and mirrored in an in-process TTL cache, so
+allocations read precomputed weights instead of re-aggregating orders.
+The totals are updated incrementally whenever an order is settled
+(completed or cancelled).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEIGHT = 1.0  # Weight for marketplaces without any orders
+DEFAULT_SELL_HOURS = 168  # Default time to sell: 1 week
+MIN_WEIGHT = 0.1
+SETTLED_STATUSES = ('completed', 'cancelled')
+
+
+def performance_weight(
+    completed: int,
+    cancelled: int,
+    avg_hours: Optional[float]
+) -> float:
+    """
+    Calculate an allocation weight from aggregated order outcomes.
+
+    Args:
+        completed: Number of completed orders
+        cancelled: Number of cancelled orders
+        avg_hours: Average hours from listing to completion
+
+    Returns:
+        Weight based on success rate and speed (minimum 0.1)
+    """
+    total_orders = completed + cancelled
+    success_rate = (
+        completed / total_orders
+        if total_orders > 0 else 0.5
+    )
+    avg_time = (
+        avg_hours
+        if completed > 0 and avg_hours is not None else DEFAULT_SELL_HOURS
+    )
+
+    # Calculate weight based on success rate and speed
+    time_factor = DEFAULT_SELL_HOURS / (avg_time + DEFAULT_SELL_HOURS)
+    weight = success_rate * 0.7 + time_factor * 0.3
+
+    return max(MIN_WEIGHT, weight)
+
+
+@dataclass
+class MarketplaceStats:
+    """Running order outcome totals for a marketplace."""
+    completed: int = 0
+    cancelled: int = 0
+    completion_hours: float = 0.0
+    has_orders: bool = False  # Whether any order, settled or pending, exists
+
+    @property
+    def weight(self) -> float:
+        """
+        Allocation weight derived from the running totals.
+
+        Marketplaces without any orders get DEFAULT_WEIGHT; ones whose
+        orders are all still pending are weighted as having no successes
+        yet (a neutral success rate and the default time to sell).
+        """
+        if self.completed + self.cancelled == 0 and not self.has_orders:
+            return DEFAULT_WEIGHT
+        avg_hours = (
+            self.completion_hours / self.completed
+            if self.completed > 0 else None
+        )
+        return performance_weight(self.completed, self.cancelled, avg_hours)
+
+
+class MarketplaceWeightTable:
+    """TTL-cached view over the persisted marketplace weight table."""
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        """
+        Initialize the weight table.
+
+        Args:
+            ttl_seconds: How long cached stats are served before re-reading
+                the persisted table
+        """
+        self.ttl_seconds = ttl_seconds
+        self._cache: Dict[str, tuple] = {}  # marketplace -> (expires_at, stats)
+        self._lock = asyncio.Lock()
+
+    def _cached(self, marketplace: str) -> Optional[MarketplaceStats]:
+        entry = self._cache.get(marketplace)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def _store(self, marketplace: str, stats: MarketplaceStats) -> None:
+        self._cache[marketplace] = (time.monotonic() + self.ttl_seconds, stats)
+
+    def invalidate(self, marketplace: Optional[str] = None) -> None:
+        """
+        Drop cached stats for one marketplace or for all of them.
+
+        Args:
+            marketplace: Marketplace to invalidate (default: all)
+        """
+        if marketplace is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(marketplace, None)
+
+    async def get_weights(self, db, marketplaces: List[str]) -> Dict[str, float]:
+        """
+        Get allocation weights for the given marketplaces.
+
+        Cached entries are returned directly; misses are read from the
+        persisted table, and marketplaces missing from the table are
+        rebuilt from the orders table once and persisted.
+
+        Args:
+            db: Database client
+            marketplaces: Marketplaces to get weights for
+
+        Returns:
+            Dictionary mapping marketplace to allocation weight
+        """
+        missing = [m for m in marketplaces if self._cached(m) is None]
+        if missing:
+            async with self._lock:
+                # Another task may have filled the cache while we waited
+                missing = [m for m in missing if self._cached(m) is None]
+                if missing:
+                    await self._load(db, missing)
+
+        return {
+            marketplace: (self._cached(marketplace) or MarketplaceStats()).weight
+            for marketplace in marketplaces
+        }
+
+    async def _load(self, db, marketplaces: List[str]) -> None:
+        """Load stats for marketplaces from the persisted table."""
+        rows = await db.marketplaceweight.find_many(
+            where={'marketplace': {'in': marketplaces}}
+        )
+        unsettled = [
+            row.marketplace for row in rows
+            if row.completedCount + row.cancelledCount == 0
+        ]
+        with_orders = await self._with_orders(db, unsettled) if unsettled else set()
+        for row in rows:
+            self._store(row.marketplace, MarketplaceStats(
+                completed=row.completedCount,
+                cancelled=row.cancelledCount,
+                completion_hours=row.completionHours,
+                has_orders=(
+                    row.completedCount + row.cancelledCount > 0
+                    or row.marketplace in with_orders
+                )
+            ))
+
+        unseeded = [m for m in marketplaces if m not in {r.marketplace for r in rows}]
+        if unseeded:
+            await self.rebuild(db, unseeded)
+
+    async def _with_orders(self, db, marketplaces: List[str]) -> Set[str]:
+        """Marketplaces among the given ones with at least one order."""
+        rows = await db.query_raw(
+            """
+            SELECT DISTINCT l."marketplace" AS marketplace
+            FROM "Listing" l
+            WHERE l."marketplace" = ANY($1::text[])
+              AND EXISTS (SELECT 1 FROM "Order" o WHERE o."listingId" = l."id")
+            """,
+            marketplaces
+        )
+        return {row['marketplace'] for row in rows}
+
+    async def rebuild(self, db, marketplaces: List[str]) -> Dict[str, MarketplaceStats]:
+        """
+        Recompute totals from the orders table and persist them.
+
+        Completed/cancelled counts and total completion latency are
+        aggregated by the database in a single grouped query.
+
+        Args:
+            db: Database client
+            marketplaces: Marketplaces to rebuild
+
+        Returns:
+            Dictionary mapping marketplace to its rebuilt stats
+        """
+        rows = await db.query_raw(
+            """
+            SELECT
+                l."marketplace" AS marketplace,
+                COUNT(*) FILTER (WHERE o."status" = 'completed') AS completed,
+                COUNT(*) FILTER (WHERE o."status" = 'cancelled') AS cancelled,
+                COALESCE(SUM(
+                    EXTRACT(EPOCH FROM (o."completedAt" - l."createdAt")) / 3600
+                ) FILTER (WHERE o."status" = 'completed'), 0) AS completion_hours
+            FROM "Order" o
+            JOIN "Listing" l ON l."id" = o."listingId"
+            WHERE l."marketplace" = ANY($1::text[])
+            GROUP BY l."marketplace"
+            """,
+            marketplaces
+        )
+        aggregated = {row['marketplace']: row for row in rows}
+
+        rebuilt = {}
+        for marketplace in marketplaces:
+            row = aggregated.get(marketplace)
+            stats = MarketplaceStats(
+                completed=int(row['completed']),
+                cancelled=int(row['cancelled']),
+                completion_hours=float(row['completion_hours']),
+                has_orders=True
+            ) if row else MarketplaceStats()
+
+            await db.marketplaceweight.upsert(
+                where={'marketplace': marketplace},
+                data={
+                    'create': {
+                        'marketplace': marketplace,
+                        'completedCount': stats.completed,
+                        'cancelledCount': stats.cancelled,
+                        'completionHours': stats.completion_hours
+                    },
+                    'update': {
+                        'completedCount': stats.completed,
+                        'cancelledCount': stats.cancelled,
+                        'completionHours': stats.completion_hours
+                    }
+                }
+            )
+            self._store(marketplace, stats)
+            rebuilt[marketplace] = stats
+
+        return rebuilt
+
+    async def record_order_outcome(
+        self,
+        db,
+        marketplace: str,
+        status: str,
+        completion_hours: Optional[float] = None
+    ) -> MarketplaceStats:
+        """
+        Incrementally apply a settled order to the marketplace totals.
+
+        Args:
+            db: Database client
+            marketplace: Marketplace the order was placed on
+            status: New order status ("completed" or "cancelled")
+            completion_hours: Hours from listing to completion, for
+                completed orders
+
+        Returns:
+            Updated stats for the marketplace
+
+        Raises:
+            ValueError: If the status is not a settled status
+        """
+        if status not in SETTLED_STATUSES:
+            raise ValueError(f"Order status '{status}' is not a settled status")
+
+        completed = 1 if status == 'completed' else 0
+        cancelled = 1 if status == 'cancelled' else 0
+        hours = float(completion_hours or 0.0) if completed else 0.0
+
+        rows = await db.query_raw(
+            """
+            INSERT INTO "MarketplaceWeight"
+                ("marketplace", "completedCount", "cancelledCount", "completionHours", "updatedAt")
+            VALUES ($1, $2, $3, $4, NOW())
+            ON CONFLICT ("marketplace") DO UPDATE SET
+                "completedCount" = "MarketplaceWeight"."completedCount" + EXCLUDED."completedCount",
+                "cancelledCount" = "MarketplaceWeight"."cancelledCount" + EXCLUDED."cancelledCount",
+                "completionHours" = "MarketplaceWeight"."completionHours" + EXCLUDED."completionHours",
+                "updatedAt" = NOW()
+            RETURNING "completedCount", "cancelledCount", "completionHours"
+            """,
+            marketplace,
+            completed,
+            cancelled,
+            hours
+        )
+        row = rows[0]
+        stats = MarketplaceStats(
+            completed=int(row['completedCount']),
+            cancelled=int(row['cancelledCount']),
+            completion_hours=float(row['completionHours']),
+            has_orders=True
+        )
+        self._store(marketplace, stats)
+
+        logger.info(
+            f"Recorded {status} order for {marketplace}; "
+            f"weight is now {stats.weight:.3f}"
+        )
+        return stats
+
+
+# Shared by every CrossPlatformSync instance in the process
+weight_table = MarketplaceWeightTable()
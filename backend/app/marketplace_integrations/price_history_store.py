@@ -0,0 +1,321 @@
+"""
+Local time-series store for marketplace price history.
+
+Each (marketplace, item) keeps its daily price points as parallel NumPy
+arrays together with the range of days already fetched, persisted as one
+``.npz`` file per item. A history request only fetches the days the store
+has not covered yet (after a daily run, the new day plus the previous,
+possibly partial one), merges them in and answers with a
+``DailyPriceSeries`` view of the local arrays.
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .price_series import DailyPriceSeries, epoch_days, from_epoch_day, to_epoch_day
+
+logger = logging.getLogger(__name__)
+
+# Fetches daily points ({date, average_price, total_listings}) for an
+# item between two dates, inclusive
+RangeFetcher = Callable[[str, date, date], Awaitable[List[Dict[str, Any]]]]
+
+# Fetches daily points for several items over one date range, keyed by item
+BatchRangeFetcher = Callable[
+    [List[str], date, date], Awaitable[Dict[str, List[Dict[str, Any]]]]
+]
+
+
+@dataclass
+class PriceSeries:
+    """Daily price points for one item plus the days already fetched."""
+    days: np.ndarray  # int32 epoch days, sorted and unique
+    prices: np.ndarray  # float32 average price per day
+    listings: np.ndarray  # int32 listing count per day
+    covered_from: int  # first fetched epoch day
+    covered_to: int  # last fetched epoch day
+
+    @classmethod
+    def empty(cls) -> "PriceSeries":
+        return cls(
+            days=np.array([], dtype=np.int32),
+            prices=np.array([], dtype=np.float32),
+            listings=np.array([], dtype=np.int32),
+            covered_from=0,
+            covered_to=-1
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return self.covered_to < self.covered_from
+
+    def missing_ranges(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Day ranges in [start, end] that still have to be fetched.
+
+        The last covered day is always refetched along with any newer
+        days, since it may have been stored while still partial.
+
+        Args:
+            start: First epoch day of the window
+            end: Last epoch day of the window
+
+        Returns:
+            List of inclusive (first, last) epoch day ranges
+        """
+        if self.is_empty or start > self.covered_to + 1:
+            return [(start, end)]
+        ranges = []
+        if start < self.covered_from:
+            ranges.append((start, self.covered_from - 1))
+        if self.covered_to < end:
+            ranges.append((max(start, self.covered_to), end))
+        elif self.covered_to == end:
+            ranges.append((end, end))
+        return ranges
+
+    def merge(self, first: int, last: int, points: List[Dict[str, Any]]) -> None:
+        """
+        Merge freshly fetched points covering [first, last] into the series.
+
+        Fetched points replace stored points for the same day. A range
+        that does not touch the covered days starts the series over, so
+        the covered range never has holes.
+
+        Args:
+            first: First epoch day that was fetched
+            last: Last epoch day that was fetched
+            points: Daily points with date, average_price and total_listings
+        """
+        new_days = epoch_days(p["date"] for p in points)
+        new_prices = np.array([p["average_price"] for p in points], dtype=np.float32)
+        new_listings = np.array([p.get("total_listings", 0) for p in points], dtype=np.int32)
+
+        if self.is_empty or first > self.covered_to + 1 or last < self.covered_from - 1:
+            fresh = PriceSeries.empty()
+            self.days, self.prices, self.listings = fresh.days, fresh.prices, fresh.listings
+            self.covered_from, self.covered_to = first, last
+        else:
+            self.covered_from = min(self.covered_from, first)
+            self.covered_to = max(self.covered_to, last)
+
+        keep = ~np.isin(self.days, new_days)
+        days = np.concatenate([self.days[keep], new_days])
+        order = np.argsort(days, kind="stable")
+        self.days = days[order]
+        self.prices = np.concatenate([self.prices[keep], new_prices])[order]
+        self.listings = np.concatenate([self.listings[keep], new_listings])[order]
+
+    def window(self, start: int, end: int) -> slice:
+        """Index range of the points within [start, end]."""
+        lo = int(np.searchsorted(self.days, start, side="left"))
+        hi = int(np.searchsorted(self.days, end, side="right"))
+        return slice(lo, hi)
+
+
+class PriceHistoryStore:
+    """Incrementally fetched, locally persisted price histories."""
+
+    def __init__(self, directory: Optional[str] = None, max_cached: int = 10000):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Where series files are kept (default: from env, or a
+                directory in the temp dir); pass "" to keep series in memory
+            max_cached: Number of series kept in memory
+        """
+        if directory is None:
+            directory = os.getenv(
+                "PRICE_HISTORY_DIR",
+                os.path.join(tempfile.gettempdir(), "gfg-price-history")
+            )
+        self.directory = directory
+        self.max_cached = max(1, max_cached)
+        self._series: "OrderedDict[str, PriceSeries]" = OrderedDict()
+        # Dropped once no request holds or waits on them
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+        self.requested_days = 0
+        self.fetched_days = 0
+
+    async def get_history(
+        self,
+        marketplace: str,
+        item_id: str,
+        days: int,
+        fetch: RangeFetcher,
+        today: Optional[date] = None
+    ) -> DailyPriceSeries:
+        """
+        Get an item's daily price history, fetching only uncovered days.
+
+        Args:
+            marketplace: Marketplace the history comes from
+            item_id: Item identifier
+            days: Number of days of history
+            fetch: Coroutine function fetching points for a date range
+            today: Last day of the window (default: today)
+
+        Returns:
+            The item's daily prices within the window
+        """
+        end = to_epoch_day(today or date.today())
+        start = end - days
+        key = f"{marketplace}:{item_id}"
+
+        async with self._lock(key):
+            series = self._get(key)
+            self.requested_days += end - start + 1
+            for first, last in series.missing_ranges(start, end):
+                points = await fetch(item_id, from_epoch_day(first), from_epoch_day(last))
+                series.merge(first, last, points)
+                self.fetched_days += last - first + 1
+                self._save(key, series)
+
+        return self._view(item_id, series, start, end)
+
+    async def get_history_batch(
+        self,
+        marketplace: str,
+        item_ids: List[str],
+        days: int,
+        fetch_batch: BatchRangeFetcher,
+        today: Optional[date] = None
+    ) -> Dict[str, DailyPriceSeries]:
+        """
+        Get several items' price histories, fetching uncovered days together.
+
+        Items missing the same range of days (after a daily run, usually
+        all of them) are fetched with one ``fetch_batch`` call.
+
+        Args:
+            marketplace: Marketplace the histories come from
+            item_ids: Item identifiers
+            days: Number of days of history
+            fetch_batch: Coroutine function fetching points for several
+                items over one date range
+            today: Last day of the window (default: today)
+
+        Returns:
+            Dictionary mapping item ID to its daily prices within the window
+        """
+        end = to_epoch_day(today or date.today())
+        start = end - days
+        keys = {item_id: f"{marketplace}:{item_id}" for item_id in item_ids}
+
+        async with contextlib.AsyncExitStack() as stack:
+            # Sorted acquisition keeps overlapping batches from deadlocking
+            for key in sorted(set(keys.values())):
+                await stack.enter_async_context(self._lock(key))
+
+            series = {item_id: self._get(key) for item_id, key in keys.items()}
+            groups: Dict[Tuple[int, int], List[str]] = {}
+            for item_id, item_series in series.items():
+                self.requested_days += end - start + 1
+                for missing in item_series.missing_ranges(start, end):
+                    groups.setdefault(missing, []).append(item_id)
+
+            for (first, last), group in groups.items():
+                points = await fetch_batch(group, from_epoch_day(first), from_epoch_day(last))
+                for item_id in group:
+                    series[item_id].merge(first, last, points.get(item_id, []))
+                    self.fetched_days += last - first + 1
+                    self._save(keys[item_id], series[item_id])
+
+        return {
+            item_id: self._view(item_id, item_series, start, end)
+            for item_id, item_series in series.items()
+        }
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        """Lock serializing fetches for one series."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _view(item_id: str, series: PriceSeries, start: int, end: int) -> DailyPriceSeries:
+        """Window of a stored series, sharing its arrays."""
+        window = series.window(start, end)
+        return DailyPriceSeries(
+            item_id=item_id,
+            start_day=start,
+            end_day=end,
+            days=series.days[window],
+            prices=series.prices[window],
+            listings=series.listings[window]
+        )
+
+    def _get(self, key: str) -> PriceSeries:
+        """Series for the key from memory, disk, or a new empty one."""
+        series = self._series.get(key)
+        if series is None:
+            series = self._load(key) or PriceSeries.empty()
+            self._series[key] = series
+            while len(self._series) > self.max_cached:
+                self._series.popitem(last=False)
+        self._series.move_to_end(key)
+        return series
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.npz")
+
+    def _load(self, key: str) -> Optional[PriceSeries]:
+        if not self.directory:
+            return None
+        try:
+            with np.load(self._path(key)) as data:
+                return PriceSeries(
+                    days=data["days"],
+                    prices=data["prices"].astype(np.float32),
+                    listings=data["listings"],
+                    covered_from=int(data["covered"][0]),
+                    covered_to=int(data["covered"][1])
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, key: str, series: PriceSeries) -> None:
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    days=series.days,
+                    prices=series.prices,
+                    listings=series.listings,
+                    covered=np.array([series.covered_from, series.covered_to], dtype=np.int32)
+                )
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            # The in-memory series is still correct; the next run refetches
+            logger.error(f"Failed to persist price history for {key}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Days requested versus days actually fetched."""
+        return {
+            "cached_series": len(self._series),
+            "requested_days": self.requested_days,
+            "fetched_days": self.fetched_days
+        }
+
+
+# Shared by every marketplace client in the process
+price_history_store = PriceHistoryStore()
@@ -0,0 +1,241 @@
+"""
+Per-(item, marketplace) competitor price summaries.
+
+Competitor prices from market research are folded into a running summary
+(count, sum, min, max and a quantile sketch) persisted in the
+``CompetitorPriceIndex`` table whenever research is stored. Competitive
+pricing analysis then reads one summary row per marketplace instead of
+scanning every historical research record. An item's first index write
+starts from its research history, so earlier research is never dropped.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from .quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PriceSummary:
+    """Running summary of competitor prices."""
+    count: int = 0
+    total: float = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def add(self, prices: Iterable[float]) -> None:
+        """
+        Fold new prices into the summary.
+
+        Args:
+            prices: Competitor prices to add
+        """
+        for price in prices:
+            price = float(price)
+            self.count += 1
+            self.total += price
+            self.minimum = price if self.minimum is None else min(self.minimum, price)
+            self.maximum = price if self.maximum is None else max(self.maximum, price)
+            self.sketch.update(price)
+
+    def merge(self, other: "PriceSummary") -> "PriceSummary":
+        """
+        Fold another summary (e.g. another marketplace or time window) in.
+
+        Args:
+            other: Summary to merge in (left unchanged)
+
+        Returns:
+            This summary, for chaining
+        """
+        if other.count == 0:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def average(self) -> float:
+        """Mean of all prices added."""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile from the sketch.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimated price at the quantile, or None if empty
+        """
+        return self.sketch.quantile(q)
+
+    def price_point(self) -> Dict[str, Any]:
+        """Summary in the price point format used by pricing analysis."""
+        p10, p50, p90 = self.sketch.quantiles((0.1, 0.5, 0.9))
+        return {
+            'average': self.average,
+            'median': p50,
+            'p10': p10,
+            'p90': p90,
+            'min': self.minimum,
+            'max': self.maximum,
+            'sample_size': self.count
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """Fields for the persisted index row."""
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.minimum,
+            'max': self.maximum,
+            'sketch': self.sketch.to_dict()
+        }
+
+    @classmethod
+    def from_record(cls, record: Any) -> "PriceSummary":
+        """
+        Build a summary from a persisted index row.
+
+        Args:
+            record: CompetitorPriceIndex row
+
+        Returns:
+            PriceSummary with the row's totals
+        """
+        sketch_data = record.sketch or {}
+        if 'compactors' in sketch_data:
+            sketch = QuantileSketch.from_dict(sketch_data)
+        else:
+            # Rows written before sketches held a plain price sample
+            sketch = QuantileSketch()
+            sketch.extend(sketch_data.get('sample', []))
+        return cls(
+            count=record.count,
+            total=record.sum,
+            minimum=record.min,
+            maximum=record.max,
+            sketch=sketch
+        )
+
+
+class CompetitorPriceIndex:
+    """Reads and maintains the persisted competitor price index."""
+
+    async def record(
+        self,
+        db,
+        item_id: str,
+        marketplace: str,
+        prices: Iterable[float]
+    ) -> PriceSummary:
+        """
+        Fold newly researched competitor prices into the index.
+
+        Must run inside a transaction, before the research record holding
+        the prices is stored, so a rebuild from history does not count them
+        twice. Writers for an item are serialized by a transaction-scoped
+        lock, so concurrent research cannot lose updates.
+
+        Args:
+            db: Database client for the open transaction
+            item_id: Item the prices were researched for
+            marketplace: Marketplace the prices were observed on
+            prices: Competitor prices
+
+        Returns:
+            Updated summary for the (item, marketplace) pair
+        """
+        summaries = await self._load_locked(db, item_id)
+        summary = summaries.get(marketplace) or PriceSummary()
+        summary.add(prices)
+
+        key = {'itemId': item_id, 'marketplace': marketplace}
+        await db.competitorpriceindex.upsert(
+            where={'itemId_marketplace': key},
+            data={
+                'create': {**key, **summary.to_record()},
+                'update': summary.to_record()
+            }
+        )
+        return summary
+
+    async def get(self, db, item_id: str) -> Dict[str, PriceSummary]:
+        """
+        Get competitor price summaries for an item.
+
+        Items researched before the index existed are backfilled from
+        their research history on first read.
+
+        Args:
+            db: Database client
+            item_id: Item to look up
+
+        Returns:
+            Dictionary mapping marketplace to its price summary
+        """
+        rows = await db.competitorpriceindex.find_many(
+            where={'itemId': item_id}
+        )
+        if rows:
+            return {row.marketplace: PriceSummary.from_record(row) for row in rows}
+        async with db.tx() as transaction:
+            return await self._load_locked(transaction, item_id)
+
+    async def _load_locked(self, db, item_id: str) -> Dict[str, PriceSummary]:
+        """Lock an item's index and read it, rebuilding it if it has no rows."""
+        await db.query_raw(
+            "SELECT pg_advisory_xact_lock(hashtext($1))",
+            f"CompetitorPriceIndex:{item_id}"
+        )
+        rows = await db.competitorpriceindex.find_many(
+            where={'itemId': item_id}
+        )
+        if rows:
+            return {row.marketplace: PriceSummary.from_record(row) for row in rows}
+        return await self.rebuild(db, item_id)
+
+    async def rebuild(self, db, item_id: str) -> Dict[str, PriceSummary]:
+        """
+        Recompute an item's summaries from its stored research records.
+
+        Args:
+            db: Database client
+            item_id: Item to rebuild
+
+        Returns:
+            Dictionary mapping marketplace to its rebuilt price summary
+        """
+        listings = await db.listing.find_many(
+            where={'itemId': item_id},
+            include={'marketResearch': True}
+        )
+
+        summaries: Dict[str, PriceSummary] = {}
+        for listing in listings:
+            for research in listing.marketResearch or []:
+                if research.competitorPrices:
+                    prices = research.competitorPrices.get('prices', [])
+                    summaries.setdefault(listing.marketplace, PriceSummary()).add(prices)
+
+        for marketplace, summary in summaries.items():
+            key = {'itemId': item_id, 'marketplace': marketplace}
+            await db.competitorpriceindex.upsert(
+                where={'itemId_marketplace': key},
+                data={
+                    'create': {**key, **summary.to_record()},
+                    'update': summary.to_record()
+                }
+            )
+
+        if summaries:
+            logger.info(f"Rebuilt competitor price index for item {item_id}")
+        return summaries
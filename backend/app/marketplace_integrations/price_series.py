@@ -0,0 +1,141 @@
+"""
+Compact daily price series.
+
+Price history moves between the marketplace client, research jobs and
+analytics as ``DailyPriceSeries``: three parallel arrays (int32 epoch days,
+float32 prices, int32 listing counts) instead of one dict per day. The
+per-day JSON format, with dates as ISO datetimes at midnight, is produced
+only at the API edge by ``to_dict``, and ``from_dict`` reads it back
+without loss.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+
+
+def to_epoch_day(value: date) -> int:
+    """Days since 1970-01-01."""
+    return (value - EPOCH).days
+
+
+def from_epoch_day(day: int) -> date:
+    """Date for a day count since 1970-01-01."""
+    return EPOCH + timedelta(days=int(day))
+
+
+def to_iso_datetime(day: int) -> str:
+    """ISO datetime at midnight for a day count since 1970-01-01."""
+    return datetime.combine(from_epoch_day(day), time.min).isoformat()
+
+
+def epoch_days(dates: Iterable[str]) -> np.ndarray:
+    """Parse ISO dates (or datetimes) into int32 epoch days."""
+    return np.array(
+        [np.datetime64(value[:10], "D") for value in dates],
+        dtype="datetime64[D]"
+    ).astype(np.int32)
+
+
+@dataclass(frozen=True, eq=False)
+class DailyPriceSeries:
+    """Daily average prices and listing counts for one item."""
+    item_id: str
+    start_day: int  # first epoch day of the requested window
+    end_day: int  # last epoch day of the requested window
+    days: np.ndarray  # int32 epoch days, sorted and unique
+    prices: np.ndarray  # float32 average price per day
+    listings: np.ndarray  # int32 listing count per day
+
+    @classmethod
+    def from_arrays(
+        cls,
+        item_id: str,
+        start_day: int,
+        end_day: int,
+        days: Any,
+        prices: Any,
+        listings: Any
+    ) -> "DailyPriceSeries":
+        """
+        Build a series, casting the columns to their compact dtypes.
+
+        Args:
+            item_id: Item identifier
+            start_day: First epoch day of the window
+            end_day: Last epoch day of the window
+            days: Epoch day of each point
+            prices: Average price of each point
+            listings: Listing count of each point
+
+        Returns:
+            DailyPriceSeries
+        """
+        return cls(
+            item_id=item_id,
+            start_day=int(start_day),
+            end_day=int(end_day),
+            days=np.asarray(days, dtype=np.int32),
+            prices=np.asarray(prices, dtype=np.float32),
+            listings=np.asarray(listings, dtype=np.int32)
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DailyPriceSeries":
+        """
+        Read the per-day JSON format produced by ``to_dict``.
+
+        Args:
+            data: Dict with item_id, start_date, end_date and daily_prices
+
+        Returns:
+            DailyPriceSeries
+        """
+        points = data.get("daily_prices", [])
+        return cls.from_arrays(
+            item_id=data["item_id"],
+            start_day=epoch_days([data["start_date"]])[0],
+            end_day=epoch_days([data["end_date"]])[0],
+            days=epoch_days(p["date"] for p in points),
+            prices=[p["average_price"] for p in points],
+            listings=[p.get("total_listings", 0) for p in points]
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns."""
+        return self.days.nbytes + self.prices.nbytes + self.listings.nbytes
+
+    def average_price(self) -> Optional[float]:
+        """Mean of the daily average prices, or None if there are no points."""
+        if len(self) == 0:
+            return None
+        return float(self.prices.mean(dtype=np.float64))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to the per-day JSON format served by the API.
+
+        Prices are written with the shortest decimal that round-trips
+        through float32, so ``from_dict`` restores the same series.
+
+        Returns:
+            Dict with item_id, start_date, end_date and daily_prices
+        """
+        dates = self.days.astype("datetime64[D]").astype("datetime64[s]").astype(str)
+        prices = self.prices.astype(str).astype(np.float64).tolist()
+        return {
+            "item_id": self.item_id,
+            "start_date": to_iso_datetime(self.start_day),
+            "end_date": to_iso_datetime(self.end_day),
+            "daily_prices": [
+                {"date": day, "average_price": price, "total_listings": count}
+                for day, price, count in zip(dates.tolist(), prices, self.listings.tolist())
+            ]
+        }
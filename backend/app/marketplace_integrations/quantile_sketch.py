@@ -0,0 +1,191 @@
+"""
+Mergeable streaming quantile sketch for marketplace price statistics.
+
+Implements a KLL-style sketch: values enter a level-0 compactor, and full
+compactors are sorted and halved into the next level, where each retained
+value stands for twice as many inputs. Memory stays bounded by roughly
+``3k`` values regardless of how many prices are added, and two sketches
+merge level by level, so summaries from different marketplaces or time
+windows can be combined without the original prices.
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_K = 200  # Accuracy parameter; rank error is roughly 1.65 / k
+
+
+class QuantileSketch:
+    """KLL-style quantile sketch with deterministic compaction."""
+
+    def __init__(self, k: int = DEFAULT_K):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            k: Capacity of the top compactor; larger is more accurate
+        """
+        self.k = k
+        self.count = 0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self._compactors: List[List[float]] = [[]]
+        # Alternating offsets keep compaction unbiased without randomness
+        self._offsets: List[int] = [0]
+
+    def __len__(self) -> int:
+        """Number of inputs summarized by the sketch."""
+        return self.count
+
+    @property
+    def retained(self) -> int:
+        """Number of values currently stored."""
+        return sum(len(compactor) for compactor in self._compactors)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _max_retained(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self._compactors)))
+
+    def update(self, value: float) -> None:
+        """
+        Add a value to the sketch.
+
+        Args:
+            value: Value to add
+        """
+        value = float(value)
+        self.count += 1
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self._compactors[0].append(value)
+        if self.retained >= self._max_retained():
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        """
+        Add many values to the sketch.
+
+        Args:
+            values: Values to add
+        """
+        for value in values:
+            self.update(value)
+
+    def _compress(self) -> None:
+        for level in range(len(self._compactors)):
+            compactor = self._compactors[level]
+            if len(compactor) < self._capacity(level):
+                continue
+            if level + 1 == len(self._compactors):
+                self._compactors.append([])
+                self._offsets.append(0)
+
+            compactor.sort()
+            # An odd leftover stays behind at this level
+            leftover = [compactor.pop()] if len(compactor) % 2 else []
+            offset = self._offsets[level]
+            self._offsets[level] ^= 1
+            self._compactors[level + 1].extend(compactor[offset::2])
+            self._compactors[level] = leftover
+
+            if self.retained < self._max_retained():
+                break
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other: Sketch to merge in (left unchanged)
+
+        Returns:
+            This sketch, for chaining
+        """
+        if other.count == 0:
+            return self
+        while len(self._compactors) < len(other._compactors):
+            self._compactors.append([])
+            self._offsets.append(0)
+        for level, compactor in enumerate(other._compactors):
+            self._compactors[level].extend(compactor)
+        self.count += other.count
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        while self.retained >= self._max_retained():
+            self._compress()
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the value at a quantile.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            Estimated value, or None if the sketch is empty
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.minimum
+        if q >= 1:
+            return self.maximum
+
+        weighted = sorted(
+            (value, 1 << level)
+            for level, compactor in enumerate(self._compactors)
+            for value in compactor
+        )
+        total = sum(weight for _, weight in weighted)
+        target = q * total
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative > target:
+                return value
+        return weighted[-1][0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """
+        Estimate several quantiles.
+
+        Args:
+            qs: Quantiles in [0, 1]
+
+        Returns:
+            Estimated values in the same order
+        """
+        return [self.quantile(q) for q in qs]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the sketch for JSON storage."""
+        return {
+            'k': self.k,
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum,
+            'compactors': self._compactors,
+            'offsets': self._offsets
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        """
+        Restore a sketch serialized with ``to_dict``.
+
+        Args:
+            data: Serialized sketch
+
+        Returns:
+            Restored QuantileSketch
+        """
+        sketch = cls(k=data.get('k', DEFAULT_K))
+        sketch.count = data.get('count', 0)
+        sketch.minimum = data.get('min')
+        sketch.maximum = data.get('max')
+        sketch._compactors = [list(c) for c in data.get('compactors', [[]])] or [[]]
+        sketch._offsets = list(data.get('offsets', [0] * len(sketch._compactors)))
+        return sketch
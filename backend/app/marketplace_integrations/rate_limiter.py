@@ -0,0 +1,482 @@
+"""
+Per-marketplace request scheduling for marketplace API calls.
+
+Every marketplace gets a concurrency limit (semaphore) and a request rate
+limit (token bucket). Client methods decorated with ``rate_limited`` wait
+for both before calling the platform, and the scheduler records how long
+calls spent queued so saturation is visible in platform status.
+
+Calls also pass through the marketplace's circuit breaker: failures are
+retried with backoff, and while the circuit is open calls fail fast, or are
+parked in a retry queue and replayed on recovery if they are deferrable.
+Deferrable calls carry a key (method and target) and a version, so a queued
+write is dropped once a newer write to the same target succeeds.
+"""
+import asyncio
+import functools
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .circuit_breaker import (
+    CLOSED,
+    NON_TRIPPING_ERRORS,
+    OPEN,
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    DeferredCall,
+    RetryQueue,
+)
+from .exceptions import CallDeferredError, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitConfig:
+    """Concurrency and request rate limits for a marketplace."""
+    max_concurrency: int = 4
+    requests_per_second: float = 2.0
+    burst: int = 4
+
+    @classmethod
+    def from_env(cls, marketplace: str, default: "RateLimitConfig") -> "RateLimitConfig":
+        """
+        Build a config from environment variables, falling back to defaults.
+
+        Reads ``<MARKETPLACE>_MAX_CONCURRENCY``, ``<MARKETPLACE>_REQUESTS_PER_SECOND``
+        and ``<MARKETPLACE>_BURST``.
+
+        Args:
+            marketplace: Marketplace name (e.g., ebay)
+            default: Config used for variables that are not set
+
+        Returns:
+            RateLimitConfig for the marketplace
+        """
+        prefix = marketplace.upper()
+        return cls(
+            max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", default.max_concurrency)),
+            requests_per_second=float(
+                os.getenv(f"{prefix}_REQUESTS_PER_SECOND", default.requests_per_second)
+            ),
+            burst=int(os.getenv(f"{prefix}_BURST", default.burst)),
+        )
+
+
+DEFAULT_RATE_LIMITS: Dict[str, RateLimitConfig] = {
+    "ebay": RateLimitConfig(max_concurrency=8, requests_per_second=5.0, burst=10),
+}
+
+
+class TokenBucket:
+    """Async token bucket limiting the rate of acquisitions."""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initialize the bucket full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _MarketplaceLimiter:
+    """Semaphore, token bucket and wait-time metrics for one marketplace."""
+
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.bucket = TokenBucket(config.requests_per_second, config.burst)
+        self.requests = 0
+        self.queued = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.config.max_concurrency,
+            "requests_per_second": self.config.requests_per_second,
+            "requests": self.requests,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "avg_wait_seconds": self.total_wait / self.requests if self.requests else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+
+class MarketplaceScheduler:
+    """Shared scheduler applying per-marketplace concurrency and rate limits."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, RateLimitConfig]] = None,
+        breakers: Optional[Dict[str, CircuitBreakerConfig]] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            limits: Per-marketplace configs (default: DEFAULT_RATE_LIMITS
+                with environment overrides)
+            breakers: Per-marketplace circuit breaker configs (default:
+                CircuitBreakerConfig with environment overrides)
+        """
+        self._configs = dict(limits or {})
+        self._limiters: Dict[str, _MarketplaceLimiter] = {}
+        self._breaker_configs = dict(breakers or {})
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._retry_queues: Dict[str, RetryQueue] = {}
+        self._versions = itertools.count(1)
+
+    def configure(self, marketplace: str, config: RateLimitConfig) -> None:
+        """
+        Set the limits for a marketplace, replacing any existing limiter.
+
+        Args:
+            marketplace: Marketplace name
+            config: New limits
+        """
+        self._configs[marketplace] = config
+        self._limiters.pop(marketplace, None)
+
+    def _limiter(self, marketplace: str) -> _MarketplaceLimiter:
+        limiter = self._limiters.get(marketplace)
+        if limiter is None:
+            config = self._configs.get(marketplace) or RateLimitConfig.from_env(
+                marketplace,
+                DEFAULT_RATE_LIMITS.get(marketplace, RateLimitConfig())
+            )
+            limiter = self._limiters[marketplace] = _MarketplaceLimiter(config)
+        return limiter
+
+    def breaker(self, marketplace: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker for a marketplace.
+
+        Args:
+            marketplace: Marketplace name
+
+        Returns:
+            CircuitBreaker for the marketplace
+        """
+        breaker = self._breakers.get(marketplace)
+        if breaker is None:
+            config = self._breaker_configs.get(marketplace) or CircuitBreakerConfig.from_env(
+                marketplace
+            )
+            breaker = self._breakers[marketplace] = CircuitBreaker(marketplace, config)
+        return breaker
+
+    def _retry_queue(self, marketplace: str) -> RetryQueue:
+        queue = self._retry_queues.get(marketplace)
+        if queue is None:
+            queue = self._retry_queues[marketplace] = RetryQueue(
+                self.breaker(marketplace).config.retry_queue_size
+            )
+        return queue
+
+    async def run(
+        self,
+        marketplace: str,
+        call: Callable[[], Any],
+        retry: bool = True,
+        deferrable: bool = False,
+        defer_key: Optional[Tuple[str, Any]] = None
+    ) -> Any:
+        """
+        Run a marketplace call through the circuit breaker and limits.
+
+        Failed calls are retried with backoff while the circuit stays
+        closed. Once it opens, calls are rejected without waiting.
+
+        Args:
+            marketplace: Marketplace the call is made against
+            call: Zero-argument callable returning an awaitable
+            retry: Whether failures may be retried (False for calls that
+                are not safe to repeat)
+            deferrable: Whether a rejected or failed call may be queued and
+                replayed once the circuit closes
+            defer_key: Method and target of a deferrable write; only the
+                latest write per key is queued, and a successful write
+                supersedes older queued ones (default: unique to the call)
+
+        Returns:
+            Result of the call
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            CallDeferredError: If the call was queued for replay instead
+        """
+        breaker = self.breaker(marketplace)
+        version = next(self._versions)
+        if not deferrable:
+            defer_key = None
+        else:
+            defer_key = defer_key or ("call", version)
+            await self._await_replay(marketplace, [defer_key])
+        max_retries = breaker.config.max_retries if retry else 0
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._defer(marketplace, call, defer_key, version)
+                raise CircuitOpenError(
+                    f"Circuit for {marketplace} is open; "
+                    f"retry in {breaker.snapshot()['retry_in_seconds']:.1f}s"
+                )
+            try:
+                result = await self._run_limited(marketplace, call)
+            except NON_TRIPPING_ERRORS:
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                if attempt >= max_retries or breaker.state != CLOSED:
+                    self._defer(marketplace, call, defer_key, version)
+                    raise
+                delay = breaker.backoff(attempt)
+                attempt += 1
+                logger.warning(
+                    f"{marketplace} call failed ({str(e)}); "
+                    f"retry {attempt}/{max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            except BaseException:
+                breaker.release_probe()
+                raise
+            else:
+                if defer_key is not None:
+                    self.supersede(marketplace, [defer_key], version)
+                if breaker.record_success():
+                    self._start_replay(marketplace)
+                return result
+
+    async def begin_write(self, marketplace: str, keys: List[Tuple[str, Any]]) -> int:
+        """
+        Version a direct write covering several deferrable targets.
+
+        For writes made outside ``run``'s deferral, such as a bulk call
+        covering many listings. Waits for any replay of the same targets
+        to land first; pass the version to ``supersede`` once the write
+        succeeds.
+
+        Args:
+            marketplace: Marketplace the write goes to
+            keys: Method and target of each write covered
+
+        Returns:
+            Version of the write
+        """
+        version = next(self._versions)
+        await self._await_replay(marketplace, keys)
+        return version
+
+    def supersede(
+        self,
+        marketplace: str,
+        keys: List[Tuple[str, Any]],
+        version: int
+    ) -> None:
+        """
+        Drop queued writes made stale by a newer successful write.
+
+        Args:
+            marketplace: Marketplace the write went to
+            keys: Method and target of each write covered
+            version: Version of the successful write
+        """
+        queue = self._retry_queues.get(marketplace)
+        if queue is not None:
+            for key in keys:
+                queue.supersede(key, version)
+
+    async def _await_replay(self, marketplace: str, keys: List[Tuple[str, Any]]) -> None:
+        """Let an older replayed write to any of the targets land first."""
+        queue = self._retry_queue(marketplace)
+        if queue.replaying is not None and queue.replaying.key in keys:
+            await queue.replay_done.wait()
+
+    async def _run_limited(self, marketplace: str, call: Callable[[], Any]) -> Any:
+        """Run a call once a concurrency slot and a token are free."""
+        limiter = self._limiter(marketplace)
+        queued_at = time.monotonic()
+        limiter.queued += 1
+        dequeued = False
+        try:
+            async with limiter.semaphore:
+                await limiter.bucket.acquire()
+                wait = time.monotonic() - queued_at
+                limiter.queued -= 1
+                dequeued = True
+                limiter.requests += 1
+                limiter.total_wait += wait
+                limiter.max_wait = max(limiter.max_wait, wait)
+                limiter.in_flight += 1
+                try:
+                    return await call()
+                finally:
+                    limiter.in_flight -= 1
+        finally:
+            if not dequeued:
+                limiter.queued -= 1
+
+    def _defer(
+        self,
+        marketplace: str,
+        call: Callable[[], Any],
+        defer_key: Optional[Tuple[str, Any]],
+        version: int
+    ) -> None:
+        """Queue a deferrable call for replay, raising CallDeferredError if queued."""
+        if defer_key is None:
+            return
+        method, target = defer_key
+        entry = self._retry_queue(marketplace).push(
+            DeferredCall(method=method, target=target, call=call, version=version)
+        )
+        if entry is None:
+            logger.warning(f"Retry queue for {marketplace} is full; dropping call")
+            return
+        self._start_replay(marketplace)
+        raise CallDeferredError(
+            f"{marketplace} is unavailable; call queued for retry",
+            deferred=[entry]
+        )
+
+    def _start_replay(self, marketplace: str) -> None:
+        queue = self._retry_queues.get(marketplace)
+        if queue and (queue.replay_task is None or queue.replay_task.done()):
+            queue.replay_task = asyncio.create_task(self._replay(marketplace))
+
+    async def _replay(self, marketplace: str) -> None:
+        """
+        Replay queued calls in order once the circuit lets them through.
+
+        The first replayed call after the reset timeout acts as the probe.
+        Calls that fail while the circuit is open again go back to the front
+        of the queue; calls that fail with the circuit closed are dropped.
+        Callbacks registered on a call run only once it has been replayed.
+        """
+        breaker = self.breaker(marketplace)
+        queue = self._retry_queue(marketplace)
+        while queue.calls:
+            if breaker.state == OPEN:
+                await asyncio.sleep(max(0.0, breaker.retry_at - time.monotonic()))
+            entry = queue.pop()
+            try:
+                await self.run(marketplace, entry.call)
+            except CircuitOpenError:
+                queue.finish(entry, requeue=True)
+                await asyncio.sleep(breaker.config.base_backoff)
+            except Exception as e:
+                requeue = breaker.state != CLOSED and not isinstance(e, NON_TRIPPING_ERRORS)
+                queue.finish(entry, requeue=requeue)
+                if not requeue:
+                    queue.dropped += 1
+                    logger.error(f"Dropping queued {marketplace} call: {str(e)}")
+            except BaseException:
+                queue.finish(entry, requeue=True)
+                raise
+            else:
+                queue.replayed += 1
+                queue.finish(entry)
+                await entry.replayed()
+
+    async def close(self) -> None:
+        """Stop replaying queued calls."""
+        drainers = [
+            queue.replay_task for queue in self._retry_queues.values()
+            if queue.replay_task is not None and not queue.replay_task.done()
+        ]
+        for drainer in drainers:
+            drainer.cancel()
+        await asyncio.gather(*drainers, return_exceptions=True)
+
+    def get_breaker_state(self, marketplace: str) -> Dict[str, Any]:
+        """
+        Get circuit breaker state and retry queue metrics.
+
+        Args:
+            marketplace: Marketplace to report on
+
+        Returns:
+            Breaker state with a ``retry_queue`` entry
+        """
+        return {
+            **self.breaker(marketplace).snapshot(),
+            "retry_queue": self._retry_queue(marketplace).metrics(),
+        }
+
+    def get_metrics(self, marketplace: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get queueing metrics.
+
+        Args:
+            marketplace: Marketplace to report on (default: all)
+
+        Returns:
+            Metrics for the marketplace, or a mapping of marketplace to metrics
+        """
+        if marketplace is not None:
+            return self._limiter(marketplace).metrics()
+        return {name: limiter.metrics() for name, limiter in self._limiters.items()}
+
+
+# Shared by every marketplace client in the process
+scheduler = MarketplaceScheduler()
+
+
+def rate_limited(
+    func: Optional[Callable] = None,
+    *,
+    retry: bool = True,
+    deferrable: bool = False
+) -> Callable:
+    """
+    Route an async client method through the client's marketplace scheduler.
+
+    The decorated method's instance must expose ``marketplace`` and
+    ``scheduler`` attributes. Use ``@rate_limited(retry=False)`` for calls
+    that are not safe to repeat and ``@rate_limited(deferrable=True)`` for
+    writes that may be replayed later when the marketplace is down; their
+    first argument names the target (e.g., the listing ID) so queued writes
+    are coalesced per method and target.
+    """
+    if func is None:
+        return functools.partial(rate_limited, retry=retry, deferrable=deferrable)
+
+    @functools.wraps(func)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        return await self.scheduler.run(
+            self.marketplace,
+            lambda: func(self, *args, **kwargs),
+            retry=retry,
+            deferrable=deferrable,
+            defer_key=(func.__name__, args[0]) if deferrable and args else None
+        )
+    return wrapper
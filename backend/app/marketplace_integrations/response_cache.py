@@ -0,0 +1,186 @@
+"""
+In-process response cache for marketplace API lookups.
+
+Entries are fresh for ``ttl`` seconds. For a further ``stale_ttl``
+seconds they are still served, but a background revalidation fetches the
+replacement. Concurrent requests for the same key share one fetch, the
+cache is bounded by ``max_entries`` with least-recently-used eviction, and
+hit/miss counters are kept for monitoring.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """TTL + stale-while-revalidate LRU cache with request coalescing."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float = 300.0,
+        stale_ttl: float = 900.0,
+        max_entries: int = 1000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            name: Name used in logs and stats
+            ttl: Seconds an entry is served without revalidation
+            stale_ttl: Further seconds a stale entry is served while revalidating
+            max_entries: Maximum number of cached entries
+        """
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(
+        cls,
+        name: str,
+        ttl: float,
+        stale_ttl: float,
+        max_entries: int
+    ) -> "ResponseCache":
+        """
+        Build a cache from environment variables, falling back to defaults.
+
+        Reads ``<NAME>_CACHE_TTL``, ``<NAME>_CACHE_STALE_TTL`` and
+        ``<NAME>_CACHE_MAX_ENTRIES``.
+
+        Args:
+            name: Cache name (e.g., market_data)
+            ttl: Default fresh lifetime in seconds
+            stale_ttl: Default stale-while-revalidate window in seconds
+            max_entries: Default size bound
+
+        Returns:
+            ResponseCache for the name
+        """
+        prefix = name.upper()
+        return cls(
+            name,
+            ttl=float(os.getenv(f"{prefix}_CACHE_TTL", ttl)),
+            stale_ttl=float(os.getenv(f"{prefix}_CACHE_STALE_TTL", stale_ttl)),
+            max_entries=int(os.getenv(f"{prefix}_CACHE_MAX_ENTRIES", max_entries)),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Get a cached value, fetching it on a miss.
+
+        Args:
+            key: Cache key
+            fetch: Coroutine function producing the value
+
+        Returns:
+            Cached or freshly fetched value
+
+        Raises:
+            Exception: Whatever ``fetch`` raises on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._fetch(key, fetch)
+                return value
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        return await asyncio.shield(self._fetch(key, fetch))
+
+    def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start a fetch for the key, or join the one already running."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._do_fetch(key, fetch))
+            # Revalidations have no waiter; failures are counted instead
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _do_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"{self.name} cache fetch failed for {key}: {str(e)}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop a cached entry.
+
+        Args:
+            key: Cache key
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and size for monitoring."""
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'errors': self.errors,
+            'hit_rate': (self.hits + self.stale_hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+
+# Shared by every marketplace request in the process
+market_data_cache = ResponseCache.from_env(
+    "market_data", ttl=300.0, stale_ttl=900.0, max_entries=5000
+)
+price_history_cache = ResponseCache.from_env(
+    "price_history", ttl=3600.0, stale_ttl=6 * 3600.0, max_entries=2000
+)
@@ -0,0 +1,208 @@
+"""
+Shared OAuth token cache for marketplace clients.
+
+Tokens are cached in memory and, when ``MARKETPLACE_TOKEN_CACHE`` names a
+file, in a small JSON file, so every client instance and every worker
+process on the host reuses the same token until it nears expiry. The file
+is only trusted if it is owned by the current user and not writable by
+anyone else; point it into an app-owned directory (mode 0700). A token inside its refresh margin is still served while a
+background task fetches the next one, and concurrent refreshes of the same
+token are single-flighted, so a burst of requests triggers at most one
+auth call per process. Each refresh also schedules the next one, so
+tokens stay fresh even between bursts of traffic.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_MARGIN = 300.0  # Seconds before expiry to refresh in the background
+
+# Returns (access token, lifetime in seconds)
+TokenFetcher = Callable[[], Awaitable[Tuple[str, float]]]
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """An access token and when it expires (epoch seconds)."""
+    access_token: str
+    expires_at: float
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds until the token expires."""
+        return self.expires_at - (time.time() if now is None else now)
+
+
+class TokenCache:
+    """Process- and host-wide cache of marketplace access tokens."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: JSON file shared between workers (default:
+                MARKETPLACE_TOKEN_CACHE); empty keeps tokens in memory only
+            refresh_margin: Seconds before expiry to start a background refresh
+        """
+        if path is None:
+            path = os.getenv("MARKETPLACE_TOKEN_CACHE", "")
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[str, CachedToken] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self.refreshes = 0
+
+    async def get_token(self, key: str, fetch: TokenFetcher) -> CachedToken:
+        """
+        Get a valid token, fetching one only if none is cached.
+
+        Args:
+            key: Cache key (e.g. marketplace and client ID)
+            fetch: Coroutine function requesting a new token
+
+        Returns:
+            A token that has not expired
+
+        Raises:
+            Exception: Whatever ``fetch`` raises when no valid token exists
+        """
+        token = self._tokens.get(key) or self._load(key)
+        if token and token.remaining() > 0:
+            if token.remaining() <= self.refresh_margin:
+                # Serve the current token while the next one is fetched
+                self._refresh(key, fetch)
+            return token
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drop a token, e.g. after the platform rejected it.
+
+        Args:
+            key: Cache key of the token
+        """
+        self._tokens.pop(key, None)
+        self._store(key, None)
+
+    def _refresh(self, key: str, fetch: TokenFetcher) -> asyncio.Task:
+        """Start a refresh for the key, or join the one already running."""
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._do_refresh(key, fetch))
+            # Background refreshes have no waiter; failures are logged instead
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    def _schedule(self, key: str, fetch: TokenFetcher, token: CachedToken) -> None:
+        """Refresh the key again shortly before the new token expires."""
+        timer = self._timers.get(key)
+        if timer and not timer.done() and timer is not asyncio.current_task():
+            timer.cancel()
+
+        async def refresh_later():
+            await asyncio.sleep(max(0.0, token.remaining() - self.refresh_margin))
+            self._timers.pop(key, None)
+            self._refresh(key, fetch)
+
+        self._timers[key] = asyncio.get_running_loop().create_task(refresh_later())
+
+    async def _do_refresh(self, key: str, fetch: TokenFetcher) -> CachedToken:
+        try:
+            # Another worker may have refreshed while we were waiting
+            stored = self._load(key)
+            if stored and stored.remaining() > self.refresh_margin:
+                self._schedule(key, fetch, stored)
+                return stored
+
+            access_token, lifetime = await fetch()
+            token = CachedToken(access_token, time.time() + lifetime)
+            self.refreshes += 1
+            self._tokens[key] = token
+            self._store(key, token)
+            self._schedule(key, fetch, token)
+            logger.info(f"Refreshed access token for {key}")
+            return token
+        except Exception as e:
+            logger.error(f"Token refresh failed for {key}: {str(e)}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _read_entries(self) -> Dict[str, Any]:
+        """Read the shared file, ignoring it unless only this user can write it."""
+        try:
+            fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        except OSError:
+            return {}
+        with os.fdopen(fd) as f:
+            info = os.fstat(fd)
+            if info.st_uid != os.geteuid() or info.st_mode & 0o022:
+                logger.warning(
+                    f"Ignoring token cache {self.path}: not owned by this user "
+                    f"or writable by others"
+                )
+                return {}
+            try:
+                entries = json.load(f)
+            except ValueError:
+                return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _load(self, key: str) -> Optional[CachedToken]:
+        """Read a token other workers may have stored."""
+        if not self.path:
+            return None
+        entry = self._read_entries().get(key)
+        if not entry:
+            return None
+        token = CachedToken(entry["access_token"], entry["expires_at"])
+        self._tokens[key] = token
+        return token
+
+    def _store(self, key: str, token: Optional[CachedToken]) -> None:
+        """Write a token for other workers, replacing the file atomically."""
+        if not self.path:
+            return
+        try:
+            entries = self._read_entries()
+            if token is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = {
+                    "access_token": token.access_token,
+                    "expires_at": token.expires_at
+                }
+            directory = os.path.dirname(self.path) or "."
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # The in-memory cache still works without the shared file
+            logger.error(f"Failed to persist token cache: {str(e)}")
+
+    async def close(self) -> None:
+        """Cancel background and scheduled refreshes."""
+        tasks = list(self._inflight.values()) + list(self._timers.values())
+        self._inflight, self._timers = {}, {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Shared by every marketplace client in the process
+token_cache = TokenCache()
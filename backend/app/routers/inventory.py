@@ -1,14 +1,90 @@
 """Inventory management router."""
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
 
 from ..db import get_db
 from ..marketplace_integrations.cross_platform_sync import CrossPlatformSync
+from ..marketplace_integrations.exceptions import (
+    OrderAlreadySettledError,
+    OrderNotFoundError,
+)
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 sync_service = CrossPlatformSync()
 
+class StockLevel(BaseModel):
+    """Total stock for a single item."""
+    item_id: str
+    total_stock: int
+
+class BulkStockUpdateRequest(BaseModel):
+    """Request model for bulk stock updates."""
+    items: List[StockLevel]
+
+@router.put("/stock")
+async def update_stock_levels_bulk(
+    request: BulkStockUpdateRequest,
+    db=Depends(get_db)
+) -> Dict[str, Any]:
+    """Update stock levels for many items across all marketplaces.
+    
+    Args:
+        request: Item IDs with their new total stock quantities
+        
+    Returns:
+        Dictionary containing per-item sync results
+    """
+    try:
+        stock_levels = {
+            entry.item_id: entry.total_stock
+            for entry in request.items
+        }
+        
+        # Verify items exist
+        items = await db.item.find_many(
+            where={'id': {'in': list(stock_levels.keys())}}
+        )
+        found = {item.id for item in items}
+        missing = [item_id for item_id in stock_levels if item_id not in found]
+        stock_levels = {
+            item_id: total_stock
+            for item_id, total_stock in stock_levels.items()
+            if item_id in found
+        }
+        
+        # Sync stock across marketplaces
+        sync_result = await sync_service.sync_inventory_bulk(stock_levels)
+        
+        # Update master inventory
+        if stock_levels:
+            await db.execute_raw(
+                """
+                UPDATE "Item" AS i
+                SET "stockQuantity" = v.total_stock,
+                    "lastStockUpdate" = NOW(),
+                    "updatedAt" = NOW()
+                FROM unnest($1::text[], $2::int[]) AS v(id, total_stock)
+                WHERE i."id" = v.id
+                """,
+                list(stock_levels.keys()),
+                list(stock_levels.values())
+            )
+        
+        return {
+            'status': sync_result['status'],
+            'items_updated': len(stock_levels),
+            'missing_items': missing,
+            'sync_results': sync_result
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update stock levels: {str(e)}"
+        )
+
 @router.put("/{item_id}/stock")
 async def update_stock_level(
     item_id: str,
@@ -126,3 +202,36 @@ async def get_stock_level(
             status_code=500,
             detail=f"Failed to get stock level: {str(e)}"
         )
+
+@router.put("/orders/{order_id}/status")
+async def update_order_status(
+    order_id: str,
+    status: str
+) -> Dict[str, Any]:
+    """Settle an order and update marketplace allocation weights.
+    
+    Args:
+        order_id: ID of the order to settle
+        status: New order status ("completed" or "cancelled")
+        
+    Returns:
+        Dictionary containing the marketplace's updated weight
+    """
+    if status not in ('completed', 'cancelled'):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported order status: {status}"
+        )
+        
+    try:
+        return await sync_service.record_order_outcome(order_id, status)
+        
+    except OrderNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except OrderAlreadySettledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update order status: {str(e)}"
+        )
@@ -198,3 +198,13 @@ async def detect_size(image: UploadFile = File(...)) -> Dict:
             status_code=500,
             detail=f"Error detecting size: {str(e)}"
         )
+
+@router.get("/cache-stats")
+async def get_cache_stats() -> Dict:
+    """
+    Report hit/miss counters for the product analysis cache.
+    
+    Returns:
+        Dictionary containing cache counters
+    """
+    return detector.cache.stats()
@@ -9,7 +9,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 from ..services.listing_generation.listing_generator import ListingGenerator, ListingDetails
 from ..marketplace_integrations.base import MarketplaceClient
-from ..marketplace_integrations.ebay_client import EbayClient
+from ..marketplace_integrations.clients import marketplace_clients
 
 router = APIRouter(prefix="/api/listings", tags=["listings"])
 
@@ -43,12 +43,8 @@ async def get_listing_generator() -> ListingGenerator:
 async def get_marketplace_client(marketplace: Optional[str] = "ebay") -> MarketplaceClient:
     """Dependency injection for marketplace client."""
     marketplace = marketplace or "ebay"  # Handle None case
-    if marketplace.lower() == "ebay":
-        # TODO: Get these from environment variables
-        return EbayClient(
-            client_id="development-id",
-            client_secret="development-secret"
-        )
+    if marketplace_clients.supports(marketplace):
+        return marketplace_clients.get(marketplace)
     raise HTTPException(
         status_code=400,
         detail=f"Unsupported marketplace: {marketplace}"
@@ -4,17 +4,19 @@ FastAPI router for marketplace integration endpoints.
 This module provides API endpoints for interacting with various marketplace
 integrations (eBay, Amazon, Etsy, etc.) for market research and pricing data.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
-from ..marketplace_integrations.ebay_client import EbayClient
+from ..marketplace_integrations.clients import marketplace_clients
+from ..marketplace_integrations.response_cache import market_data_cache, price_history_cache
 from ..marketplace_integrations.exceptions import (
     AuthenticationError,
     MarketDataError,
     ParseError,
     HistoricalDataError,
 )
+from ..services.background_jobs.registry import PRIORITY_HIGH, enqueue_market_research
 
 router = APIRouter(prefix="/api/marketplace", tags=["marketplace"])
 
@@ -24,6 +26,11 @@ class MarketDataResponse(BaseModel):
     item_id: str
     results: Dict[str, Any]
 
+class MarketResearchRequest(BaseModel):
+    """Request model for queueing market research."""
+    listing_ids: List[str]
+    days_history: Optional[int] = 30
+
 @router.get("/fetch-data", response_model=MarketDataResponse)
 async def fetch_market_data(
     marketplace: str = Query(..., description="Marketplace to fetch data from (e.g., ebay)"),
@@ -43,22 +50,24 @@ async def fetch_market_data(
         HTTPException: If the marketplace is not supported or if an error occurs
     """
     try:
-        if marketplace.lower() != "ebay":
+        if not marketplace_clients.supports(marketplace):
             raise HTTPException(
                 status_code=400,
                 detail=f"Marketplace '{marketplace}' is not supported. Currently only 'ebay' is supported."
             )
 
-        # Initialize client with development credentials
-        # TODO: Load credentials from environment variables
-        client = EbayClient(client_id="development", client_secret="development")
+        # Shared client created at startup; reuses its token and connections
+        client = marketplace_clients.get(marketplace)
         
-        # Authenticate with the marketplace
-        client.authenticate()
+        async def fetch():
+            await client.ensure_authenticated()
+            raw_data = await client.fetch_market_data(item_id)
+            return client.parse_response(raw_data)
         
-        # Fetch and parse market data
-        raw_data = client.fetch_market_data(item_id)
-        parsed_data = client.parse_response(raw_data)
+        # Market data changes slowly and the dashboard polls the same items
+        parsed_data = await market_data_cache.get_or_fetch(
+            (marketplace.lower(), item_id, None), fetch
+        )
         
         return MarketDataResponse(
             marketplace=marketplace,
@@ -96,26 +105,28 @@ async def get_price_history(
         HTTPException: If the marketplace is not supported or if an error occurs
     """
     try:
-        if marketplace.lower() != "ebay":
+        if not marketplace_clients.supports(marketplace):
             raise HTTPException(
                 status_code=400,
                 detail=f"Marketplace '{marketplace}' is not supported. Currently only 'ebay' is supported."
             )
 
-        # Initialize client with development credentials
-        # TODO: Load credentials from environment variables
-        client = EbayClient(client_id="development", client_secret="development")
+        # Shared client created at startup; reuses its token and connections
+        client = marketplace_clients.get(marketplace)
         
-        # Authenticate with the marketplace
-        client.authenticate()
+        async def fetch():
+            await client.ensure_authenticated()
+            return await client.get_price_history(item_id, days)
         
-        # Fetch historical data
-        history_data = client.get_price_history(item_id, days)
+        history_data = await price_history_cache.get_or_fetch(
+            (marketplace.lower(), item_id, days), fetch
+        )
         
+        # The compact series is expanded to per-day JSON only here
         return MarketDataResponse(
             marketplace=marketplace,
             item_id=item_id,
-            results=history_data
+            results=history_data.to_dict()
         )
         
     except AuthenticationError as e:
@@ -124,3 +135,37 @@ async def get_price_history(
         raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+@router.get("/cache-stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    Report hit/miss counters for the marketplace response caches.
+
+    Returns:
+        Dictionary mapping cache name to its counters
+    """
+    return {
+        "fetch_data": market_data_cache.stats(),
+        "price_history": price_history_cache.stats(),
+    }
+
+@router.post("/research", status_code=202)
+async def queue_market_research(request: MarketResearchRequest) -> Dict[str, Any]:
+    """
+    Queue a market research run for listings on the background job queue.
+
+    Args:
+        request: Listings to research and days of price history to collect
+
+    Returns:
+        Dictionary containing the queued job ID
+    """
+    try:
+        job_id = await enqueue_market_research(
+            request.listing_ids,
+            request.days_history,
+            priority=PRIORITY_HIGH
+        )
+        return {"status": "queued", "job_id": job_id}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue market research: {str(e)}")
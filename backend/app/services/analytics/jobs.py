@@ -7,7 +7,7 @@ and generate daily snapshots for trend analysis.
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from ...db import get_db
 from .analytics_service import AnalyticsService
@@ -90,6 +90,24 @@ async def generate_daily_snapshot() -> None:
         logger.error(f"Failed to generate daily analytics snapshot: {str(e)}")
         raise
 
+def next_snapshot_time(hour: int = 0, minute: int = 0, now: Optional[datetime] = None) -> datetime:
+    """
+    Get the next time the daily snapshot is due.
+    
+    Args:
+        hour: Hour of the day to run (0-23)
+        minute: Minute of the hour to run (0-59)
+        now: Current UTC time (default: now)
+        
+    Returns:
+        Next UTC run time strictly after now
+    """
+    now = now or datetime.utcnow()
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return next_run
+
 async def schedule_daily_snapshot(hour: int = 0, minute: int = 0) -> None:
     """
     Schedule the daily snapshot generation to run at a specific time.
@@ -101,10 +119,7 @@ async def schedule_daily_snapshot(hour: int = 0, minute: int = 0) -> None:
     while True:
         try:
             now = datetime.utcnow()
-            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            
-            if next_run <= now:
-                next_run += timedelta(days=1)
+            next_run = next_snapshot_time(hour, minute, now)
                 
             # Sleep until next scheduled run
             sleep_seconds = (next_run - now).total_seconds()
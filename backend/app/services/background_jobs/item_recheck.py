@@ -1,90 +1,377 @@
 """
 Background job to re-check existing items using the product detector
+
+Items are streamed in id order with keyset pagination, and the last id of
+each finished batch is saved as a checkpoint so an interrupted run resumes
+where it stopped. Each analyzed item records a fingerprint of its image URLs
+and the detector version; items whose fingerprint still matches are skipped.
+
+Stale items flow through a three-stage pipeline connected by bounded
+queues: downloaders sharing one pooled HTTP session, analysis workers
+backed by a bounded thread pool, and a single writer that saves results
+with one bulk UPDATE per batch. Network, detector and database work
+overlap, and the slowest stage sets the pace.
 """
-from typing import List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
 import asyncio
+import hashlib
+import inspect
+import json
 import logging
+import os
 from prisma.client import Prisma
 from ...services.image_processing.product_detector import ProductDetector
 import aiohttp
-import io
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_NAME = "item_recheck"
+
+_DONE = object()  # Queue sentinel marking the end of a stage's input
+
+
+@dataclass(frozen=True)
+class RecheckPipelineConfig:
+    """Stage sizes for the recheck pipeline."""
+    download_concurrency: int = 8
+    analysis_workers: int = 4
+    write_batch_size: int = 50
+    queue_size: int = 32
+    download_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "RecheckPipelineConfig":
+        """
+        Build a config from environment variables, falling back to defaults.
+
+        Reads ``RECHECK_DOWNLOAD_CONCURRENCY``, ``RECHECK_ANALYSIS_WORKERS``,
+        ``RECHECK_WRITE_BATCH_SIZE``, ``RECHECK_QUEUE_SIZE`` and
+        ``RECHECK_DOWNLOAD_TIMEOUT``.
+
+        Returns:
+            RecheckPipelineConfig
+        """
+        return cls(
+            download_concurrency=int(
+                os.getenv("RECHECK_DOWNLOAD_CONCURRENCY", cls.download_concurrency)
+            ),
+            analysis_workers=int(os.getenv("RECHECK_ANALYSIS_WORKERS", cls.analysis_workers)),
+            write_batch_size=int(os.getenv("RECHECK_WRITE_BATCH_SIZE", cls.write_batch_size)),
+            queue_size=int(os.getenv("RECHECK_QUEUE_SIZE", cls.queue_size)),
+            download_timeout=float(
+                os.getenv("RECHECK_DOWNLOAD_TIMEOUT", cls.download_timeout)
+            ),
+        )
+
+
+class _Page:
+    """Items of one keyset page still moving through the pipeline."""
+
+    def __init__(self, last_id: str, remaining: int):
+        self.last_id = last_id
+        self.remaining = remaining
+
+
 class ItemRecheckJob:
     """Background job to re-analyze existing items."""
-    
-    def __init__(self, db: Prisma):
+
+    def __init__(self, db: Prisma, config: Optional[RecheckPipelineConfig] = None):
         self.db = db
         self.detector = ProductDetector()
-        
-    async def recheck_all_items(self, batch_size: int = 10):
-        """Re-analyze all items in batches."""
+        self.config = config or RecheckPipelineConfig.from_env()
+
+    def fingerprint(self, image_urls: List[str]) -> str:
+        """Hash of an item's image URLs and the detector version."""
+        digest = hashlib.sha256(self.detector.version.encode())
+        for url in image_urls:
+            digest.update(b"\0" + url.encode())
+        return digest.hexdigest()
+
+    async def recheck_all_items(self, batch_size: int = 10) -> Dict[str, Any]:
+        """
+        Re-analyze items whose images or detector version changed.
+
+        Resumes after the last checkpointed item if a previous run was
+        interrupted, and clears the checkpoint once every item was seen.
+        The checkpoint only moves past a page once all of its items were
+        written or failed.
+
+        Args:
+            batch_size: Items fetched per keyset page
+
+        Returns:
+            Counts of analyzed, skipped and failed items, and whether the
+            run resumed
+        """
         try:
-            # Get all items with images
-            items = await self.db.item.find_many(
-                where={
-                    'imageUrls': {'not': []}  # Items with non-empty imageUrls
-                }
+            checkpoint = await self.db.jobcheckpoint.find_unique(
+                where={'name': CHECKPOINT_NAME}
             )
-            
-            # Process in batches
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                await self.process_batch(batch)
-                logger.info(f"Processed batch {i//batch_size + 1}")
-                
+            cursor: Optional[str] = checkpoint.lastId if checkpoint else None
+            if cursor:
+                logger.info(
+                    f"Resuming item recheck after item {cursor} "
+                    f"(checkpointed {checkpoint.updatedAt})"
+                )
+            self._summary = {'analyzed': 0, 'skipped': 0, 'failed': 0, 'resumed': cursor is not None}
+            self._pages: Deque[_Page] = deque()
+
+            await self._run_pipeline(cursor, batch_size)
+
+            # Finished: the next run starts from the first item again
+            await self.db.jobcheckpoint.delete_many(where={'name': CHECKPOINT_NAME})
+            logger.info(f"Item recheck finished: {self._summary}")
+            return self._summary
+
         except Exception as e:
             logger.error(f"Error in recheck_all_items: {str(e)}")
             raise
-            
-    async def process_batch(self, items: List):
-        """Process a batch of items concurrently."""
-        tasks = [self.recheck_item(item) for item in items]
-        await asyncio.gather(*tasks)
-        
+
+    async def _run_pipeline(self, cursor: Optional[str], batch_size: int) -> None:
+        """Run the page reader and the three stages until every item is settled."""
+        config = self.config
+        downloads: asyncio.Queue = asyncio.Queue(config.queue_size)
+        analyses: asyncio.Queue = asyncio.Queue(config.queue_size)
+        writes: asyncio.Queue = asyncio.Queue(config.queue_size)
+        executor = ThreadPoolExecutor(
+            max_workers=config.analysis_workers,
+            thread_name_prefix="item-recheck"
+        )
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=config.download_concurrency),
+            timeout=aiohttp.ClientTimeout(total=config.download_timeout)
+        )
+        stage_left = {
+            'download': config.download_concurrency,
+            'analyze': config.analysis_workers,
+        }
+
+        async def finish(stage: str, outbox: asyncio.Queue, consumers: int) -> None:
+            # The last worker out passes end-of-input to the next stage
+            stage_left[stage] -= 1
+            if stage_left[stage] == 0:
+                for _ in range(consumers):
+                    await outbox.put(_DONE)
+
+        async def read_pages() -> None:
+            nonlocal cursor
+            while items := await self.fetch_page(cursor, batch_size):
+                stale = [
+                    item for item in items
+                    if item.analysisFingerprint != self.fingerprint(item.imageUrls)
+                ]
+                self._summary['skipped'] += len(items) - len(stale)
+                page = _Page(items[-1].id, len(stale))
+                self._pages.append(page)
+                for item in stale:
+                    await downloads.put((page, item))
+                cursor = items[-1].id
+            for _ in range(config.download_concurrency):
+                await downloads.put(_DONE)
+
+        async def download_worker() -> None:
+            while (entry := await downloads.get()) is not _DONE:
+                page, item = entry
+                image_data = await self.download(session, item)
+                if image_data is None:
+                    self._settle(page, failed=True)
+                else:
+                    await analyses.put((page, item, image_data))
+            await finish('download', analyses, config.analysis_workers)
+
+        async def analysis_worker() -> None:
+            while (entry := await analyses.get()) is not _DONE:
+                page, item, image_data = entry
+                try:
+                    analysis = await self.analyze(executor, image_data)
+                    update = self.build_update(item, analysis)
+                except Exception as e:
+                    logger.error(f"Error analyzing item {item.id}: {str(e)}")
+                    self._settle(page, failed=True)
+                    continue
+                await writes.put((page, update))
+            await finish('analyze', writes, 1)
+
+        async def write_worker() -> None:
+            done = False
+            while not done:
+                # Take whatever has queued up, so batches grow when the DB is slow
+                batch = [await writes.get()]
+                while len(batch) < config.write_batch_size and not writes.empty():
+                    batch.append(writes.get_nowait())
+                done = batch[-1] is _DONE
+                entries = [entry for entry in batch if entry is not _DONE]
+                if entries:
+                    await self.write_batch([update for _, update in entries])
+                    for page, _ in entries:
+                        self._settle(page)
+                await self._advance_checkpoint()
+
+        tasks = [
+            asyncio.create_task(read_pages()),
+            *(asyncio.create_task(download_worker()) for _ in range(config.download_concurrency)),
+            *(asyncio.create_task(analysis_worker()) for _ in range(config.analysis_workers)),
+            asyncio.create_task(write_worker()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await session.close()
+            executor.shutdown(wait=False)
+
+    def _settle(self, page: _Page, failed: bool = False) -> None:
+        """Mark one item of a page as written or failed."""
+        page.remaining -= 1
+        self._summary['failed' if failed else 'analyzed'] += 1
+
+    async def _advance_checkpoint(self) -> None:
+        """Checkpoint the last id of the leading pages that are fully settled."""
+        last_id = None
+        while self._pages and self._pages[0].remaining == 0:
+            last_id = self._pages.popleft().last_id
+        if last_id is not None:
+            await self.save_checkpoint(last_id)
+            logger.info(f"Item recheck checkpointed at {last_id}: {self._summary}")
+
+    async def fetch_page(self, cursor: Optional[str], batch_size: int) -> List:
+        """Fetch the next items with images after ``cursor`` in id order."""
+        where: Dict[str, Any] = {'imageUrls': {'isEmpty': False}}
+        if cursor:
+            where['id'] = {'gt': cursor}
+        return await self.db.item.find_many(
+            where=where,
+            order={'id': 'asc'},
+            take=batch_size
+        )
+
+    async def save_checkpoint(self, last_id: str) -> None:
+        """Record the last item of a finished batch."""
+        await self.db.jobcheckpoint.upsert(
+            where={'name': CHECKPOINT_NAME},
+            data={
+                'create': {'name': CHECKPOINT_NAME, 'lastId': last_id},
+                'update': {'lastId': last_id}
+            }
+        )
+
+    async def download(self, session: aiohttp.ClientSession, item) -> Optional[bytes]:
+        """Download an item's first image, or return None on failure."""
+        try:
+            async with session.get(item.imageUrls[0]) as response:
+                if response.status != 200:
+                    logger.error(f"Failed to download image for item {item.id}")
+                    return None
+                return await response.read()
+        except Exception as e:
+            logger.error(f"Error downloading image for item {item.id}: {str(e)}")
+            return None
+
+    async def analyze(self, executor: ThreadPoolExecutor, image_data: bytes) -> Dict[str, Any]:
+        """Run the detector, in the executor when its analysis is synchronous."""
+        if inspect.iscoroutinefunction(self.detector.analyze_product):
+            return await self.detector.analyze_product(image_data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.detector.analyze_product, image_data)
+
+    def build_update(self, item, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Map a detector analysis to the item columns it updates.
+
+        The detector reports brand, condition and size only; category and
+        quality columns are left as they are (see ``write_batch``).
+
+        Raises:
+            ValueError: If detection failed, so the item is retried next run
+        """
+        if 'error' in analysis:
+            raise ValueError(f"Detection failed: {analysis['error']}")
+        brands = analysis['brand']['detected_brands']
+        condition = analysis['condition']
+        return {
+            'id': item.id,
+            'detectionScore': analysis['size'].get('confidence'),
+            'categoryConfidence': None,
+            'detectedCategory': None,
+            'detectedBrand': brands[0]['name'] if brands else None,
+            'qualityScore': None,
+            'condition': condition['condition_grade'],
+            'dimensions': analysis['size'],
+            'defects': {
+                'details': condition['condition_details'],
+                'wear_level': condition.get('wear_level')
+            },
+            'analysisFingerprint': self.fingerprint(item.imageUrls),
+            'analyzedAt': datetime.utcnow()
+        }
+
+    async def write_batch(self, updates: List[Dict[str, Any]]) -> None:
+        """
+        Write analysis results for many items with one bulk UPDATE.
+
+        Category and quality columns the detector did not report keep their
+        stored values.
+        """
+        await self.db.execute_raw(
+            """
+            UPDATE "Item" AS i
+            SET "detectionScore" = v.detection_score,
+                "categoryConfidence" = COALESCE(v.category_confidence, i."categoryConfidence"),
+                "detectedCategory" = COALESCE(v.detected_category, i."detectedCategory"),
+                "detectedBrand" = v.detected_brand,
+                "qualityScore" = COALESCE(v.quality_score, i."qualityScore"),
+                "condition" = v.condition,
+                "dimensions" = v.dimensions::jsonb,
+                "defects" = v.defects::jsonb,
+                "analysisFingerprint" = v.fingerprint,
+                "analyzedAt" = v.analyzed_at,
+                "updatedAt" = NOW()
+            FROM unnest(
+                $1::text[], $2::float8[], $3::float8[], $4::text[], $5::text[],
+                $6::float8[], $7::text[], $8::text[], $9::text[], $10::text[],
+                $11::timestamp[]
+            ) AS v(
+                id, detection_score, category_confidence, detected_category,
+                detected_brand, quality_score, condition, dimensions, defects,
+                fingerprint, analyzed_at
+            )
+            WHERE i."id" = v.id
+            """,
+            [u['id'] for u in updates],
+            [u['detectionScore'] for u in updates],
+            [u['categoryConfidence'] for u in updates],
+            [u['detectedCategory'] for u in updates],
+            [u['detectedBrand'] for u in updates],
+            [u['qualityScore'] for u in updates],
+            [u['condition'] for u in updates],
+            [json.dumps(u['dimensions']) for u in updates],
+            [json.dumps(u['defects']) for u in updates],
+            [u['analysisFingerprint'] for u in updates],
+            [u['analyzedAt'] for u in updates]
+        )
+
     async def recheck_item(self, item):
-        """Re-analyze a single item."""
+        """Re-analyze a single item outside the pipeline."""
         try:
-            # Download first image for analysis
             if not item.imageUrls:
                 return
-                
-            image_url = item.imageUrls[0]
+
             async with aiohttp.ClientSession() as session:
-                async with session.get(image_url) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to download image for item {item.id}")
-                        return
-                    image_data = await response.read()
-            
-            # Analyze image
-            analysis = self.detector.analyze_product(image_data)
-            
-            # Update item with new analysis
-            await self.db.item.update(
-                where={'id': item.id},
-                data={
-                    'detectionScore': analysis['product'].get('confidence'),
-                    'categoryConfidence': max(
-                        (cat['confidence'] for cat in analysis['product']['categories']),
-                        default=0.0
-                    ),
-                    'detectedCategory': analysis['product']['categories'][0]['name']
-                    if analysis['product']['categories'] else None,
-                    'detectedBrand': analysis['brand']['detected_brands'][0]['name']
-                    if analysis['brand']['detected_brands'] else None,
-                    'qualityScore': analysis['condition']['quality_score'],
-                    'condition': analysis['condition']['grade'],
-                    'dimensions': analysis['size'],
-                    'defects': {
-                        'details': analysis['condition']['details'],
-                        'wear_level': analysis['condition'].get('wear_level')
-                    }
-                }
-            )
-            
+                image_data = await self.download(session, item)
+            if image_data is None:
+                return
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                analysis = await self.analyze(executor, image_data)
+            await self.write_batch([self.build_update(item, analysis)])
+
             logger.info(f"Successfully re-analyzed item {item.id}")
-            
+
         except Exception as e:
             logger.error(f"Error processing item {item.id}: {str(e)}")
@@ -0,0 +1,262 @@
+"""
+Durable background job queue backed by the ``BackgroundJob`` table.
+
+Jobs are rows with a kind, a JSON payload, a priority and a ``runAt`` time.
+Workers claim them with ``FOR UPDATE SKIP LOCKED`` so any number of worker
+processes can share the table, and every claim takes a lease. A worker that
+dies stops renewing its lease, and the job becomes claimable again once the
+lease expires. Failed jobs are requeued with exponential backoff until they
+run out of attempts.
+"""
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A claimed background job."""
+    id: str
+    kind: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 1  # including the current one
+    max_attempts: int = 3
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Job":
+        payload = row.get("payload") or {}
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            payload=payload,
+            attempts=row["attempts"],
+            max_attempts=row["maxAttempts"]
+        )
+
+
+class JobQueue:
+    """Enqueue, claim and settle jobs in the ``BackgroundJob`` table."""
+
+    def __init__(
+        self,
+        db_factory: Callable[[], Awaitable[Any]],
+        base_retry_delay: float = 30.0,
+        max_retry_delay: float = 3600.0
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            db_factory: Callable returning an awaitable database client
+            base_retry_delay: Seconds before the first retry of a failed job
+            max_retry_delay: Upper bound on the retry delay in seconds
+        """
+        self._db_factory = db_factory
+        self.base_retry_delay = base_retry_delay
+        self.max_retry_delay = max_retry_delay
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        run_at: Optional[datetime] = None,
+        max_attempts: int = 3,
+        dedupe_key: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind: Handler name the job is dispatched to
+            payload: JSON-serializable handler arguments
+            priority: Higher priorities are claimed first
+            run_at: Earliest time the job may run (default: now)
+            max_attempts: Runs allowed before the job is marked failed
+            dedupe_key: If set, the job is skipped while another queued or
+                running job has the same key
+
+        Returns:
+            ID of the new job, or None if it was deduplicated
+        """
+        try:
+            db = await self._db_factory()
+            rows = await db.query_raw(
+                """
+                INSERT INTO "BackgroundJob" (
+                    "id", "kind", "payload", "priority", "status", "attempts",
+                    "maxAttempts", "runAt", "dedupeKey", "createdAt", "updatedAt"
+                )
+                VALUES ($1, $2, $3::jsonb, $4, 'queued', 0, $5,
+                        COALESCE($6::timestamp, NOW()), $7, NOW(), NOW())
+                ON CONFLICT ("dedupeKey") WHERE "status" IN ('queued', 'running')
+                DO NOTHING
+                RETURNING "id"
+                """,
+                str(uuid.uuid4()),
+                kind,
+                json.dumps(payload or {}),
+                priority,
+                max_attempts,
+                run_at,
+                dedupe_key
+            )
+        except Exception as e:
+            logger.error(f"Error enqueueing {kind} job: {str(e)}")
+            raise
+
+        if not rows:
+            logger.info(f"Skipped {kind} job: {dedupe_key} is already queued")
+            return None
+        return rows[0]["id"]
+
+    async def claim(self, worker_id: str, lease_seconds: float, limit: int = 1) -> List[Job]:
+        """
+        Claim runnable jobs, highest priority first.
+
+        Queued jobs that are due and running jobs whose lease has expired
+        are both claimable.
+
+        Args:
+            worker_id: Lease owner recorded on the claimed jobs
+            lease_seconds: How long the claim lasts without renewal
+            limit: Maximum number of jobs to claim
+
+        Returns:
+            Claimed jobs
+        """
+        db = await self._db_factory()
+        rows = await db.query_raw(
+            """
+            UPDATE "BackgroundJob"
+            SET "status" = 'running',
+                "leaseOwner" = $1,
+                "leaseExpiresAt" = NOW() + $2 * INTERVAL '1 second',
+                "attempts" = "attempts" + 1,
+                "updatedAt" = NOW()
+            WHERE "id" IN (
+                SELECT "id" FROM "BackgroundJob"
+                WHERE ("status" = 'queued' AND "runAt" <= NOW())
+                   OR ("status" = 'running' AND "leaseExpiresAt" < NOW())
+                ORDER BY "priority" DESC, "runAt"
+                LIMIT $3
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING "id", "kind", "payload", "attempts", "maxAttempts"
+            """,
+            worker_id,
+            lease_seconds,
+            limit
+        )
+        return [Job.from_row(row) for row in rows]
+
+    async def renew(self, job: Job, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend the lease on a running job.
+
+        Args:
+            job: Job held by the worker
+            worker_id: Lease owner
+            lease_seconds: New lease length from now
+
+        Returns:
+            False if the worker no longer holds the lease
+        """
+        db = await self._db_factory()
+        updated = await db.execute_raw(
+            """
+            UPDATE "BackgroundJob"
+            SET "leaseExpiresAt" = NOW() + $3 * INTERVAL '1 second',
+                "updatedAt" = NOW()
+            WHERE "id" = $1 AND "leaseOwner" = $2 AND "status" = 'running'
+            """,
+            job.id,
+            worker_id,
+            lease_seconds
+        )
+        return updated > 0
+
+    async def complete(self, job: Job, worker_id: str) -> None:
+        """
+        Mark a job as completed.
+
+        Args:
+            job: Job held by the worker
+            worker_id: Lease owner
+        """
+        db = await self._db_factory()
+        await db.execute_raw(
+            """
+            UPDATE "BackgroundJob"
+            SET "status" = 'completed',
+                "leaseOwner" = NULL,
+                "leaseExpiresAt" = NULL,
+                "lastError" = NULL,
+                "updatedAt" = NOW()
+            WHERE "id" = $1 AND "leaseOwner" = $2
+            """,
+            job.id,
+            worker_id
+        )
+
+    async def fail(self, job: Job, worker_id: str, error: str) -> bool:
+        """
+        Record a failed run, requeueing the job if it has attempts left.
+
+        Args:
+            job: Job held by the worker
+            worker_id: Lease owner
+            error: Error message to keep on the job
+
+        Returns:
+            True if the job was requeued
+        """
+        retry = job.attempts < job.max_attempts
+        db = await self._db_factory()
+        await db.execute_raw(
+            """
+            UPDATE "BackgroundJob"
+            SET "status" = $3,
+                "runAt" = NOW() + $4 * INTERVAL '1 second',
+                "leaseOwner" = NULL,
+                "leaseExpiresAt" = NULL,
+                "lastError" = $5,
+                "updatedAt" = NOW()
+            WHERE "id" = $1 AND "leaseOwner" = $2
+            """,
+            job.id,
+            worker_id,
+            QUEUED if retry else FAILED,
+            self.retry_delay(job.attempts) if retry else 0.0,
+            error
+        )
+        return retry
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait before retrying a job that has run ``attempts`` times."""
+        return min(self.max_retry_delay, self.base_retry_delay * 2 ** max(0, attempts - 1))
+
+    async def stats(self) -> Dict[str, int]:
+        """
+        Count jobs per status.
+
+        Returns:
+            Dictionary mapping status to job count
+        """
+        db = await self._db_factory()
+        rows = await db.query_raw(
+            'SELECT "status", COUNT(*)::int AS "count" FROM "BackgroundJob" GROUP BY "status"'
+        )
+        return {row["status"]: row["count"] for row in rows}
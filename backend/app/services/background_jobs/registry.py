@@ -0,0 +1,214 @@
+"""
+Background job kinds and the process-wide queue and worker pool.
+
+Item rechecks, market research runs, catalogue repricing and daily
+analytics snapshots are enqueued here and run by the worker pool instead of
+inline in the request or startup path. The daily snapshot, market research
+sweep and repricing run queue their next run before doing their work.
+
+Extra capacity comes from raising ``JOB_WORKERS`` or from running dedicated
+worker processes with ``python -m app.services.background_jobs.registry``.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from ...db import get_db
+from .job_queue import JobQueue
+from .worker_pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+ITEM_RECHECK = "item_recheck"
+MARKET_RESEARCH = "market_research"
+ANALYTICS_SNAPSHOT = "analytics_snapshot"
+REPRICING = "repricing"
+
+# Interactive work is claimed before bulk maintenance
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+
+async def _run_item_recheck(payload: Dict[str, Any]) -> None:
+    from .item_recheck import ItemRecheckJob
+
+    recheck_job = ItemRecheckJob(await get_db())
+    await recheck_job.recheck_all_items(batch_size=payload.get("batch_size", 10))
+
+
+async def _run_market_research(payload: Dict[str, Any]) -> None:
+    from ...marketplace_integrations.market_research_jobs import run_market_research
+
+    if payload.get("daily"):
+        # Queue the next sweep first, so a failing run doesn't end the chain
+        await enqueue_daily_market_research(payload.get("hour", 0), payload.get("minute", 0))
+
+    item_ids = payload.get("item_ids")
+    if item_ids is None:
+        db = await get_db()
+        listings = await db.listing.find_many(where={'status': 'active'})
+        item_ids = [listing.id for listing in listings]
+    await run_market_research(item_ids, payload.get("days_history", 30))
+
+
+async def _run_repricing(payload: Dict[str, Any]) -> None:
+    from ...marketplace_integrations.pricing_engine import BatchPricingEngine
+
+    if payload.get("daily"):
+        # Queue the next run first, so a failing run doesn't end the chain
+        await enqueue_daily_repricing(payload.get("hour", 0), payload.get("minute", 0))
+    await BatchPricingEngine().run(payload.get("item_ids"))
+
+
+async def _run_analytics_snapshot(payload: Dict[str, Any]) -> None:
+    from ..analytics.jobs import generate_daily_snapshot
+
+    # Queue the next snapshot first, so a failing run doesn't end the chain
+    await enqueue_daily_snapshot(payload.get("hour", 0), payload.get("minute", 0))
+    await generate_daily_snapshot()
+
+
+HANDLERS = {
+    ITEM_RECHECK: _run_item_recheck,
+    MARKET_RESEARCH: _run_market_research,
+    ANALYTICS_SNAPSHOT: _run_analytics_snapshot,
+    REPRICING: _run_repricing,
+}
+
+
+async def enqueue_item_recheck(batch_size: int = 10) -> Optional[str]:
+    """
+    Queue a re-analysis of every item with images.
+
+    Only one recheck is queued or running at a time.
+
+    Args:
+        batch_size: Items analyzed concurrently
+
+    Returns:
+        Job ID, or None if a recheck is already pending
+    """
+    job_id = await job_queue.enqueue(
+        ITEM_RECHECK,
+        {"batch_size": batch_size},
+        priority=PRIORITY_LOW,
+        dedupe_key=ITEM_RECHECK
+    )
+    worker_pool.notify()
+    return job_id
+
+
+async def enqueue_market_research(
+    item_ids: Iterable[str],
+    days_history: Optional[int] = 30,
+    priority: int = PRIORITY_NORMAL
+) -> Optional[str]:
+    """
+    Queue a market research run.
+
+    Args:
+        item_ids: Item identifiers to research
+        days_history: Number of days of price history to collect
+        priority: Claim priority (higher runs first)
+
+    Returns:
+        Job ID
+    """
+    job_id = await job_queue.enqueue(
+        MARKET_RESEARCH,
+        {"item_ids": list(item_ids), "days_history": days_history},
+        priority=priority
+    )
+    worker_pool.notify()
+    return job_id
+
+
+async def enqueue_daily_market_research(hour: int = 2, minute: int = 0) -> Optional[str]:
+    """
+    Queue the next daily market research sweep over all active listings.
+
+    Args:
+        hour: Hour of the day to run (0-23, UTC)
+        minute: Minute of the hour to run (0-59)
+
+    Returns:
+        Job ID, or None if that day's sweep is already queued
+    """
+    from ..analytics.jobs import next_snapshot_time
+
+    run_at = next_snapshot_time(hour, minute)
+    return await job_queue.enqueue(
+        MARKET_RESEARCH,
+        {"daily": True, "hour": hour, "minute": minute},
+        priority=PRIORITY_LOW,
+        run_at=run_at,
+        dedupe_key=f"{MARKET_RESEARCH}:{run_at.date().isoformat()}"
+    )
+
+
+async def enqueue_daily_repricing(hour: int = 4, minute: int = 0) -> Optional[str]:
+    """
+    Queue the next daily repricing of the whole catalogue.
+
+    The default time follows the daily market research sweep, so the run
+    prices against that night's research.
+
+    Args:
+        hour: Hour of the day to run (0-23, UTC)
+        minute: Minute of the hour to run (0-59)
+
+    Returns:
+        Job ID, or None if that day's run is already queued
+    """
+    from ..analytics.jobs import next_snapshot_time
+
+    run_at = next_snapshot_time(hour, minute)
+    return await job_queue.enqueue(
+        REPRICING,
+        {"daily": True, "hour": hour, "minute": minute},
+        priority=PRIORITY_LOW,
+        run_at=run_at,
+        dedupe_key=f"{REPRICING}:{run_at.date().isoformat()}"
+    )
+
+
+async def enqueue_daily_snapshot(hour: int = 0, minute: int = 0) -> Optional[str]:
+    """
+    Queue the next daily analytics snapshot.
+
+    Args:
+        hour: Hour of the day to run (0-23, UTC)
+        minute: Minute of the hour to run (0-59)
+
+    Returns:
+        Job ID, or None if that day's snapshot is already queued
+    """
+    from ..analytics.jobs import next_snapshot_time
+
+    run_at = next_snapshot_time(hour, minute)
+    return await job_queue.enqueue(
+        ANALYTICS_SNAPSHOT,
+        {"hour": hour, "minute": minute},
+        priority=PRIORITY_NORMAL,
+        run_at=run_at,
+        dedupe_key=f"{ANALYTICS_SNAPSHOT}:{run_at.date().isoformat()}"
+    )
+
+
+# Shared by the API process and any standalone workers
+job_queue = JobQueue(get_db)
+worker_pool = WorkerPool(job_queue, HANDLERS)
+
+
+async def run_worker() -> None:
+    """Run the worker pool until cancelled, for dedicated worker processes."""
+    worker_pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker_pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
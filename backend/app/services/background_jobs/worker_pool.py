@@ -0,0 +1,186 @@
+"""
+Worker pool running jobs from the durable job queue.
+
+Each worker claims one job at a time, dispatches it to the handler
+registered for its kind and renews the job's lease while the handler runs.
+Throughput scales with ``JOB_WORKERS`` per process, and with the number of
+processes running a pool against the same database.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .job_queue import Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class WorkerPoolConfig:
+    """Concurrency, lease and polling settings for a worker pool."""
+    concurrency: int = 2
+    lease_seconds: float = 300.0
+    poll_interval: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "WorkerPoolConfig":
+        """
+        Build a config from environment variables, falling back to defaults.
+
+        Reads ``JOB_WORKERS``, ``JOB_LEASE_SECONDS`` and ``JOB_POLL_INTERVAL``.
+
+        Returns:
+            WorkerPoolConfig
+        """
+        return cls(
+            concurrency=int(os.getenv("JOB_WORKERS", cls.concurrency)),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", cls.lease_seconds)),
+            poll_interval=float(os.getenv("JOB_POLL_INTERVAL", cls.poll_interval)),
+        )
+
+
+class WorkerPool:
+    """Runs queued jobs with a fixed number of concurrent workers."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        config: Optional[WorkerPoolConfig] = None
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            queue: Queue to claim jobs from
+            handlers: Mapping of job kind to async handler taking the payload
+            config: Pool settings (default: from environment)
+        """
+        self.queue = queue
+        self.handlers = dict(handlers)
+        self.config = config or WorkerPoolConfig.from_env()
+        self.worker_prefix = f"{socket.gethostname()}:{uuid.uuid4().hex[:8]}"
+        self.processed = 0
+        self.failed = 0
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    def start(self) -> None:
+        """Start the workers in the background."""
+        if self.running:
+            return
+        self._workers = [
+            asyncio.create_task(self._work(f"{self.worker_prefix}:{index}"))
+            for index in range(self.config.concurrency)
+        ]
+        logger.info(f"Started {self.config.concurrency} background job workers")
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was enqueued by this process."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they held are reclaimed when their leases expire."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _work(self, worker_id: str) -> None:
+        """Claim and run jobs until cancelled."""
+        while True:
+            try:
+                jobs = await self.queue.claim(worker_id, self.config.lease_seconds)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to claim jobs: {str(e)}")
+                jobs = []
+            if not jobs:
+                await self._idle()
+                continue
+            for job in jobs:
+                try:
+                    await self.run_job(job, worker_id)
+                except Exception as e:
+                    # The lease runs out and another worker picks the job up
+                    logger.error(f"Worker {worker_id} failed to settle job {job.id}: {str(e)}")
+
+    async def _idle(self) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.config.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run_job(self, job: Job, worker_id: str) -> bool:
+        """
+        Run one claimed job and settle it in the queue.
+
+        Args:
+            job: Claimed job
+            worker_id: Lease owner
+
+        Returns:
+            True if the job completed
+        """
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            error = f"No handler registered for job kind {job.kind}"
+        elif job.attempts > job.max_attempts:
+            # Claimed again after its last lease expired mid-run
+            error = f"Job {job.id} exceeded {job.max_attempts} attempts"
+        else:
+            error = await self._run_with_lease(job, worker_id, handler)
+            if error is None:
+                await self.queue.complete(job, worker_id)
+                self.processed += 1
+                logger.info(f"Completed {job.kind} job {job.id}")
+                return True
+
+        self.failed += 1
+        requeued = await self.queue.fail(job, worker_id, error)
+        logger.error(
+            f"{job.kind} job {job.id} failed on attempt {job.attempts}: {error}"
+            + ("; requeued" if requeued else "")
+        )
+        return False
+
+    async def _run_with_lease(
+        self, job: Job, worker_id: str, handler: JobHandler
+    ) -> Optional[str]:
+        """Run the handler, renewing the lease; returns an error message on failure."""
+        task = asyncio.create_task(handler(job.payload))
+        renew_every = self.config.lease_seconds / 3
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=renew_every)
+                if done:
+                    break
+                try:
+                    renewed = await self.queue.renew(job, worker_id, self.config.lease_seconds)
+                except Exception as e:
+                    logger.error(f"Failed to renew lease on job {job.id}: {str(e)}")
+                    continue
+                if not renewed:
+                    # Another worker reclaimed the job; don't run it twice
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    return "Lease lost while running"
+        except asyncio.CancelledError:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        try:
+            task.result()
+        except Exception as e:
+            return str(e) or type(e).__name__
+        return None
@@ -0,0 +1,169 @@
+"""
+Content-addressed cache of product analysis results.
+
+Results are keyed by the SHA-256 of the image bytes, so the same upload
+hitting several endpoints, or the same photo uploaded twice, is analyzed
+once. A small in-memory LRU sits in front of a directory of JSON files
+shared by every process the same user runs on the host; entries not owned
+by that user, or writable by others, are ignored. Entries live under the
+detector's config version, so changing the detector's features or
+thresholds starts from an empty cache instead of serving stale results.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(image_content: bytes) -> str:
+    """SHA-256 hex digest of the image bytes."""
+    return hashlib.sha256(image_content).hexdigest()
+
+
+def config_version(config: Dict[str, Any]) -> str:
+    """Short stable hash of a JSON-serializable detector config."""
+    encoded = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class AnalysisCache:
+    """Two-tier (memory LRU, then disk) cache of analysis results."""
+
+    def __init__(
+        self,
+        version: str,
+        directory: Optional[str] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            version: Detector config version the entries belong to
+            directory: Root of the disk tier (default: ANALYSIS_CACHE_DIR,
+                or a directory in the user's cache dir); empty disables it
+            max_entries: Results kept in memory (default:
+                ANALYSIS_CACHE_MAX_ENTRIES, or 1024)
+        """
+        if directory is None:
+            directory = os.getenv(
+                "ANALYSIS_CACHE_DIR",
+                os.path.join(
+                    os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+                    "gfg-analysis-cache"
+                )
+            )
+        self.version = version
+        self.directory = os.path.join(directory, version) if directory else ""
+        self.max_entries = max_entries or int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 1024))
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the analysis for an image.
+
+        Args:
+            digest: Content hash of the image
+
+        Returns:
+            Copy of the cached analysis, or None
+        """
+        result = self._entries.get(digest)
+        if result is not None:
+            self._entries.move_to_end(digest)
+            self.memory_hits += 1
+            return copy.deepcopy(result)
+
+        result = self._read(digest)
+        if result is not None:
+            self._remember(digest, result)
+            self.disk_hits += 1
+            return copy.deepcopy(result)
+
+        self.misses += 1
+        return None
+
+    def put(self, digest: str, result: Dict[str, Any]) -> None:
+        """
+        Store the analysis for an image in both tiers.
+
+        Args:
+            digest: Content hash of the image
+            result: JSON-serializable analysis
+        """
+        self._remember(digest, copy.deepcopy(result))
+        self._write(digest, result)
+
+    def clear(self) -> None:
+        """Drop the in-memory tier."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, digest: str, result: Dict[str, Any]) -> None:
+        self._entries[digest] = result
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _read(self, digest: str) -> Optional[Dict[str, Any]]:
+        if not self.directory:
+            return None
+        try:
+            fd = os.open(self._path(digest), os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable analysis cache entry {digest}: {str(e)}")
+            return None
+        with os.fdopen(fd) as f:
+            info = os.fstat(fd)
+            if info.st_uid != os.geteuid() or info.st_mode & 0o022:
+                logger.warning(
+                    f"Ignoring analysis cache entry {digest}: not owned by this user "
+                    f"or writable by others"
+                )
+                return None
+            try:
+                return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable analysis cache entry {digest}: {str(e)}")
+                return None
+
+    def _write(self, digest: str, result: Dict[str, Any]) -> None:
+        if not self.directory:
+            return
+        path = self._path(digest)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".analysis-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            # The memory tier still serves the result
+            logger.error(f"Failed to persist analysis cache entry {digest}: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
@@ -1,17 +1,37 @@
 """
 Product detection service using Google Cloud Vision API.
 """
+import asyncio
+import copy
 import os
+from typing import Dict, List, Optional
 from google.cloud import vision
 import logging
 
+from .analysis_cache import AnalysisCache, config_version, content_hash
+
 logger = logging.getLogger(__name__)
 
+# Vision features requested per image; part of the analysis cache version
+FEATURES = ("label_detection", "object_localization", "logo_detection")
+
+# Images sent in one synchronous batch annotate request (Vision allows 16)
+MAX_IMAGES_PER_REQUEST = int(os.getenv("VISION_MAX_IMAGES_PER_REQUEST", 16))
+
 class ProductDetector:
     """Handles product detection in images using Google Cloud Vision API."""
 
-    def __init__(self):
-        """Initialize the Vision client."""
+    # Bump when analysis output changes so stored results are recomputed
+    version = "1"
+
+    def __init__(self, cache: Optional[AnalysisCache] = None):
+        """
+        Initialize the Vision client.
+
+        Args:
+            cache: Analysis result cache (default: one versioned by this
+                detector's config)
+        """
         try:
             self.client = vision.ImageAnnotatorClient()
             self.vision_enabled = True
@@ -19,6 +39,13 @@ class ProductDetector:
             logger.warning(f"Google Cloud Vision not available: {str(e)}")
             self.vision_enabled = False
             self.client = None
+        self.cache = cache or AnalysisCache(config_version(self.config))
+        self._inflight: Dict[str, asyncio.Future] = {}  # digest -> analysis in progress
+
+    @property
+    def config(self) -> dict:
+        """Settings that change analysis output, used to version cached results."""
+        return {"detector": "vision", "version": self.version, "features": FEATURES}
 
     async def detect_products(self, image_content: bytes):
         """
@@ -30,69 +57,156 @@ class ProductDetector:
         Returns:
             dict: Detection results including labels and object locations
         """
+        return (await self.detect_products_batch([image_content]))[0]
+
+    async def detect_products_batch(self, images: List[bytes]) -> List[dict]:
+        """
+        Detect products in several images with as few Vision calls as possible.
+
+        All features for up to ``MAX_IMAGES_PER_REQUEST`` images go in one
+        annotate request, which runs in a worker thread so the event loop
+        keeps serving other requests.
+
+        Args:
+            images: Raw image contents
+
+        Returns:
+            list: Detection results per image, in input order; a failed
+                image (or request) has an ``error`` entry
+        """
         if not self.vision_enabled:
-            return {
-                'labels': [],
-                'objects': [],
-                'logos': [],
-                'error': 'Google Cloud Vision API not configured'
-            }
+            return [self._empty_detection('Google Cloud Vision API not configured') for _ in images]
+
+        chunks = [
+            images[i:i + MAX_IMAGES_PER_REQUEST]
+            for i in range(0, len(images), MAX_IMAGES_PER_REQUEST)
+        ]
+        results = await asyncio.gather(*(self._annotate(chunk) for chunk in chunks))
+        return [detection for chunk_results in results for detection in chunk_results]
 
+    async def _annotate(self, images: List[bytes]) -> List[dict]:
+        """Send one annotate request for a chunk of images."""
+        features = [vision.Feature(type_=vision.Feature.Type[name.upper()]) for name in FEATURES]
+        requests = [
+            vision.AnnotateImageRequest(image=vision.Image(content=content), features=features)
+            for content in images
+        ]
         try:
-            image = vision.Image(content=image_content)
-
-            # Perform label detection
-            label_response = self.client.label_detection(image=image)
-            labels = label_response.label_annotations
-
-            # Perform object localization
-            object_response = self.client.object_localization(image=image)
-            objects = object_response.localized_object_annotations
-
-            # Perform logo detection
-            logo_response = self.client.logo_detection(image=image)
-            logos = logo_response.logo_annotations
-
-            return {
-                'labels': [
-                    {'description': label.description, 'score': label.score}
-                    for label in labels
-                ],
-                'objects': [
-                    {
-                        'name': obj.name,
-                        'score': obj.score,
-                        'bounds': [[vertex.x, vertex.y] for vertex in obj.bounding_poly.normalized_vertices]
-                    }
-                    for obj in objects
-                ],
-                'logos': [
-                    {'description': logo.description, 'score': logo.score}
-                    for logo in logos
-                ]
-            }
+            response = await asyncio.to_thread(
+                self.client.batch_annotate_images, requests=requests
+            )
         except Exception as e:
             logger.error(f"Error in product detection: {str(e)}")
-            return {
-                'labels': [],
-                'objects': [],
-                'logos': [],
-                'error': str(e)
-            }
+            return [self._empty_detection(str(e)) for _ in images]
+        return [self._parse_annotation(result) for result in response.responses]
+
+    def _parse_annotation(self, result) -> dict:
+        """Convert one image's annotate response into detection results."""
+        if result.error.message:
+            logger.error(f"Error in product detection: {result.error.message}")
+            return self._empty_detection(result.error.message)
+        return {
+            'labels': [
+                {'description': label.description, 'score': label.score}
+                for label in result.label_annotations
+            ],
+            'objects': [
+                {
+                    'name': obj.name,
+                    'score': obj.score,
+                    'bounds': [[vertex.x, vertex.y] for vertex in obj.bounding_poly.normalized_vertices]
+                }
+                for obj in result.localized_object_annotations
+            ],
+            'logos': [
+                {'description': logo.description, 'score': logo.score}
+                for logo in result.logo_annotations
+            ]
+        }
+
+    @staticmethod
+    def _empty_detection(error: str) -> dict:
+        return {
+            'labels': [],
+            'objects': [],
+            'logos': [],
+            'error': error
+        }
 
     async def analyze_product(self, image_content: bytes) -> dict:
         """
         Analyze product details including brand, condition, and size.
 
+        Results are cached by image content, and concurrent requests for
+        the same image share one analysis.
+
         Args:
             image_content (bytes): Raw image content
 
         Returns:
-            dict: Analysis results with brand, condition, and size information
+            dict: Analysis results with brand, condition, and size information,
+                and an ``error`` entry if detection failed
         """
-        # Get detection results
-        detection_results = await self.detect_products(image_content)
+        return (await self.analyze_products([image_content]))[0]
+
+    async def analyze_products(self, images: List[bytes]) -> List[dict]:
+        """
+        Analyze several product images, sharing Vision requests between them.
+
+        Cached images are served from the cache; the rest are detected
+        together in batched annotate requests.
+
+        Args:
+            images: Raw image contents
+
+        Returns:
+            list: Analysis results per image, in input order
+        """
+        digests = [content_hash(content) for content in images]
+        results: Dict[str, dict] = {}
+        pending: Dict[str, asyncio.Future] = {}
+        missing: Dict[str, bytes] = {}
+        for digest, content in zip(digests, images):
+            if digest in results or digest in pending or digest in missing:
+                continue
+            cached = self.cache.get(digest)
+            if cached is not None:
+                results[digest] = cached
+            elif digest in self._inflight:
+                pending[digest] = self._inflight[digest]
+            else:
+                missing[digest] = content
+
+        if missing:
+            task = asyncio.ensure_future(self._analyze_uncached(missing))
+            for digest in missing:
+                self._inflight[digest] = pending[digest] = task
+
+            def release(_):
+                for digest in missing:
+                    if self._inflight.get(digest) is task:
+                        del self._inflight[digest]
+
+            task.add_done_callback(release)
+
+        for digest, future in pending.items():
+            results[digest] = (await asyncio.shield(future))[digest]
+        return [copy.deepcopy(results[digest]) for digest in digests]
+
+    async def _analyze_uncached(self, images: Dict[str, bytes]) -> Dict[str, dict]:
+        """Detect and analyze images by digest, caching results that did not fail."""
+        detections = await self.detect_products_batch(list(images.values()))
+        analyses = {}
+        for digest, detection_results in zip(images, detections):
+            analyses[digest] = self._build_analysis(detection_results)
+            if 'error' in detection_results:
+                analyses[digest]['error'] = detection_results['error']
+            else:
+                self.cache.put(digest, analyses[digest])
+        return analyses
 
+    def _build_analysis(self, detection_results: dict) -> dict:
+        """Derive brand, condition and size from detection results."""
         # Extract brand information from logos and labels
         brand_info = self._extract_brand_info(detection_results)
 
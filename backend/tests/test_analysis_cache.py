@@ -0,0 +1,42 @@
+"""Unit tests for the content-addressed product analysis cache."""
+import os
+
+from app.services.image_processing.analysis_cache import AnalysisCache, content_hash
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    """A fresh cache with the same version reads results from disk."""
+    digest = content_hash(b"image")
+    AnalysisCache("v1", directory=str(tmp_path)).put(digest, {"brand": {"confidence": 0.9}})
+
+    cache = AnalysisCache("v1", directory=str(tmp_path))
+    assert cache.get(digest) == {"brand": {"confidence": 0.9}}
+    assert cache.get(digest) == {"brand": {"confidence": 0.9}}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+    assert AnalysisCache("v2", directory=str(tmp_path)).get(digest) is None
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    """The least recently used entry is evicted from memory only."""
+    cache = AnalysisCache("v1", directory=str(tmp_path), max_entries=2)
+    for name in (b"a", b"b", b"c"):
+        cache.put(content_hash(name), {"name": name.decode()})
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get(content_hash(b"a")) == {"name": "a"}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_entries_writable_by_others_are_ignored(tmp_path):
+    """A disk entry other users could have written is treated as a miss."""
+    digest = content_hash(b"image")
+    cache = AnalysisCache("v1", directory=str(tmp_path))
+    cache.put(digest, {"brand": {"confidence": 0.9}})
+    path = cache._path(digest)
+    assert os.stat(path).st_mode & 0o077 == 0
+
+    os.chmod(path, 0o666)
+
+    assert AnalysisCache("v1", directory=str(tmp_path)).get(digest) is None
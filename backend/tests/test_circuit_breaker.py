@@ -0,0 +1,266 @@
+"""Unit tests for marketplace circuit breaking, retries and deferred calls."""
+import asyncio
+
+import pytest
+
+from app.marketplace_integrations.circuit_breaker import CircuitBreakerConfig
+from app.marketplace_integrations.ebay_client import EbayClient
+from app.marketplace_integrations.exceptions import (
+    CallDeferredError,
+    CircuitOpenError,
+    MarketDataError,
+)
+from app.marketplace_integrations.rate_limiter import (
+    MarketplaceScheduler,
+    RateLimitConfig,
+    rate_limited,
+)
+
+
+def make_scheduler(**overrides):
+    config = dict(
+        failure_threshold=2,
+        reset_timeout=0.05,
+        max_reset_timeout=0.2,
+        max_retries=0,
+        base_backoff=0.001,
+        max_backoff=0.01,
+    )
+    config.update(overrides)
+    return MarketplaceScheduler(
+        {"ebay": RateLimitConfig(max_concurrency=4, requests_per_second=1000.0, burst=100)},
+        {"ebay": CircuitBreakerConfig(**config)},
+    )
+
+
+class FlakyCall:
+    """Call that fails a set number of times before succeeding."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise MarketDataError("eBay unavailable")
+        return "ok"
+
+
+async def test_transient_failures_are_retried():
+    """A call that fails fewer times than max_retries succeeds."""
+    scheduler = make_scheduler(max_retries=2, failure_threshold=5)
+    call = FlakyCall(failures=2)
+
+    assert await scheduler.run("ebay", call) == "ok"
+    assert call.calls == 3
+    assert scheduler.get_breaker_state("ebay")["state"] == "closed"
+
+
+async def test_open_circuit_fails_fast_and_recovers():
+    """After tripping, calls are rejected until a probe succeeds."""
+    scheduler = make_scheduler()
+    call = FlakyCall(failures=2)
+
+    for _ in range(2):
+        with pytest.raises(MarketDataError):
+            await scheduler.run("ebay", call)
+    with pytest.raises(CircuitOpenError):
+        await scheduler.run("ebay", call)
+
+    state = scheduler.get_breaker_state("ebay")
+    assert call.calls == 2
+    assert state["state"] == "open"
+    assert state["rejected"] == 1
+
+    await asyncio.sleep(0.06)
+    assert await scheduler.run("ebay", call) == "ok"
+    assert scheduler.get_breaker_state("ebay")["state"] == "closed"
+
+
+async def test_failed_probe_doubles_reset_timeout():
+    """A probe that fails reopens the circuit for longer."""
+    scheduler = make_scheduler()
+    call = FlakyCall(failures=3)
+
+    for _ in range(2):
+        with pytest.raises(MarketDataError):
+            await scheduler.run("ebay", call)
+    await asyncio.sleep(0.06)
+    with pytest.raises(MarketDataError):
+        await scheduler.run("ebay", call)
+
+    state = scheduler.get_breaker_state("ebay")
+    assert state["state"] == "open"
+    assert state["trips"] == 2
+    assert state["reset_timeout_seconds"] == pytest.approx(0.1)
+
+
+async def test_deferred_calls_replay_after_recovery():
+    """Deferrable calls rejected while open run once the circuit closes."""
+    scheduler = make_scheduler()
+    applied = []
+    healthy = False
+
+    def update(quantity):
+        async def call():
+            if not healthy:
+                raise MarketDataError("eBay unavailable")
+            applied.append(quantity)
+        return call
+
+    for quantity in (1, 2):
+        with pytest.raises(CallDeferredError):
+            await scheduler.run("ebay", update(quantity), deferrable=True)
+    with pytest.raises(CallDeferredError):
+        await scheduler.run("ebay", update(3), deferrable=True)
+    assert scheduler.get_breaker_state("ebay")["retry_queue"]["queued"] == 3
+
+    healthy = True
+    await asyncio.sleep(0.15)
+
+    assert applied == [1, 2, 3]
+    state = scheduler.get_breaker_state("ebay")
+    assert state["state"] == "closed"
+    assert state["retry_queue"]["queued"] == 0
+    assert state["retry_queue"]["replayed"] == 3
+    await scheduler.close()
+
+
+class MockStockClient:
+    """Marketplace client whose stock writes fail while the platform is down."""
+
+    marketplace = "ebay"
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.healthy = False
+        self.remote = {}
+
+    @rate_limited(deferrable=True)
+    async def update_stock(self, listing_id, quantity):
+        if not self.healthy:
+            raise MarketDataError("eBay unavailable")
+        self.remote[listing_id] = quantity
+
+    @rate_limited
+    async def get_stock_level(self, listing_id):
+        if not self.healthy:
+            raise MarketDataError("eBay unavailable")
+        return self.remote.get(listing_id)
+
+
+async def test_deferred_writes_keep_only_the_latest_per_listing():
+    """A second deferred write to a listing replaces the queued one."""
+    scheduler = make_scheduler(failure_threshold=1)
+    client = MockStockClient(scheduler)
+    replayed = []
+
+    for quantity in (5, 7):
+        with pytest.raises(CallDeferredError) as deferred:
+            await client.update_stock("l1", quantity)
+        deferred.value.deferred[0].on_replayed(
+            lambda quantity=quantity: asyncio.sleep(0, replayed.append(quantity))
+        )
+    with pytest.raises(CallDeferredError):
+        await client.update_stock("l2", 1)
+    assert scheduler.get_breaker_state("ebay")["retry_queue"]["queued"] == 2
+
+    client.healthy = True
+    await asyncio.sleep(0.15)
+
+    assert client.remote == {"l1": 7, "l2": 1}
+    assert replayed == [7]
+    assert scheduler.get_breaker_state("ebay")["retry_queue"]["coalesced"] == 1
+    await scheduler.close()
+
+
+async def test_newer_direct_write_supersedes_queued_write():
+    """A queued write is not replayed over a newer write that already succeeded."""
+    scheduler = make_scheduler(failure_threshold=1)
+    client = MockStockClient(scheduler)
+    replayed = []
+
+    with pytest.raises(CallDeferredError) as deferred:
+        await client.update_stock("l1", 5)
+    deferred.value.deferred[0].on_replayed(lambda: asyncio.sleep(0, replayed.append(5)))
+
+    # A read probe closes the circuit before the replay wakes up
+    client.healthy = True
+    scheduler.breaker("ebay").opened_at -= 1
+    assert await client.get_stock_level("l1") is None
+    await client.update_stock("l1", 3)
+    await asyncio.sleep(0.1)
+
+    assert client.remote == {"l1": 3}
+    assert replayed == []
+    state = scheduler.get_breaker_state("ebay")["retry_queue"]
+    assert state["queued"] == 0
+    assert state["superseded"] == 1
+    await scheduler.close()
+
+
+class MockBulkEbayClient(EbayClient):
+    """eBay client whose bulk and single stock writes hit an in-memory platform."""
+
+    stock_batch_size = 2
+
+    def __init__(self, scheduler):
+        super().__init__(client_id="id", client_secret="secret", scheduler=scheduler)
+        self.healthy = True
+        self.remote = {}
+        self.chunks = []
+
+    @rate_limited
+    async def _push_stock_chunk(self, quantities):
+        self.chunks.append(dict(quantities))
+        if not self.healthy:
+            raise MarketDataError("eBay unavailable")
+        self.remote.update(quantities)
+
+    @rate_limited(deferrable=True)
+    async def update_stock(self, listing_id, quantity):
+        if not self.healthy:
+            raise MarketDataError("eBay unavailable")
+        self.remote[listing_id] = quantity
+
+
+async def test_bulk_stock_update_is_chunked_and_supersedes_queued_writes():
+    """Bulk pushes go out per chunk and drop older queued single writes."""
+    scheduler = make_scheduler(failure_threshold=1)
+    client = MockBulkEbayClient(scheduler)
+
+    client.healthy = False
+    with pytest.raises(CallDeferredError):
+        await client.update_stock("l1", 5)
+
+    # A probe closes the circuit before the replay wakes up
+    client.healthy = True
+    scheduler.breaker("ebay").opened_at -= 1
+    await scheduler.run("ebay", lambda: asyncio.sleep(0))
+    results = await client.update_stock_bulk({"l1": 3, "l2": 1, "l3": 2})
+    await asyncio.sleep(0.1)
+
+    assert results == {"l1": None, "l2": None, "l3": None}
+    assert client.chunks == [{"l1": 3, "l2": 1}, {"l3": 2}]
+    assert client.remote == {"l1": 3, "l2": 1, "l3": 2}
+    assert scheduler.get_breaker_state("ebay")["retry_queue"]["superseded"] == 1
+    await scheduler.close()
+
+
+async def test_failed_bulk_chunks_fall_back_to_deferred_single_writes():
+    """Listings in a failed chunk are queued per listing and replayed later."""
+    scheduler = make_scheduler(failure_threshold=1)
+    client = MockBulkEbayClient(scheduler)
+    client.healthy = False
+
+    results = await client.update_stock_bulk({"l1": 3, "l2": 1, "l3": 2})
+
+    assert set(results) == {"l1", "l2", "l3"}
+    assert all(isinstance(result, CallDeferredError) for result in results.values())
+
+    client.healthy = True
+    await asyncio.sleep(0.15)
+
+    assert client.remote == {"l1": 3, "l2": 1, "l3": 2}
+    await scheduler.close()
@@ -0,0 +1,395 @@
+"""Unit tests for cross-platform inventory synchronization."""
+import asyncio
+import contextlib
+import gc
+import time
+import warnings
+
+import pytest
+from types import SimpleNamespace
+
+from app.marketplace_integrations.circuit_breaker import DeferredCall
+from app.marketplace_integrations.cross_platform_sync import CrossPlatformSync
+from app.marketplace_integrations.exceptions import (
+    CallDeferredError,
+    MarketplaceError,
+    OrderAlreadySettledError,
+    OrderNotFoundError,
+)
+from app.marketplace_integrations.listing_writer import ListingWriteBuffer
+from app.marketplace_integrations.marketplace_weights import (
+    MarketplaceStats,
+    MarketplaceWeightTable,
+    performance_weight,
+)
+
+
+class MockModel:
+    """Mock Prisma model client recording calls."""
+
+    def __init__(self, rows=None):
+        self.rows = rows or []
+        self.upserts = []
+
+    async def find_many(self, where=None, **kwargs):
+        wanted = where['marketplace']['in']
+        return [row for row in self.rows if row.marketplace in wanted]
+
+    async def upsert(self, where, data):
+        self.upserts.append((where, data))
+
+
+class MockListingModel:
+    """Mock Prisma listing client."""
+
+    def __init__(self, listings=None):
+        self.listings = listings or []
+        self.queries = []
+
+    async def find_many(self, where=None, **kwargs):
+        self.queries.append(where)
+        return self.listings
+
+
+class MockDB:
+    """Mock database client returning canned raw query rows."""
+
+    def __init__(self, rows=None, persisted=None, listings=None):
+        self.rows = rows or []
+        self.raw_queries = []
+        self.raw_statements = []
+        self.marketplaceweight = MockModel(persisted)
+        self.listing = MockListingModel(listings)
+
+    async def query_raw(self, query, *args):
+        self.raw_queries.append((query, args))
+        return self.rows
+
+    async def execute_raw(self, query, *args):
+        self.raw_statements.append((query, args))
+        return 0
+
+
+class MockMarketplaceClient:
+    """Mock marketplace client recording stock pushes."""
+
+    def __init__(self):
+        self.bulk_updates = []
+        self.ended = []
+
+    async def update_stock_bulk(self, quantities):
+        self.bulk_updates.append(dict(quantities))
+        return dict.fromkeys(quantities)
+
+    async def end_listing(self, listing_id):
+        self.ended.append(listing_id)
+
+
+async def _resolve(value):
+    return value
+
+
+class _Resolving:
+    """Awaitable resolving to a value each time it is awaited, like ``get_db``."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return _resolve(self.value).__await__()
+
+
+@pytest.fixture
+def make_sync():
+    """Create a CrossPlatformSync instance backed by a mock database."""
+    def _make(db):
+        sync = CrossPlatformSync.__new__(CrossPlatformSync)
+        sync.marketplace_clients = {}
+        sync.db = _Resolving(db)
+        sync.weight_table = MarketplaceWeightTable()
+        sync.publish_timeouts = {}
+        sync.listing_writer = ListingWriteBuffer(lambda: _resolve(db))
+        return sync
+    return _make
+
+
+def test_performance_weight_defaults():
+    """Marketplaces without settled orders get the neutral weight."""
+    weight = performance_weight(0, 0, None)
+    assert weight == pytest.approx(0.5 * 0.7 + 0.5 * 0.3)
+    assert MarketplaceStats().weight == 1.0
+
+
+def test_performance_weight_rewards_fast_successful_marketplaces():
+    """Faster and more reliable marketplaces receive a larger weight."""
+    fast = performance_weight(9, 1, 24.0)
+    slow = performance_weight(5, 5, 500.0)
+    assert fast > slow
+    assert performance_weight(0, 10, None) >= 0.1
+
+
+async def test_allocate_inventory_uses_single_grouped_query(make_sync):
+    """Allocation issues one aggregate query for all unseeded marketplaces."""
+    db = MockDB(rows=[
+        {'marketplace': 'ebay', 'completed': 8, 'cancelled': 2, 'completion_hours': 384.0},
+    ])
+    sync = make_sync(db)
+
+    allocations = await sync.allocate_inventory(10, ['ebay', 'etsy'])
+
+    assert len(db.raw_queries) == 1
+    assert db.raw_queries[0][1] == (['ebay', 'etsy'],)
+    assert len(db.marketplaceweight.upserts) == 2
+    assert sum(allocations.values()) == 10
+    assert set(allocations) == {'ebay', 'etsy'}
+
+
+async def test_pending_only_marketplaces_get_neutral_weight(make_sync):
+    """Marketplaces whose orders are all pending weigh 0.5, ones without orders 1.0."""
+    pending_only = {'marketplace': 'ebay', 'completed': 0, 'cancelled': 0, 'completion_hours': 0.0}
+    db = MockDB(rows=[pending_only])
+
+    rebuilt = await MarketplaceWeightTable().get_weights(db, ['ebay', 'etsy'])
+
+    assert rebuilt == {'ebay': pytest.approx(0.5), 'etsy': 1.0}
+
+    persisted = [
+        SimpleNamespace(marketplace=m, completedCount=0, cancelledCount=0, completionHours=0.0)
+        for m in ('ebay', 'etsy')
+    ]
+    db = MockDB(rows=[pending_only], persisted=persisted)
+
+    loaded = await MarketplaceWeightTable().get_weights(db, ['ebay', 'etsy'])
+
+    assert loaded == rebuilt
+    assert db.raw_queries[0][1] == (['ebay', 'etsy'],)
+
+
+async def test_weight_table_serves_cached_weights(make_sync):
+    """Repeated allocations read weights from the cache, not the database."""
+    persisted = [
+        SimpleNamespace(marketplace='ebay', completedCount=3, cancelledCount=1, completionHours=72.0),
+    ]
+    db = MockDB(persisted=persisted)
+    sync = make_sync(db)
+
+    first = await sync.weight_table.get_weights(db, ['ebay'])
+    db.marketplaceweight.rows = []
+    second = await sync.weight_table.get_weights(db, ['ebay'])
+
+    assert first == second
+    assert first['ebay'] == pytest.approx(performance_weight(3, 1, 24.0))
+    assert db.raw_queries == []
+
+
+async def test_record_order_outcome_updates_cache():
+    """Settling an order refreshes the cached stats from the upsert result."""
+    table = MarketplaceWeightTable()
+    db = MockDB(rows=[
+        {'completedCount': 4, 'cancelledCount': 1, 'completionHours': 96.0},
+    ])
+
+    stats = await table.record_order_outcome(db, 'ebay', 'completed', 12.0)
+
+    assert db.raw_queries[0][1] == ('ebay', 1, 0, 12.0)
+    assert stats.completed == 4
+    assert (await table.get_weights(db, ['ebay']))['ebay'] == stats.weight
+
+    with pytest.raises(ValueError):
+        await table.record_order_outcome(db, 'ebay', 'pending')
+
+
+class MockOrderDB(MockDB):
+    """Mock database settling a single order inside transactions."""
+
+    def __init__(self, order):
+        super().__init__(persisted=[
+            SimpleNamespace(marketplace='ebay', completedCount=3, cancelledCount=1, completionHours=72.0),
+        ])
+        self.order = SimpleNamespace(find_unique=self.find_order)
+        self.order_row = order
+        self.transactions = 0
+        self.completed = 3
+
+    async def find_order(self, where, include=None):
+        return self.order_row if where['id'] == self.order_row.id else None
+
+    @contextlib.asynccontextmanager
+    async def tx(self):
+        self.transactions += 1
+        yield self
+
+    async def query_raw(self, query, *args):
+        self.raw_queries.append((query, args))
+        if 'UPDATE "Order"' in query:
+            if self.order_row.status in ('completed', 'cancelled'):
+                return []
+            self.order_row.status = args[1]
+            return [{'completion_hours': 12.0}]
+        self.completed += args[1]
+        return [{'completedCount': self.completed, 'cancelledCount': 1, 'completionHours': 84.0}]
+
+
+async def test_record_order_outcome_counts_each_order_once(make_sync):
+    """Re-settling an order leaves the weights alone; unknown orders are reported."""
+    order = SimpleNamespace(
+        id='o1', status='pending', listing=SimpleNamespace(marketplace='ebay', createdAt=None)
+    )
+    db = MockOrderDB(order)
+    sync = make_sync(db)
+
+    first = await sync.record_order_outcome('o1', 'completed')
+    again = await sync.record_order_outcome('o1', 'completed')
+
+    assert first['changed'] and not again['changed']
+    assert db.completed == 4
+    assert again['weight'] == first['weight']
+    with pytest.raises(OrderAlreadySettledError):
+        await sync.record_order_outcome('o1', 'cancelled')
+    with pytest.raises(OrderNotFoundError):
+        await sync.record_order_outcome('missing', 'completed')
+    assert db.completed == 4
+
+
+async def test_sync_inventory_bulk_coalesces_updates(make_sync):
+    """Bulk sync loads listings once and pushes one batch per marketplace."""
+    listings = [
+        SimpleNamespace(id='l1', itemId='item-1', marketplace='ebay'),
+        SimpleNamespace(id='l2', itemId='item-2', marketplace='ebay'),
+        SimpleNamespace(id='l3', itemId='item-2', marketplace='etsy'),
+    ]
+    persisted = [
+        SimpleNamespace(marketplace='ebay', completedCount=0, cancelledCount=0, completionHours=0.0),
+        SimpleNamespace(marketplace='etsy', completedCount=0, cancelledCount=0, completionHours=0.0),
+    ]
+    db = MockDB(persisted=persisted, listings=listings)
+    sync = make_sync(db)
+    ebay, etsy = MockMarketplaceClient(), MockMarketplaceClient()
+    sync.marketplace_clients = {'ebay': ebay, 'etsy': etsy}
+
+    result = await sync.sync_inventory_bulk({'item-1': 5, 'item-2': 4, 'item-3': 2})
+
+    assert len(db.listing.queries) == 1
+    assert ebay.bulk_updates == [{'l1': 5, 'l2': 2}]
+    assert etsy.bulk_updates == [{'l3': 2}]
+    assert len(db.raw_statements) == 1
+    assert db.raw_statements[0][1][:2] == (['l1', 'l2', 'l3'], [5, 2, 2])
+    assert sync.listing_writer.pending == 0
+    assert result['items']['item-3']['status'] == 'no_active_listings'
+    assert result['listings_updated'] == 3
+
+
+async def test_sync_inventory_bulk_fails_unsupported_marketplaces_per_listing(make_sync):
+    """Listings on unsupported marketplaces fail without a push or a stray coroutine."""
+    listings = [
+        SimpleNamespace(id='l1', itemId='item-1', marketplace='ebay'),
+        SimpleNamespace(id='l2', itemId='item-1', marketplace='etsy'),
+    ]
+    persisted = [
+        SimpleNamespace(marketplace=m, completedCount=0, cancelledCount=0, completionHours=0.0)
+        for m in ('ebay', 'etsy')
+    ]
+    sync = make_sync(MockDB(persisted=persisted, listings=listings))
+    ebay = MockMarketplaceClient()
+    sync.marketplace_clients = {'ebay': ebay}
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        result = await sync.sync_inventory_bulk({'item-1': 4})
+        gc.collect()
+
+    assert ebay.bulk_updates == [{'l1': 2}]
+    listing_results = result['items']['item-1']['listing_results']
+    assert listing_results['l2']['action'] == 'failed'
+    assert 'etsy' in listing_results['l2']['error']
+    assert not [w for w in caught if "never awaited" in str(w.message)]
+
+
+async def test_sync_inventory_bulk_stages_successes_despite_failures(make_sync):
+    """Failed pushes are reported per listing while the rest are persisted."""
+    listings = [
+        SimpleNamespace(id='l1', itemId='item-1', marketplace='ebay'),
+        SimpleNamespace(id='l2', itemId='item-2', marketplace='ebay'),
+        SimpleNamespace(id='l3', itemId='item-2', marketplace='etsy'),
+        SimpleNamespace(id='l4', itemId='item-3', marketplace='etsy'),
+    ]
+    persisted = [
+        SimpleNamespace(marketplace=m, completedCount=0, cancelledCount=0, completionHours=0.0)
+        for m in ('ebay', 'etsy')
+    ]
+    db = MockDB(persisted=persisted, listings=listings)
+    sync = make_sync(db)
+
+    class PartialClient(MockMarketplaceClient):
+        async def update_stock_bulk(self, quantities):
+            results = await super().update_stock_bulk(quantities)
+            results['l2'] = MarketplaceError("listing l2 rejected")
+            return results
+
+    class FailingClient(MockMarketplaceClient):
+        async def update_stock_bulk(self, quantities):
+            raise MarketplaceError("Etsy unavailable")
+
+        async def end_listing(self, listing_id):
+            raise MarketplaceError("Etsy unavailable")
+
+    sync.marketplace_clients = {'ebay': PartialClient(), 'etsy': FailingClient()}
+
+    result = await sync.sync_inventory_bulk({'item-1': 5, 'item-2': 4, 'item-3': 0})
+
+    assert result['status'] == 'partial'
+    assert result['listings_updated'] == 1
+    assert result['listings_failed'] == 3
+    assert result['items']['item-1']['status'] == 'success'
+    assert result['items']['item-2']['status'] == 'partial'
+    assert result['items']['item-3']['listing_results']['l4']['action'] == 'failed'
+    assert len(db.raw_statements) == 1
+    assert db.raw_statements[0][1][:2] == (['l1'], [5])
+
+
+async def test_deferred_stock_update_is_staged_only_when_replayed(make_sync):
+    """The database keeps the old quantity until a queued push lands."""
+    entry = DeferredCall(method='update_stock', target='l1', call=None, version=1)
+
+    class DeferringClient:
+        async def update_stock(self, listing_id, quantity):
+            raise CallDeferredError("eBay is unavailable", deferred=[entry])
+
+    sync = make_sync(MockDB())
+    sync.marketplace_clients = {'ebay': DeferringClient()}
+
+    await sync.update_listing_stock('l1', 5, 'ebay')
+    assert sync.listing_writer.pending == 0
+
+    await entry.replayed()
+    assert sync.listing_writer._quantities['l1'][0] == 5
+    await sync.listing_writer.stop()
+
+
+async def test_create_or_update_listing_publishes_concurrently(make_sync):
+    """Platforms publish in parallel and slow ones time out individually."""
+    class SlowClient:
+        def __init__(self, delay):
+            self.delay = delay
+
+        async def create_listing(self, listing_data):
+            await asyncio.sleep(self.delay)
+            return {"external_id": listing_data["marketplace"] + "-1", "url": None}
+
+    sync = make_sync(MockDB())
+    sync.marketplace_clients = {
+        'ebay': SlowClient(0.05),
+        'etsy': SlowClient(0.05),
+        'amazon': SlowClient(1.0),
+    }
+    sync.publish_timeouts = {'amazon': 0.1}
+
+    start = time.monotonic()
+    result = await sync.create_or_update_listing({'title': 'Jacket'})
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5
+    assert result['succeeded'] == ['ebay', 'etsy']
+    assert result['failed'] == ['amazon']
+    assert result['platform_results']['amazon']['status'] == 'timeout'
+    assert result['platform_results']['ebay']['external_id'] == 'ebay-1'
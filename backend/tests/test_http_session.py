@@ -0,0 +1,53 @@
+"""Unit tests for shared marketplace HTTP sessions and clients."""
+import pytest
+
+from app.marketplace_integrations.clients import MarketplaceClientRegistry
+from app.marketplace_integrations.ebay_client import EbayClient
+from app.marketplace_integrations.http_session import HttpSessionConfig, HttpSessionManager
+
+
+async def test_sessions_are_pooled_per_host():
+    """Clients for the same host share one session with the host's limits."""
+    http = HttpSessionManager(HttpSessionConfig(max_connections=5, max_keepalive_connections=2))
+    http.configure("https://api.example.com", HttpSessionConfig(max_connections=3))
+
+    first = http.get("https://api.ebay.com/sell/inventory/v1")
+    second = http.get("https://api.ebay.com/buy/browse/v1")
+    other = http.get("https://api.example.com")
+
+    assert first is second
+    assert first is not other
+    assert str(first.base_url) == "https://api.ebay.com"
+    assert first._transport._pool._max_connections == 5
+    assert other._transport._pool._max_connections == 3
+    assert http.open_hosts == 2
+
+    await http.close()
+
+    assert first.is_closed and other.is_closed
+    assert http.open_hosts == 0
+    # A closed manager hands out fresh sessions again
+    assert not http.get("https://api.ebay.com").is_closed
+    await http.close()
+
+
+async def test_registry_shares_clients_and_sessions():
+    """The registry builds each client once and injects its session manager."""
+    http = HttpSessionManager()
+    registry = MarketplaceClientRegistry(http=http)
+
+    registry.start()
+    client = registry.get("ebay")
+
+    assert isinstance(client, EbayClient)
+    assert registry.get("EBAY") is client
+    assert registry.all() == {"ebay": client}
+    assert client.http is http
+    assert client.session is http.get(EbayClient.base_url)
+    assert registry.supports("ebay") and not registry.supports("etsy")
+    with pytest.raises(KeyError):
+        registry.get("etsy")
+
+    await registry.close()
+    assert http.open_hosts == 0
+
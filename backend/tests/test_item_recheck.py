@@ -0,0 +1,173 @@
+"""Unit tests for the resumable, pipelined item recheck job."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.background_jobs.item_recheck import ItemRecheckJob, RecheckPipelineConfig
+
+
+class MockItems:
+    """Item accessor serving keyset pages and recording updates."""
+
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: item.id)
+        self.pages = []
+
+    async def find_many(self, where, order, take):
+        after = where.get('id', {}).get('gt')
+        self.pages.append(after)
+        return [item for item in self.items if after is None or item.id > after][:take]
+
+
+class MockCheckpoints:
+    """Checkpoint accessor keeping rows in memory."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def find_unique(self, where):
+        return self.rows.get(where['name'])
+
+    async def upsert(self, where, data):
+        self.rows[where['name']] = SimpleNamespace(
+            lastId=data['update']['lastId'], updatedAt='now'
+        )
+
+    async def delete_many(self, where):
+        self.rows.pop(where['name'], None)
+
+
+def make_job(items, missing=()):
+    db = SimpleNamespace(item=MockItems(items), jobcheckpoint=MockCheckpoints())
+    job = ItemRecheckJob(db, RecheckPipelineConfig(
+        download_concurrency=3, analysis_workers=2, write_batch_size=4, queue_size=2
+    ))
+    job.analyzed = []
+    job.writes = []
+    job.checkpoints = []
+
+    async def download(session, item):
+        await asyncio.sleep(0)
+        return None if item.id in missing else item.imageUrls[0].encode()
+
+    async def analyze(executor, image_data):
+        return {'image': image_data}
+
+    def build_update(item, analysis):
+        job.analyzed.append(item.id)
+        return {'item': item, 'fingerprint': job.fingerprint(item.imageUrls)}
+
+    async def write_batch(updates):
+        job.writes.append(len(updates))
+        for update in updates:
+            update['item'].analysisFingerprint = update['fingerprint']
+
+    save_checkpoint = job.save_checkpoint
+
+    async def record_checkpoint(last_id):
+        job.checkpoints.append(last_id)
+        await save_checkpoint(last_id)
+
+    job.download = download
+    job.analyze = analyze
+    job.build_update = build_update
+    job.write_batch = write_batch
+    job.save_checkpoint = record_checkpoint
+    return job
+
+
+def make_items(count):
+    return [
+        SimpleNamespace(id=f"item-{i:02d}", imageUrls=[f"https://img/{i}.jpg"], analysisFingerprint=None)
+        for i in range(count)
+    ]
+
+
+async def test_unchanged_items_are_skipped():
+    """A second run only re-analyzes items whose images changed."""
+    items = make_items(5)
+    job = make_job(items)
+
+    first = await job.recheck_all_items(batch_size=2)
+    items[3].imageUrls = ["https://img/new.jpg"]
+    job.analyzed = []
+    second = await job.recheck_all_items(batch_size=2)
+
+    assert first == {'analyzed': 5, 'skipped': 0, 'failed': 0, 'resumed': False}
+    assert second == {'analyzed': 1, 'skipped': 4, 'failed': 0, 'resumed': False}
+    assert job.analyzed == ["item-03"]
+    assert job.db.item.pages[:4] == [None, "item-01", "item-03", "item-04"]
+    assert job.db.jobcheckpoint.rows == {}
+
+
+async def test_detector_version_change_reanalyzes_everything():
+    """Bumping the detector version invalidates every fingerprint."""
+    items = make_items(3)
+    job = make_job(items)
+    await job.recheck_all_items(batch_size=2)
+
+    job.detector.version = "2"
+    job.analyzed = []
+    summary = await job.recheck_all_items(batch_size=2)
+
+    assert summary['analyzed'] == 3
+
+
+async def test_interrupted_run_resumes_from_checkpoint():
+    """A run with a saved checkpoint continues after the checkpointed item."""
+    items = make_items(6)
+    job = make_job(items)
+    job.db.jobcheckpoint.rows['item_recheck'] = SimpleNamespace(lastId="item-03", updatedAt="then")
+
+    summary = await job.recheck_all_items(batch_size=2)
+
+    assert summary == {'analyzed': 2, 'skipped': 0, 'failed': 0, 'resumed': True}
+    assert sorted(job.analyzed) == ["item-04", "item-05"]
+    assert job.db.item.pages[0] == "item-03"
+
+
+async def test_pipeline_batches_writes_and_checkpoints_in_order():
+    """Results are written in bulk and the checkpoint never skips unsettled items."""
+    items = make_items(10)
+    job = make_job(items, missing={"item-02"})
+
+    summary = await job.recheck_all_items(batch_size=3)
+
+    assert summary == {'analyzed': 9, 'skipped': 0, 'failed': 1, 'resumed': False}
+    assert sum(job.writes) == 9
+    assert max(job.writes) <= 4
+    assert job.checkpoints == sorted(job.checkpoints)
+    assert job.checkpoints[-1] == "item-09"
+    assert job.db.jobcheckpoint.rows == {}
+    assert items[2].analysisFingerprint is None
+
+
+def test_build_update_maps_detector_analysis():
+    """The real detector output maps onto the item columns without errors."""
+    job = ItemRecheckJob(SimpleNamespace(), RecheckPipelineConfig())
+    item = make_items(1)[0]
+    analysis = job.detector._build_analysis({
+        'labels': [],
+        'logos': [{'description': 'Acme', 'score': 0.8}],
+        'objects': [{
+            'name': 'Shoe',
+            'score': 0.7,
+            'bounds': [(0.1, 0.1), (0.5, 0.1), (0.5, 0.6), (0.1, 0.6)]
+        }]
+    })
+
+    update = job.build_update(item, analysis)
+
+    assert update['detectedBrand'] == 'Acme'
+    assert update['detectionScore'] == 0.7
+    assert update['condition'] == 'Good'
+    assert update['dimensions']['dimensions']['width'] == 40.0
+    assert update['defects']['wear_level'] == 'Light'
+    assert update['detectedCategory'] is None
+    assert update['analysisFingerprint'] == job.fingerprint(item.imageUrls)
+
+    failed = job.detector._build_analysis({'labels': [], 'objects': [], 'logos': []})
+    failed['error'] = 'Vision unavailable'
+    with pytest.raises(ValueError):
+        job.build_update(item, failed)
@@ -0,0 +1,174 @@
+"""Unit tests for the durable job queue and worker pool."""
+import asyncio
+
+import pytest
+
+from app.services.background_jobs.job_queue import Job, JobQueue
+from app.services.background_jobs.worker_pool import WorkerPool, WorkerPoolConfig
+
+
+class MemoryQueue:
+    """In-memory stand-in for JobQueue recording settled jobs."""
+
+    def __init__(self, jobs=(), renew_ok=True):
+        self.pending = list(jobs)
+        self.renew_ok = renew_ok
+        self.renewals = 0
+        self.completed = []
+        self.failed = []
+
+    async def claim(self, worker_id, lease_seconds, limit=1):
+        claimed, self.pending = self.pending[:limit], self.pending[limit:]
+        return claimed
+
+    async def renew(self, job, worker_id, lease_seconds):
+        self.renewals += 1
+        return self.renew_ok
+
+    async def complete(self, job, worker_id):
+        self.completed.append(job.id)
+
+    async def fail(self, job, worker_id, error):
+        self.failed.append((job.id, error))
+        return job.attempts < job.max_attempts
+
+
+class MockDB:
+    """Mock database client returning canned rows for raw queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def query_raw(self, query, *args):
+        self.queries.append((query, args))
+        return self.rows
+
+
+def make_pool(queue, handlers, **config):
+    settings = dict(concurrency=2, lease_seconds=30.0, poll_interval=0.01)
+    settings.update(config)
+    return WorkerPool(queue, handlers, WorkerPoolConfig(**settings))
+
+
+async def test_workers_run_jobs_concurrently():
+    """Jobs are spread across the configured number of workers."""
+    running = 0
+    peak = 0
+
+    async def handler(payload):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    queue = MemoryQueue([Job(id=f"job-{i}", kind="work") for i in range(4)])
+    pool = make_pool(queue, {"work": handler})
+    pool.start()
+    await asyncio.sleep(0.1)
+    await pool.stop()
+
+    assert sorted(queue.completed) == ["job-0", "job-1", "job-2", "job-3"]
+    assert peak == 2
+    assert pool.processed == 4
+
+
+async def test_failed_job_is_requeued_until_attempts_run_out():
+    """Handler errors are recorded and the job is requeued while attempts remain."""
+    async def handler(payload):
+        raise RuntimeError("detector offline")
+
+    pool = make_pool(MemoryQueue(), {"work": handler})
+    queue = pool.queue
+
+    assert not await pool.run_job(Job(id="a", kind="work", attempts=1), "w")
+    assert not await pool.run_job(Job(id="b", kind="work", attempts=3), "w")
+    assert not await pool.run_job(Job(id="c", kind="unknown"), "w")
+
+    assert queue.failed[0] == ("a", "detector offline")
+    assert queue.failed[2][1] == "No handler registered for job kind unknown"
+    assert pool.failed == 3
+
+
+async def test_lost_lease_cancels_the_handler():
+    """A job reclaimed by another worker stops running here."""
+    cancelled = asyncio.Event()
+
+    async def handler(payload):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    queue = MemoryQueue(renew_ok=False)
+    pool = make_pool(queue, {"work": handler}, lease_seconds=0.03)
+
+    assert not await pool.run_job(Job(id="a", kind="work"), "w")
+    assert cancelled.is_set()
+    assert queue.failed == [("a", "Lease lost while running")]
+
+
+async def test_enqueue_reports_deduplicated_jobs():
+    """An enqueue skipped by the dedupe key returns None."""
+    async def factory():
+        return db
+
+    db = MockDB([{"id": "job-1"}])
+    queue = JobQueue(factory)
+    assert await queue.enqueue("item_recheck", {"batch_size": 10}, dedupe_key="item_recheck") == "job-1"
+    assert db.queries[0][1][2] == '{"batch_size": 10}'
+
+    db.rows = []
+    assert await queue.enqueue("item_recheck", dedupe_key="item_recheck") is None
+    assert queue.retry_delay(1) == 30.0
+    assert queue.retry_delay(20) == 3600.0
+
+
+async def test_snapshot_chain_survives_a_failed_run(monkeypatch):
+    """The next snapshot is queued even when this one fails."""
+    from app.services.analytics import jobs
+    from app.services.background_jobs import registry
+
+    queued = []
+
+    async def enqueue(hour, minute):
+        queued.append((hour, minute))
+
+    async def generate():
+        raise RuntimeError("analytics store offline")
+
+    monkeypatch.setattr(registry, "enqueue_daily_snapshot", enqueue)
+    monkeypatch.setattr(jobs, "generate_daily_snapshot", generate)
+
+    with pytest.raises(RuntimeError):
+        await registry.HANDLERS[registry.ANALYTICS_SNAPSHOT]({"hour": 3, "minute": 0})
+
+    assert queued == [(3, 0)]
+
+
+async def test_repricing_chain_survives_a_failed_run(monkeypatch):
+    """The daily repricing run queues the next one and reprices the catalogue."""
+    from app.marketplace_integrations import pricing_engine
+    from app.services.background_jobs import registry
+
+    queued = []
+    repriced = []
+
+    async def enqueue(hour, minute):
+        queued.append((hour, minute))
+
+    class FailingEngine:
+        async def run(self, item_ids=None):
+            repriced.append(item_ids)
+            raise RuntimeError("database offline")
+
+    monkeypatch.setattr(registry, "enqueue_daily_repricing", enqueue)
+    monkeypatch.setattr(pricing_engine, "BatchPricingEngine", FailingEngine)
+
+    with pytest.raises(RuntimeError):
+        await registry.HANDLERS[registry.REPRICING]({"daily": True, "hour": 4, "minute": 0})
+
+    assert queued == [(4, 0)]
+    assert repriced == [None]
@@ -0,0 +1,75 @@
+"""Unit tests for the listing write-behind buffer."""
+import pytest
+
+from app.marketplace_integrations.listing_writer import ListingWriteBuffer
+
+
+class MockDB:
+    """Mock database client recording raw statements."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.statements = []
+
+    async def execute_raw(self, query, *args):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.statements.append((query, args))
+        return 0
+
+
+def make_buffer(db, **kwargs):
+    async def factory():
+        return db
+    return ListingWriteBuffer(factory, **kwargs)
+
+
+async def test_flush_coalesces_changes_per_listing():
+    """Repeated changes to a listing collapse into one row per flush."""
+    db = MockDB()
+    buffer = make_buffer(db)
+
+    await buffer.stage_quantity('l1', 5)
+    await buffer.stage_quantity('l1', 3)
+    await buffer.stage_quantity('l2', 7)
+    await buffer.stage_quantity('l3', 1)
+    await buffer.stage_ended('l3')
+
+    assert await buffer.flush() == 3
+    await buffer.stop()
+
+    assert len(db.statements) == 2
+    quantity_args = db.statements[0][1]
+    assert quantity_args[0] == ['l1', 'l2']
+    assert quantity_args[1] == [3, 7]
+    assert db.statements[1][1][0] == ['l3']
+
+
+async def test_size_threshold_triggers_flush():
+    """Reaching max_pending flushes without waiting for the tick."""
+    db = MockDB()
+    buffer = make_buffer(db, flush_interval=60, max_pending=2)
+
+    await buffer.stage_quantity('l1', 1)
+    assert db.statements == []
+    await buffer.stage_quantity('l2', 2)
+
+    assert len(db.statements) == 1
+    assert buffer.pending == 0
+    await buffer.stop()
+
+
+async def test_failed_flush_keeps_changes_for_retry():
+    """Changes survive a failed flush and are written on stop."""
+    db = MockDB(fail=True)
+    buffer = make_buffer(db, flush_interval=60)
+
+    await buffer.stage_quantity('l1', 4)
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+    assert buffer.pending == 1
+
+    db.fail = False
+    await buffer.stop()
+    assert buffer.pending == 0
+    assert db.statements[0][1][:2] == (['l1'], [4])
@@ -0,0 +1,408 @@
+"""Unit tests for marketplace research jobs."""
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.marketplace_integrations.exceptions import MarketDataError
+from app.marketplace_integrations.market_research_jobs import MarketResearchJob
+from app.marketplace_integrations.marketplace_client import MarketplaceClient
+
+
+class MockEbayClient(MarketplaceClient):
+    """Mock eBay client with a fixed per-call latency and default batching."""
+
+    def __init__(self, delay=0.02, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def authenticate(self):
+        pass
+
+    async def _call(self):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+    async def fetch_market_data(self, item_id):
+        await self._call()
+        if item_id in self.failing:
+            raise MarketDataError(f"no data for {item_id}")
+        return {"listings": [{"price": 10.0}, {"price": 20.0}], "total_listings": 2}
+
+    def parse_response(self, response_data):
+        prices = [listing["price"] for listing in response_data["listings"]]
+        return {"average_price": sum(prices) / len(prices)}
+
+    async def get_price_history(self, item_id, days=30):
+        await self._call()
+        return {"item_id": item_id, "daily_prices": []}
+
+
+@pytest.fixture
+def job():
+    """Create a MarketResearchJob with a mock marketplace client."""
+    research_job = MarketResearchJob.__new__(MarketResearchJob)
+    research_job.ebay_client = MockEbayClient()
+    research_job.last_run_stats = {}
+    return research_job
+
+
+async def test_collect_market_data_runs_items_concurrently(job):
+    """Items are researched in parallel up to the concurrency bound."""
+    item_ids = [f"item-{i}" for i in range(8)]
+
+    results = await job.collect_market_data(
+        item_ids, days_history=7, concurrency=2, batch_size=2
+    )
+
+    assert set(results) == set(item_ids)
+    assert results["item-0"]["current_data"]["average_price"] == 15.0
+    # Two batches of two items, each fetching data and history together
+    assert job.ebay_client.peak == 8
+    assert job.last_run_stats["items"] == 8
+    assert job.last_run_stats["items_per_second"] > 0
+
+
+async def test_collect_market_data_streams_results(job):
+    """Each result is handed to the callback, including per-item errors."""
+    job.ebay_client.failing = {"item-1"}
+    received = {}
+
+    async def on_result(item_id, result):
+        received[item_id] = result
+
+    await job.collect_market_data(
+        ["item-0", "item-1", "item-2"],
+        days_history=None,
+        on_result=on_result
+    )
+
+    assert set(received) == {"item-0", "item-1", "item-2"}
+    assert "error" in received["item-1"]
+    assert received["item-2"]["price_history"] is None
+    assert job.last_run_stats["errors"] == 1
+
+
+async def test_iter_market_data_stops_workers_on_early_exit(job):
+    """Abandoning the stream cancels outstanding research."""
+    stream = job.iter_market_data(
+        (f"item-{i}" for i in range(100)),
+        days_history=None,
+        concurrency=2
+    )
+
+    async for item_id, result in stream:
+        break
+    await stream.aclose()
+    await asyncio.sleep(0.05)
+
+    assert job.ebay_client.in_flight == 0
+    assert job.last_run_stats["items"] == 1
+
+
+async def test_ebay_batches_pack_identifiers_into_few_calls():
+    """The eBay client sends batch_size identifiers per upstream call."""
+    from app.marketplace_integrations.ebay_client import EbayClient
+    from app.marketplace_integrations.price_history_store import PriceHistoryStore
+
+    client = EbayClient(
+        client_id="id", client_secret="secret", history_store=PriceHistoryStore(directory="")
+    )
+    market_calls, history_calls = [], []
+    fetch_market, fetch_history = client._fetch_market_data_chunk, client._fetch_price_history_chunk
+
+    async def counting_market(ids):
+        market_calls.append(len(ids))
+        return await fetch_market(ids)
+
+    async def counting_history(ids, start, end):
+        history_calls.append(len(ids))
+        return await fetch_history(ids, start, end)
+
+    client._fetch_market_data_chunk = counting_market
+    client._fetch_price_history_chunk = counting_history
+    item_ids = [f"item-{i}" for i in range(45)]
+
+    current = await client.fetch_market_data_batch(item_ids)
+    histories = await client.get_price_history_batch(item_ids, days=30)
+
+    assert sorted(market_calls) == [5, 20, 20]
+    assert sorted(history_calls) == [5, 20, 20]
+    assert current["item-44"]["item_id"] == "item-44"
+    assert len(histories["item-44"]) == 31
+
+
+async def test_update_analytics_from_stream_counts_outcomes(monkeypatch):
+    """Errored research is skipped and failed updates are counted."""
+    from app.marketplace_integrations import market_research_jobs
+
+    updated = []
+
+    async def fake_update(listing_id, market_data):
+        if listing_id == "bad":
+            raise RuntimeError("write failed")
+        updated.append(listing_id)
+
+    monkeypatch.setattr(market_research_jobs, "update_analytics_data", fake_update)
+
+    async def stream():
+        yield "ok", {"current_data": {}}
+        yield "missing", {"error": "no data"}
+        yield "bad", {"current_data": {}}
+
+    summary = await market_research_jobs.update_analytics_from_stream(stream())
+
+    assert summary == {"updated": 1, "skipped": 1, "failed": 1}
+    assert updated == ["ok"]
+
+
+def test_analyze_price_points_matches_per_item_polyfit():
+    """Vectorized trends agree with a per-item polyfit and R-squared."""
+    from app.marketplace_integrations.market_research_jobs import analyze_price_points
+
+    rng = np.random.default_rng(7)
+    item_ids, prices, days = [], [], []
+    for item, slope in (("a", 0.5), ("b", -0.4), ("c", 0.0)):
+        item_days = np.sort(rng.uniform(19000, 19060, size=12))
+        item_days -= item_days[0] - 19000.25
+        item_ids += [item] * 12
+        days.append(item_days)
+        prices.append(50 + slope * (item_days - item_days[0]) + rng.normal(0, 0.5, 12))
+    item_ids.append("d")
+    days.append(np.array([19010.0]))
+    prices.append(np.array([12.0]))
+    prices, days = np.concatenate(prices), np.concatenate(days)
+
+    results = analyze_price_points(item_ids, prices, days)
+
+    for item, expected_trend in (("a", "increasing"), ("b", "decreasing")):
+        mask = np.array(item_ids) == item
+        x = np.floor(days[mask] - days[mask][0])
+        y = prices[mask]
+        coeffs = np.polyfit(x, y, 1)
+        y_pred = np.polyval(coeffs, x)
+        r_squared = 1 - np.sum((y - y_pred) ** 2) / np.sum((y - y.mean()) ** 2)
+
+        assert results[item]["trend"] == expected_trend
+        assert results[item]["confidence"] == pytest.approx(r_squared)
+        assert results[item]["average_price"] == pytest.approx(y.mean())
+        assert results[item]["data_points"] == 12
+
+    assert results["d"]["trend"] == "insufficient_data"
+    assert results["d"]["price_range"] == {"min": 12.0, "max": 12.0}
+
+
+def test_seasonal_pattern_classifies_histograms():
+    """Clustered peaks are single-season and sparse data is insufficient."""
+    from app.marketplace_integrations.market_research_jobs import seasonal_pattern
+
+    single = seasonal_pattern({1: 2, 2: 2, 3: 2, 4: 2, 10: 9, 11: 12, 12: 10})
+    assert single['pattern'] == 'single_season'
+    assert single['peak_months'] == [10, 11, 12]
+    assert 0 < single['confidence'] <= 1.0
+
+    assert seasonal_pattern({5: 3, 6: 4})['pattern'] == 'insufficient_data'
+    assert seasonal_pattern({})['peak_months'] == []
+
+
+async def test_monthly_demand_is_queried_once_per_day(job, monkeypatch):
+    """All categories come from one grouped query that is cached daily."""
+    from app.marketplace_integrations import market_research_jobs
+
+    monkeypatch.setattr(
+        market_research_jobs,
+        "_monthly_demand_cache",
+        {'day': None, 'histograms': {}}
+    )
+
+    class MockDB:
+        def __init__(self):
+            self.queries = 0
+
+        async def query_raw(self, query, *args):
+            self.queries += 1
+            return [
+                {'category': 'Clothing', 'month': 11, 'orders': 5},
+                {'category': 'Clothing', 'month': 12, 'orders': 8},
+                {'category': 'Toys', 'month': 12, 'orders': 3},
+            ]
+
+    job.db = MockDB()
+
+    clothing = await job.predict_seasonal_demand('Clothing')
+    toys = await job.predict_seasonal_demand('Toys')
+    unknown = await job.predict_seasonal_demand('Books')
+
+    assert job.db.queries == 1
+    assert clothing['monthly_distribution'] == {11: 5, 12: 8}
+    assert toys['monthly_distribution'] == {12: 3}
+    assert unknown['pattern'] == 'insufficient_data'
+
+
+class MockPriceIndexModel:
+    """Mock Prisma client for the competitor price index table."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def find_unique(self, where):
+        key = where['itemId_marketplace']
+        return self.rows.get((key['itemId'], key['marketplace']))
+
+    async def find_many(self, where):
+        return [row for (item_id, _), row in self.rows.items() if item_id == where['itemId']]
+
+    async def upsert(self, where, data):
+        key = where['itemId_marketplace']
+        fields = {**key, **data['update']}
+        self.rows[(key['itemId'], key['marketplace'])] = SimpleNamespace(**fields)
+
+
+class MockResearchDB:
+    """Mock database client for research storage."""
+
+    def __init__(self, listings, research=()):
+        self.competitorpriceindex = MockPriceIndexModel()
+        self.listing = SimpleNamespace(
+            find_unique=self._find_listing,
+            find_many=self._find_listings
+        )
+        self.marketresearchdata = SimpleNamespace(create=self._create_research)
+        self.listings = {listing.id: listing for listing in listings}
+        self.research = list(research)
+        self.locks = []
+
+    async def _find_listing(self, where):
+        return self.listings.get(where['id'])
+
+    async def _find_listings(self, where, include=None):
+        return [
+            SimpleNamespace(
+                marketplace=listing.marketplace,
+                marketResearch=[
+                    SimpleNamespace(competitorPrices=data.get('competitorPrices'))
+                    for data in self.research if data['listingId'] == listing.id
+                ]
+            )
+            for listing in self.listings.values()
+            if listing.itemId == where['itemId']
+        ]
+
+    async def _create_research(self, data):
+        self.research.append(data)
+        return data
+
+    @contextlib.asynccontextmanager
+    async def tx(self):
+        yield self
+
+    async def query_raw(self, query, *args):
+        self.locks.append(args[0])
+        return [{'pg_advisory_xact_lock': ''}]
+
+
+async def test_competitive_pricing_reads_price_index(job):
+    """Stored research updates the index that pricing analysis reads."""
+    from app.marketplace_integrations.price_index import CompetitorPriceIndex
+
+    job.price_index = CompetitorPriceIndex()
+    job.db = MockResearchDB([
+        SimpleNamespace(id='l-ebay', itemId='item-1', marketplace='ebay'),
+        SimpleNamespace(id='l-etsy', itemId='item-1', marketplace='etsy'),
+    ])
+
+    await job.store_research('l-ebay', {'competitorPrices': {'prices': [10.0, 12.0]}})
+    await job.store_research('l-ebay', {'competitorPrices': {'prices': [14.0]}})
+    await job.store_research('l-etsy', {'competitorPrices': {'prices': [20.0, 22.0]}})
+
+    analysis = await job.analyze_competitive_pricing('item-1')
+
+    assert len(job.db.research) == 3
+    assert analysis['price_points']['ebay'] == {
+        'average': 12.0,
+        'median': 12.0,
+        'p10': 10.0,
+        'p90': 14.0,
+        'min': 10.0,
+        'max': 14.0,
+        'sample_size': 3
+    }
+    assert analysis['recommendation'] == 'competitive_advantage'
+    assert analysis['target_price'] == pytest.approx(21.0 * 0.95)
+    assert analysis['market_spread'] == {
+        'min': 10.0,
+        'max': 22.0,
+        'p10': 10.0,
+        'median': 14.0,
+        'p90': 22.0
+    }
+
+
+async def test_first_index_write_keeps_research_history(job):
+    """Research stored before the index existed is folded into its first row."""
+    from app.marketplace_integrations.price_index import CompetitorPriceIndex
+
+    job.price_index = CompetitorPriceIndex()
+    job.db = MockResearchDB(
+        [
+            SimpleNamespace(id='l-ebay', itemId='item-1', marketplace='ebay'),
+            SimpleNamespace(id='l-etsy', itemId='item-1', marketplace='etsy'),
+        ],
+        research=[
+            {'listingId': 'l-ebay', 'competitorPrices': {'prices': [8.0, 9.0]}},
+            {'listingId': 'l-etsy', 'competitorPrices': {'prices': [20.0]}},
+        ]
+    )
+
+    await job.store_research('l-ebay', {'competitorPrices': {'prices': [10.0]}})
+    summaries = await job.price_index.get(job.db, 'item-1')
+
+    assert summaries['ebay'].count == 3
+    assert summaries['ebay'].total == 27.0
+    assert summaries['etsy'].count == 1
+    assert job.db.locks == ['CompetitorPriceIndex:item-1']
+
+
+async def test_research_stream_stores_research(job, monkeypatch):
+    """Parsed eBay results reach the price index; storage failures don't block analytics."""
+    from app.marketplace_integrations import market_research_jobs
+    from app.marketplace_integrations.ebay_client import EbayClient
+    from app.marketplace_integrations.price_index import CompetitorPriceIndex
+
+    updated = []
+
+    async def fake_update(listing_id, market_data):
+        updated.append(listing_id)
+
+    monkeypatch.setattr(market_research_jobs, "update_analytics_data", fake_update)
+    job.price_index = CompetitorPriceIndex()
+    job.db = MockResearchDB([SimpleNamespace(id='l-ebay', itemId='item-1', marketplace='ebay')])
+    current = EbayClient(client_id="id", client_secret="secret").parse_response({
+        "listings": [{"price": 12.0}, {"price": 0}, {"price": 14.0}],
+        "total_listings": 3
+    })
+
+    async def stream():
+        for listing_id in ('l-ebay', 'l-unknown'):
+            yield listing_id, {
+                'timestamp': '2026-10-18T00:00:00',
+                'current_data': current,
+                'price_history': None
+            }
+
+    summary = await market_research_jobs.update_analytics_from_stream(
+        stream(), store_research=job.store_market_data
+    )
+
+    assert summary == {'updated': 2, 'skipped': 0, 'failed': 0, 'store_failed': 1}
+    assert updated == ['l-ebay', 'l-unknown']
+    assert job.db.research[0]['competitorPrices']['prices'] == [12.0, 14.0]
+    assert (await job.price_index.get(job.db, 'item-1'))['ebay'].count == 2
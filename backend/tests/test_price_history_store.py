@@ -0,0 +1,171 @@
+"""Unit tests for the incremental price history store."""
+from datetime import date, datetime, time, timedelta
+
+from app.marketplace_integrations.ebay_client import EbayClient
+from app.marketplace_integrations.price_history_store import PriceHistoryStore
+
+
+class RecordingFetcher:
+    """Range fetcher that records the requested ranges."""
+
+    def __init__(self, price=10.0):
+        self.price = price
+        self.ranges = []
+
+    async def __call__(self, item_id, start_date, end_date):
+        self.ranges.append((start_date, end_date))
+        points = []
+        current = start_date
+        while current <= end_date:
+            points.append({
+                "date": current.isoformat(),
+                "average_price": self.price,
+                "total_listings": 3
+            })
+            current += timedelta(days=1)
+        return points
+
+
+async def test_daily_runs_fetch_only_new_days():
+    """The next day's run fetches the new day and refreshes the partial one."""
+    store = PriceHistoryStore(directory="")
+    fetch = RecordingFetcher()
+    day_one = date(2026, 10, 1)
+
+    first = await store.get_history("ebay", "item-1", 30, fetch, today=day_one)
+    fetch.price = 12.0
+    second = (await store.get_history(
+        "ebay", "item-1", 30, fetch, today=day_one + timedelta(days=1)
+    )).to_dict()
+
+    assert fetch.ranges == [
+        (day_one - timedelta(days=30), day_one),
+        (day_one, day_one + timedelta(days=1)),
+    ]
+    assert second["daily_prices"][-2]["average_price"] == 12.0
+    assert len(first) == 31
+    assert len(second["daily_prices"]) == 31
+    assert second["daily_prices"][0]["date"] == datetime.combine(
+        day_one - timedelta(days=29), time.min
+    ).isoformat()
+    assert second["daily_prices"][-1] == {
+        "date": datetime.combine(day_one + timedelta(days=1), time.min).isoformat(),
+        "average_price": 12.0,
+        "total_listings": 3
+    }
+    assert store.stats()["fetched_days"] == 33
+
+
+async def test_same_day_refreshes_only_today():
+    """Repeating a request on the same day refetches just the partial day."""
+    store = PriceHistoryStore(directory="")
+    fetch = RecordingFetcher()
+    today = date(2026, 10, 1)
+
+    await store.get_history("ebay", "item-1", 7, fetch, today=today)
+    fetch.price = 11.0
+    history = await store.get_history("ebay", "item-1", 7, fetch, today=today)
+
+    assert fetch.ranges[-1] == (today, today)
+    assert history.prices[-1] == 11.0
+    assert history.prices[0] == 10.0
+
+
+async def test_longer_window_fetches_only_older_days():
+    """Extending the window backwards fetches just the older days."""
+    store = PriceHistoryStore(directory="")
+    fetch = RecordingFetcher()
+    today = date(2026, 10, 1)
+
+    await store.get_history("ebay", "item-1", 7, fetch, today=today)
+    history = await store.get_history("ebay", "item-1", 30, fetch, today=today)
+
+    assert fetch.ranges[1] == (today - timedelta(days=30), today - timedelta(days=8))
+    assert len(history) == 31
+
+
+async def test_gap_since_last_fetch_starts_over():
+    """A window that no longer touches stored days is refetched whole."""
+    store = PriceHistoryStore(directory="")
+    fetch = RecordingFetcher()
+    today = date(2026, 10, 1)
+
+    await store.get_history("ebay", "item-1", 7, fetch, today=today)
+    later = today + timedelta(days=60)
+    history = await store.get_history("ebay", "item-1", 7, fetch, today=later)
+
+    assert fetch.ranges[-1] == (later - timedelta(days=7), later)
+    assert len(history) == 8
+
+
+async def test_series_persist_across_store_instances(tmp_path):
+    """A new process picks up the stored series from disk."""
+    fetch = RecordingFetcher()
+    today = date(2026, 10, 1)
+
+    await PriceHistoryStore(directory=str(tmp_path)).get_history(
+        "ebay", "item-1", 30, fetch, today=today
+    )
+    history = await PriceHistoryStore(directory=str(tmp_path)).get_history(
+        "ebay", "item-1", 30, fetch, today=today + timedelta(days=1)
+    )
+
+    assert len(fetch.ranges) == 2
+    assert fetch.ranges[1] == (today, today + timedelta(days=1))
+    assert len(history) == 31
+
+
+async def test_ebay_client_reads_through_store():
+    """EbayClient.get_price_history only fetches uncovered days."""
+    store = PriceHistoryStore(directory="")
+    client = EbayClient(client_id="id", client_secret="secret", history_store=store)
+
+    first = await client.get_price_history("item-1", days=30)
+    await client.get_price_history("item-1", days=30)
+
+    assert len(first) == 31
+    assert store.stats() == {"cached_series": 1, "requested_days": 62, "fetched_days": 32}
+    assert len(store._locks) == 0
+
+
+async def test_batch_groups_items_missing_the_same_days():
+    """Items needing the same days share one batch fetch."""
+    store = PriceHistoryStore(directory="")
+    calls = []
+    today = date(2026, 10, 1)
+
+    async def fetch_batch(item_ids, start_date, end_date):
+        calls.append((sorted(item_ids), start_date, end_date))
+        single = RecordingFetcher()
+        return {item_id: await single(item_id, start_date, end_date) for item_id in item_ids}
+
+    await store.get_history_batch("ebay", ["a", "b"], 7, fetch_batch, today=today)
+    histories = await store.get_history_batch(
+        "ebay", ["a", "b", "c"], 7, fetch_batch, today=today + timedelta(days=1)
+    )
+
+    tomorrow = today + timedelta(days=1)
+    assert calls == [
+        (["a", "b"], today - timedelta(days=7), today),
+        (["a", "b"], today, tomorrow),
+        (["c"], tomorrow - timedelta(days=7), tomorrow),
+    ]
+    assert {item_id: len(series) for item_id, series in histories.items()} == {"a": 8, "b": 8, "c": 8}
+
+
+async def test_partial_day_is_refreshed_after_the_clock_advances():
+    """A day stored while partial is refetched by the next day's run."""
+    store = PriceHistoryStore(directory="")
+    fetch = RecordingFetcher()
+    today = date(2026, 10, 1)
+
+    await store.get_history("ebay", "item-1", 7, fetch, today=today)
+    fetch.price = 15.0
+    history = await store.get_history(
+        "ebay", "item-1", 7, fetch, today=today + timedelta(days=1)
+    )
+
+    assert fetch.ranges[-1] == (today, today + timedelta(days=1))
+    assert history.prices[-2] == 15.0
+    assert history.prices[-3] == 10.0
+    assert len(store._locks) == 0
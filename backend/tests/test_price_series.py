@@ -0,0 +1,41 @@
+"""Unit tests for the compact daily price series."""
+import numpy as np
+
+from app.marketplace_integrations.price_series import DailyPriceSeries
+
+
+def test_json_round_trip_is_lossless():
+    """to_dict and from_dict restore the same series and the same JSON."""
+    payload = {
+        "item_id": "item-1",
+        "start_date": "2026-09-01T00:00:00",
+        "end_date": "2026-09-04T00:00:00",
+        "daily_prices": [
+            {"date": "2026-09-01T00:00:00", "average_price": 89.99, "total_listings": 10},
+            {"date": "2026-09-02T00:00:00", "average_price": 0.1, "total_listings": 0},
+            {"date": "2026-09-04T00:00:00", "average_price": 12345.67, "total_listings": 7},
+        ]
+    }
+
+    series = DailyPriceSeries.from_dict(payload)
+    restored = DailyPriceSeries.from_dict(series.to_dict())
+
+    assert series.to_dict() == payload
+    assert series.days.dtype == np.int32
+    assert series.prices.dtype == np.float32
+    assert series.listings.dtype == np.int32
+    assert np.array_equal(restored.days, series.days)
+    assert np.array_equal(restored.prices, series.prices)
+    assert np.array_equal(restored.listings, series.listings)
+
+
+def test_series_is_compact():
+    """A year of daily points takes 12 bytes per day."""
+    series = DailyPriceSeries.from_arrays(
+        "item-1", 20000, 20365, np.arange(20000, 20366), np.full(366, 19.99), np.ones(366)
+    )
+
+    assert len(series) == 366
+    assert series.nbytes == 366 * 12
+    assert series.average_price() == np.float32(19.99)
+    assert DailyPriceSeries.from_arrays("item-2", 0, 0, [], [], []).average_price() is None
@@ -0,0 +1,113 @@
+"""Unit tests for the batch pricing engine."""
+import numpy as np
+import pytest
+
+from app.marketplace_integrations.market_research_jobs import fit_price_trends
+from app.marketplace_integrations.pricing_engine import (
+    BatchPricingEngine,
+    benchmark,
+    compute_recommendations,
+    summarize_competitors,
+)
+
+
+def test_compute_recommendations_follows_competitive_pricing_rules():
+    """Each item gets the recommendation the per-item analysis would give."""
+    trends = fit_price_trends(
+        ['a', 'a', 'a', 'd'],
+        np.array([10.0, 11.0, 12.0, 5.0]),
+        np.array([19000.0, 19001.0, 19002.0, 19000.0])
+    )
+    competitors = summarize_competitors(
+        ['a', 'a', 'b', 'b', 'c'],
+        np.array([10.0, 10.0, 5.0, 5.0, 4.0]),
+        np.array([200.0, 210.0, 50.0, 100.0, 60.0])
+    )
+
+    columns = compute_recommendations(trends, competitors)
+    by_item = {
+        item_id: {name: column[i] for name, column in columns.items()}
+        for i, item_id in enumerate(columns['item_id'])
+    }
+
+    assert list(columns['item_id']) == ['a', 'b', 'c', 'd']
+
+    # Averages 20 and 21 are within 10%
+    assert by_item['a']['recommendation'] == 'match_market'
+    assert by_item['a']['target_price'] == pytest.approx(20.0)
+    assert by_item['a']['confidence'] == 1.0
+    assert by_item['a']['trend'] == 'increasing'
+    assert by_item['a']['average_price'] == pytest.approx(11.0)
+
+    # Averages 10 and 20 are far apart
+    assert by_item['b']['recommendation'] == 'competitive_advantage'
+    assert by_item['b']['target_price'] == pytest.approx(20.0 * 0.95)
+    assert by_item['b']['confidence'] == pytest.approx(0.5)
+    assert by_item['b']['trend'] == 'insufficient_data'
+
+    assert by_item['c']['recommendation'] == 'single_marketplace'
+    assert by_item['c']['target_price'] == pytest.approx(15.0)
+    assert by_item['c']['confidence'] == 0.5
+
+    assert by_item['d']['recommendation'] == 'insufficient_data'
+    assert np.isnan(by_item['d']['target_price'])
+    assert by_item['d']['trend'] == 'insufficient_data'
+
+
+class MockJob:
+    """Mock research job returning fixed price points."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def fetch_price_points(self, item_ids=None):
+        return (
+            ['a', 'a', 'b'],
+            np.array([10.0, 12.0, 30.0]),
+            np.array([19000.0, 19003.0, 19001.0])
+        )
+
+
+class MockDB:
+    """Mock database client recording raw statements."""
+
+    def __init__(self):
+        self.writes = []
+
+    async def query_raw(self, query, *args):
+        return [
+            {'item_id': 'a', 'count': 4, 'sum': 40.0},
+            {'item_id': 'c', 'count': 2, 'sum': 50.0},
+        ]
+
+    async def execute_raw(self, query, *args):
+        self.writes.append(args)
+
+
+async def test_run_writes_recommendations_in_chunks(monkeypatch):
+    """All items are upserted in chunked bulk statements."""
+    from app.marketplace_integrations import pricing_engine
+
+    monkeypatch.setattr(pricing_engine, "WRITE_CHUNK_SIZE", 2)
+    db = MockDB()
+    engine = BatchPricingEngine(job=MockJob(db))
+
+    stats = await engine.run()
+
+    assert stats['items'] == 3
+    assert stats['items_per_second'] > 0
+    assert len(db.writes) == 2
+    item_ids = db.writes[0][0] + db.writes[1][0]
+    recommendations = db.writes[0][4] + db.writes[1][4]
+    target_prices = db.writes[0][5] + db.writes[1][5]
+    assert item_ids == ['a', 'b', 'c']
+    assert recommendations == ['single_marketplace', 'insufficient_data', 'single_marketplace']
+    assert target_prices == [10.0, None, 25.0]
+
+
+def test_benchmark_reports_throughput():
+    """The synthetic benchmark reports items per second."""
+    result = benchmark(n_items=500, points_per_item=5)
+
+    assert result['items'] == 500
+    assert result['items_per_second'] > 0
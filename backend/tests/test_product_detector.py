@@ -0,0 +1,79 @@
+"""Unit tests for batched, cached product detection."""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from app.services.image_processing import product_detector
+from app.services.image_processing.analysis_cache import AnalysisCache
+from app.services.image_processing.product_detector import ProductDetector
+
+
+class MockVisionClient:
+    """Vision client answering batch annotate requests with one logo per image."""
+
+    def __init__(self):
+        self.requests = []
+        self.threads = []
+
+    def batch_annotate_images(self, requests):
+        self.requests.append(len(requests))
+        self.threads.append(threading.current_thread())
+        return SimpleNamespace(responses=[
+            SimpleNamespace(
+                error=SimpleNamespace(message="" if request.image.content != b"bad" else "bad image"),
+                label_annotations=[],
+                localized_object_annotations=[],
+                logo_annotations=[
+                    SimpleNamespace(description=request.image.content.decode(), score=0.9)
+                ]
+            )
+            for request in requests
+        ])
+
+
+def make_detector(tmp_path):
+    detector = ProductDetector(cache=AnalysisCache("test", directory=str(tmp_path)))
+    detector.vision_enabled = True
+    detector.client = MockVisionClient()
+    return detector
+
+
+async def test_images_share_annotate_requests_off_the_event_loop(tmp_path, monkeypatch):
+    """Images are packed into as few requests as the per-request limit allows."""
+    monkeypatch.setattr(product_detector, "MAX_IMAGES_PER_REQUEST", 4)
+    detector = make_detector(tmp_path)
+    images = [f"brand-{i}".encode() for i in range(10)]
+
+    detections = await detector.detect_products_batch(images)
+
+    assert detector.client.requests == [4, 4, 2]
+    assert threading.main_thread() not in detector.client.threads
+    assert [d["logos"][0]["description"] for d in detections] == [i.decode() for i in images]
+
+
+async def test_failed_images_are_reported_per_image(tmp_path):
+    """A Vision error for one image does not fail the rest of its request."""
+    detector = make_detector(tmp_path)
+
+    results = await detector.analyze_products([b"good", b"bad"])
+    again = await detector.analyze_products([b"good", b"bad"])
+
+    assert results[0]["brand"]["detected_brands"] == [{"name": "good", "confidence": 0.9}]
+    assert results[1]["brand"]["detected_brands"] == []
+    assert "error" in results[1] and "error" not in results[0]
+    # Only the failed image is sent again
+    assert detector.client.requests == [2, 1]
+    assert again[0] == results[0]
+
+
+async def test_detector_analyzes_each_image_once(tmp_path):
+    """Repeated and concurrent requests for one image make one Vision call."""
+    detector = make_detector(tmp_path)
+
+    results = await asyncio.gather(*(detector.analyze_product(b"Acme") for _ in range(3)))
+    results[0]["brand"]["confidence"] = 0.0
+    again = await detector.analyze_product(b"Acme")
+
+    assert detector.client.requests == [1]
+    assert again["brand"]["detected_brands"] == [{"name": "Acme", "confidence": 0.9}]
+    assert again["brand"]["confidence"] == 0.9
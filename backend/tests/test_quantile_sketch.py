@@ -0,0 +1,73 @@
+"""Unit tests for the streaming quantile sketch."""
+import numpy as np
+import pytest
+
+from app.marketplace_integrations.price_index import PriceSummary
+from app.marketplace_integrations.quantile_sketch import QuantileSketch
+
+
+def _rank(sorted_values, value):
+    return np.searchsorted(sorted_values, value) / len(sorted_values)
+
+
+def test_sketch_estimates_quantiles_with_bounded_memory():
+    """Quantile ranks stay within a small error while memory is capped."""
+    rng = np.random.default_rng(42)
+    prices = rng.lognormal(3.0, 0.6, 50_000)
+    sketch = QuantileSketch(k=200)
+    sketch.extend(prices)
+
+    ordered = np.sort(prices)
+    for q in (0.1, 0.5, 0.9):
+        assert _rank(ordered, sketch.quantile(q)) == pytest.approx(q, abs=0.02)
+    assert sketch.retained < 1000
+    assert len(sketch) == 50_000
+    assert sketch.quantile(0) == ordered[0]
+    assert sketch.quantile(1) == ordered[-1]
+
+
+def test_merged_sketches_match_a_single_stream():
+    """Merging per-marketplace sketches approximates the combined data."""
+    rng = np.random.default_rng(3)
+    ebay = rng.normal(100, 10, 20_000)
+    etsy = rng.normal(130, 15, 5_000)
+    left, right = QuantileSketch(), QuantileSketch()
+    left.extend(ebay)
+    right.extend(etsy)
+
+    merged = QuantileSketch().merge(left).merge(right)
+
+    ordered = np.sort(np.concatenate([ebay, etsy]))
+    assert len(merged) == 25_000
+    for q in (0.1, 0.5, 0.9):
+        assert _rank(ordered, merged.quantile(q)) == pytest.approx(q, abs=0.02)
+    # Sources are left untouched
+    assert len(left) == 20_000
+
+
+def test_sketch_round_trips_through_dict():
+    """Serialized sketches restore to identical estimates."""
+    sketch = QuantileSketch(k=50)
+    sketch.extend(range(1000))
+
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+
+    assert restored.quantiles((0.1, 0.5, 0.9)) == sketch.quantiles((0.1, 0.5, 0.9))
+    restored.update(5000)
+    assert restored.maximum == 5000
+
+
+def test_price_summary_merges_time_windows():
+    """Summaries for separate windows merge into all-time statistics."""
+    january, february = PriceSummary(), PriceSummary()
+    january.add([10.0, 20.0, 30.0])
+    february.add([40.0])
+
+    combined = PriceSummary().merge(january).merge(february)
+    point = combined.price_point()
+
+    assert point['sample_size'] == 4
+    assert point['average'] == 25.0
+    assert point['min'] == 10.0
+    assert point['max'] == 40.0
+    assert point['median'] in (20.0, 30.0)
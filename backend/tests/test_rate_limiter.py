@@ -0,0 +1,81 @@
+"""Unit tests for per-marketplace request scheduling."""
+import asyncio
+import time
+
+import pytest
+
+from app.marketplace_integrations.rate_limiter import (
+    MarketplaceScheduler,
+    RateLimitConfig,
+    TokenBucket,
+    rate_limited,
+)
+
+
+async def test_token_bucket_limits_rate():
+    """Acquisitions beyond the burst wait for refill."""
+    bucket = TokenBucket(rate=20.0, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    # Two tokens are available immediately, two more take ~0.1s to refill
+    assert time.monotonic() - start >= 0.09
+
+
+async def test_scheduler_bounds_concurrency():
+    """No more than max_concurrency calls run at once."""
+    scheduler = MarketplaceScheduler({
+        "ebay": RateLimitConfig(max_concurrency=2, requests_per_second=1000.0, burst=100),
+    })
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*[
+        scheduler.run("ebay", call) for _ in range(6)
+    ])
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+    metrics = scheduler.get_metrics("ebay")
+    assert metrics["requests"] == 6
+    assert metrics["queued"] == 0
+    assert metrics["in_flight"] == 0
+    assert metrics["max_wait_seconds"] > 0
+
+
+async def test_rate_limited_uses_client_marketplace():
+    """Decorated methods are scheduled under the client's marketplace."""
+    scheduler = MarketplaceScheduler()
+
+    class Client:
+        marketplace = "etsy"
+
+        def __init__(self):
+            self.scheduler = scheduler
+
+        @rate_limited
+        async def ping(self, value):
+            return value
+
+    assert await Client().ping(3) == 3
+    assert scheduler.get_metrics()["etsy"]["requests"] == 1
+
+
+async def test_failed_calls_are_not_left_in_flight():
+    """Exceptions propagate and release the concurrency slot."""
+    scheduler = MarketplaceScheduler()
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await scheduler.run("ebay", fail)
+    assert scheduler.get_metrics("ebay")["in_flight"] == 0
@@ -0,0 +1,91 @@
+"""Unit tests for the marketplace response cache."""
+import asyncio
+
+import pytest
+
+from app.marketplace_integrations.response_cache import ResponseCache
+
+
+class CountingFetcher:
+    """Fetcher returning a new version on every call."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"version": self.calls}
+
+
+async def test_concurrent_misses_are_coalesced():
+    """Identical concurrent requests share one upstream fetch."""
+    cache = ResponseCache("test")
+    fetch = CountingFetcher()
+
+    results = await asyncio.gather(
+        *(cache.get_or_fetch(("ebay", "item-1", None), fetch) for _ in range(20))
+    )
+
+    assert fetch.calls == 1
+    assert all(result == {"version": 1} for result in results)
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 19
+
+    assert await cache.get_or_fetch(("ebay", "item-1", None), fetch) == {"version": 1}
+    assert cache.stats()["hits"] == 1
+
+
+async def test_stale_entries_are_served_while_revalidating():
+    """Past the TTL the old value is returned and refreshed in the background."""
+    cache = ResponseCache("test", ttl=0.05, stale_ttl=60.0)
+    fetch = CountingFetcher(delay=0)
+
+    await cache.get_or_fetch("key", fetch)
+    await asyncio.sleep(0.06)
+
+    assert await cache.get_or_fetch("key", fetch) == {"version": 1}
+    await asyncio.sleep(0.01)
+    assert await cache.get_or_fetch("key", fetch) == {"version": 2}
+    assert cache.stats()["stale_hits"] == 1
+
+    # Beyond the stale window the caller waits for a fresh value
+    cache.stale_ttl = 0.0
+    await asyncio.sleep(0.06)
+    assert await cache.get_or_fetch("key", fetch) == {"version": 3}
+    assert cache.stats()["misses"] == 2
+
+
+async def test_lru_eviction_bounds_size():
+    """The least recently used entry is evicted first."""
+    cache = ResponseCache("test", max_entries=2)
+    fetch = CountingFetcher(delay=0)
+
+    await cache.get_or_fetch("a", fetch)
+    await cache.get_or_fetch("b", fetch)
+    await cache.get_or_fetch("a", fetch)
+    await cache.get_or_fetch("c", fetch)
+
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    calls = fetch.calls
+    await cache.get_or_fetch("a", fetch)
+    assert fetch.calls == calls
+    await cache.get_or_fetch("b", fetch)
+    assert fetch.calls == calls + 1
+
+
+async def test_failed_fetch_is_not_cached():
+    """Errors reach the caller and the next request retries."""
+    cache = ResponseCache("test")
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch("key", failing)
+
+    assert await cache.get_or_fetch("key", CountingFetcher(delay=0)) == {"version": 1}
+    assert cache.stats()["errors"] == 1
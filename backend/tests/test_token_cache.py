@@ -0,0 +1,104 @@
+"""Unit tests for the shared marketplace token cache."""
+import asyncio
+
+import pytest
+
+from app.marketplace_integrations.ebay_client import EbayClient
+from app.marketplace_integrations.token_cache import TokenCache
+
+
+class CountingFetcher:
+    """Token fetcher that counts auth calls."""
+
+    def __init__(self, lifetime=3600.0, delay=0.02):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"token-{self.calls}", self.lifetime
+
+
+async def test_concurrent_requests_single_flight():
+    """A burst of requests for a missing token makes one auth call."""
+    cache = TokenCache(path="")
+    fetch = CountingFetcher()
+
+    tokens = await asyncio.gather(*(cache.get_token("ebay:id", fetch) for _ in range(50)))
+
+    assert fetch.calls == 1
+    assert {token.access_token for token in tokens} == {"token-1"}
+    await cache.close()
+
+
+async def test_tokens_are_shared_through_the_cache_file(tmp_path):
+    """A second worker reuses the token the first one stored."""
+    path = str(tmp_path / "tokens.json")
+    fetch = CountingFetcher()
+
+    first = await TokenCache(path=path).get_token("ebay:id", fetch)
+    second = await TokenCache(path=path).get_token("ebay:id", fetch)
+
+    assert fetch.calls == 1
+    assert second == first
+
+
+async def test_token_near_expiry_is_refreshed_in_background():
+    """Callers keep the current token while the next one is fetched."""
+    cache = TokenCache(path="", refresh_margin=10.0)
+    fetch = CountingFetcher(lifetime=5.0)
+
+    first = await cache.get_token("ebay:id", fetch)
+    served = await cache.get_token("ebay:id", fetch)
+    await asyncio.sleep(0.05)
+    refreshed = await cache.get_token("ebay:id", fetch)
+
+    assert served == first
+    assert refreshed.access_token != first.access_token
+    assert fetch.calls >= 2
+    await cache.close()
+
+
+async def test_failed_refresh_raises_to_waiters():
+    """Without a valid token, fetch errors reach the caller."""
+    cache = TokenCache(path="")
+
+    async def failing_fetch():
+        raise RuntimeError("auth down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_token("ebay:id", failing_fetch)
+
+
+async def test_ebay_clients_share_tokens():
+    """Clients with the same credentials authenticate once."""
+    cache = TokenCache(path="")
+    clients = [
+        EbayClient(client_id="id", client_secret="secret", token_cache=cache)
+        for _ in range(3)
+    ]
+
+    await asyncio.gather(*(client.authenticate() for client in clients))
+
+    assert cache.refreshes == 1
+    assert {client.access_token for client in clients} == {"development-token"}
+    await cache.close()
+
+
+async def test_cache_file_writable_by_others_is_ignored(tmp_path, monkeypatch):
+    """A token planted in a file other users can write is not trusted."""
+    path = tmp_path / "tokens.json"
+    path.write_text('{"ebay:id": {"access_token": "planted", "expires_at": 9999999999}}')
+    path.chmod(0o666)
+    fetch = CountingFetcher()
+
+    token = await TokenCache(path=str(path)).get_token("ebay:id", fetch)
+
+    assert token.access_token == "token-1"
+    assert fetch.calls == 1
+
+    # Tokens stay in memory unless a cache file is configured
+    monkeypatch.delenv("MARKETPLACE_TOKEN_CACHE", raising=False)
+    assert TokenCache().path == ""
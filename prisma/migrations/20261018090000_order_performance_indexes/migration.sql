@@ -0,0 +1,8 @@
+-- AlterTable
+ALTER TABLE "Order" ADD COLUMN     "completedAt" TIMESTAMP(3);
+
+-- CreateIndex
+CREATE INDEX "Order_listingId_status_idx" ON "Order"("listingId", "status");
+
+-- CreateIndex
+CREATE INDEX "Listing_marketplace_idx" ON "Listing"("marketplace");
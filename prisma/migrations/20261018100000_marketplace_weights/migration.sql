@@ -0,0 +1,10 @@
+-- CreateTable
+CREATE TABLE "MarketplaceWeight" (
+    "marketplace" TEXT NOT NULL,
+    "completedCount" INTEGER NOT NULL DEFAULT 0,
+    "cancelledCount" INTEGER NOT NULL DEFAULT 0,
+    "completionHours" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "MarketplaceWeight_pkey" PRIMARY KEY ("marketplace")
+);
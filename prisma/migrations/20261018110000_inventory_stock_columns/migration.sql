@@ -0,0 +1,11 @@
+-- AlterTable
+ALTER TABLE "Item" ADD COLUMN     "lastStockUpdate" TIMESTAMP(3),
+ADD COLUMN     "stockQuantity" INTEGER NOT NULL DEFAULT 0;
+
+-- AlterTable
+ALTER TABLE "Listing" ADD COLUMN     "endedAt" TIMESTAMP(3),
+ADD COLUMN     "lastStockUpdate" TIMESTAMP(3),
+ADD COLUMN     "quantity" INTEGER NOT NULL DEFAULT 0;
+
+-- CreateIndex
+CREATE INDEX "Listing_itemId_status_idx" ON "Listing"("itemId", "status");
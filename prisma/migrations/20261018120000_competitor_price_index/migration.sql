@@ -0,0 +1,13 @@
+-- CreateTable
+CREATE TABLE "CompetitorPriceIndex" (
+    "itemId" TEXT NOT NULL,
+    "marketplace" TEXT NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+    "sum" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "min" DOUBLE PRECISION,
+    "max" DOUBLE PRECISION,
+    "sketch" JSONB,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "CompetitorPriceIndex_pkey" PRIMARY KEY ("itemId","marketplace")
+);
@@ -0,0 +1,13 @@
+-- CreateTable
+CREATE TABLE "PricingRecommendation" (
+    "itemId" TEXT NOT NULL,
+    "trend" TEXT NOT NULL,
+    "trendConfidence" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "averagePrice" DOUBLE PRECISION,
+    "recommendation" TEXT NOT NULL,
+    "targetPrice" DOUBLE PRECISION,
+    "confidence" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "computedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "PricingRecommendation_pkey" PRIMARY KEY ("itemId")
+);
@@ -0,0 +1,12 @@
+-- AlterTable
+ALTER TABLE "Item" ADD COLUMN     "analysisFingerprint" TEXT,
+ADD COLUMN     "analyzedAt" TIMESTAMP(3);
+
+-- CreateTable
+CREATE TABLE "JobCheckpoint" (
+    "name" TEXT NOT NULL,
+    "lastId" TEXT,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "JobCheckpoint_pkey" PRIMARY KEY ("name")
+);